@@ -40,6 +40,7 @@ INSTALLED_APPS = [
 
 
 MIDDLEWARE = [
+    "myapp.middleware.QueryInstrumentationMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -86,6 +87,16 @@ DATABASES = {
 }
 
 
+# ---------------------------------------------------------------------------
+# Кеш (довідники тощо). CACHE_URL у форматі django-environ:
+# locmemcache://, dbcache://myapp_cache, rediscache://host:6379/1
+# ---------------------------------------------------------------------------
+
+CACHES = {
+    "default": env.cache("CACHE_URL", default="locmemcache://"),
+}
+
+
 # ---------------------------------------------------------------------------
 # Password validation
 # ---------------------------------------------------------------------------
@@ -128,6 +139,19 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
+# Віддача media (myapp.media): файли з хешем вмісту в імені кешуються назавжди,
+# решта — на MEDIA_MAX_AGE секунд з перевіркою через ETag
+MEDIA_MAX_AGE = env.int("MEDIA_MAX_AGE", default=60 * 60)
+MEDIA_IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+# Внутрішній location nginx (X-Accel-Redirect), якщо файли віддає він; порожньо — віддає Django
+MEDIA_ACCEL_REDIRECT = env("MEDIA_ACCEL_REDIRECT", default="")
+
+# Файли фонових задач (експорти, завантажені імпорти) — поза MEDIA_ROOT, їх віддає
+# лише myapp.views.job_download з перевіркою власника
+JOB_FILES_ROOT = env("JOB_FILES_ROOT", default=str(BASE_DIR / "job_files"))
+# Скільки секунд зберігати файли експорту після завершення задачі
+JOB_FILES_MAX_AGE = env.int("JOB_FILES_MAX_AGE", default=7 * 24 * 60 * 60)
+
 
 # ---------------------------------------------------------------------------
 # DRF / OpenAPI
@@ -158,6 +182,41 @@ SPECTACULAR_SETTINGS = {
 }
 
 
+# ---------------------------------------------------------------------------
+# Інструментування SQL (myapp.middleware.QueryInstrumentationMiddleware)
+# Пороги задаються для імен URL або шаблонів fnmatch; решта — "default".
+# ---------------------------------------------------------------------------
+
+QUERY_INSTRUMENTATION = {
+    "ENABLED": env.bool("QUERY_INSTRUMENTATION_ENABLED", default=True),
+    "SERVER_TIMING": True,
+    "THRESHOLDS": {
+        "default": {
+            "slow_request_ms": 1000,
+            "slow_db_ms": 300,
+            "max_queries": 50,
+            "duplicate_queries": 10,
+        },
+        "company_list": {
+            "slow_request_ms": 800,
+            "slow_db_ms": 200,
+            "max_queries": 20,
+            "duplicate_queries": 5,
+        },
+        "company_detail": {
+            "slow_request_ms": 500,
+            "max_queries": 15,
+            "duplicate_queries": 3,
+        },
+        "settings_*": {
+            "slow_request_ms": 500,
+            "max_queries": 15,
+            "duplicate_queries": 5,
+        },
+    },
+}
+
+
 # ---------------------------------------------------------------------------
 # Аутентифікація / інші налаштування
 # ---------------------------------------------------------------------------
@@ -43,6 +43,12 @@ else:
     }
 
 
+# Кеш, спільний для всіх воркерів gunicorn (таблицю створює build.sh через createcachetable)
+CACHES = {
+    "default": env.cache("CACHE_URL", default="dbcache://myapp_cache"),
+}
+
+
 # Security
 SECURE_SSL_REDIRECT = True
 SESSION_COOKIE_SECURE = True
@@ -55,7 +61,10 @@ SECURE_CONTENT_TYPE_NOSNIFF = True
 
 
 # Static files (WhiteNoise)
-MIDDLEWARE.insert(1, "whitenoise.middleware.WhiteNoiseMiddleware")
+MIDDLEWARE.insert(
+    MIDDLEWARE.index("django.middleware.security.SecurityMiddleware") + 1,
+    "whitenoise.middleware.WhiteNoiseMiddleware",
+)
 # Використовуємо CompressedStaticFilesStorage замість Manifest для уникнення помилок
 # Manifest вимагає наявності всіх файлів під час збірки
 STATICFILES_STORAGE = "whitenoise.storage.CompressedStaticFilesStorage"
@@ -113,6 +122,12 @@ LOGGING = {
             "level": "DEBUG",
             "propagate": False,
         },
+        # Статистика SQL по запитах: лише перевищення порогів (WARNING)
+        "myapp.middleware": {
+            "handlers": ["console"],
+            "level": "INFO",
+            "propagate": False,
+        },
     },
 }
 
@@ -14,11 +14,14 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+import re
+
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.views.generic import RedirectView
 from django.conf import settings
-from django.conf.urls.static import static
+
+from myapp import media
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -26,13 +29,7 @@ urlpatterns = [
     path('', include('myapp.urls')),
 ]
 
-# Media files
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
-else:
-    # Для production на Render (тимчасово, краще використати Cloudinary/S3)
-    from django.views.static import serve
-    from django.urls import re_path
-    urlpatterns += [
-        re_path(r'^media/(?P<path>.*)$', serve, {'document_root': settings.MEDIA_ROOT}),
-    ]
+# Media files: ETag, довгий кеш для хешованих імен, Range (див. myapp.media)
+urlpatterns += [
+    re_path(rf'^{re.escape(settings.MEDIA_URL.lstrip("/"))}(?P<path>.*)$', media.serve, name='media'),
+]
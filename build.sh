@@ -12,6 +12,7 @@ pip install -r requirements.txt
 
 python manage.py collectstatic --no-input
 python manage.py migrate
+python manage.py createcachetable
 
 # Створення тестового користувача для логіну (якщо ще не існує)
 python manage.py shell << 'EOF'
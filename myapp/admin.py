@@ -7,7 +7,10 @@ from .models import (
     CompanyAddress,
     CompanyComment,
     CompanyPhone,
+    CompanyPhoto,
     Country,
+    DuplicateScan,
+    Job,
     Status,
     UserProfile,
     UserFavoriteCompany,
@@ -23,7 +26,7 @@ class CountryAdmin(admin.ModelAdmin):
 
 @admin.register(City)
 class CityAdmin(admin.ModelAdmin):
-    list_display = ("name", "country")
+    list_display = ("name", "country", "companies_count")
     list_filter = ("country",)
     search_fields = ("name", "country__name", "country__code")
     ordering = ("name",)
@@ -31,14 +34,14 @@ class CityAdmin(admin.ModelAdmin):
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
-    list_display = ("name", "badge_class")
+    list_display = ("name", "badge_class", "companies_count")
     search_fields = ("name",)
     ordering = ("name",)
 
 
 @admin.register(Status)
 class StatusAdmin(admin.ModelAdmin):
-    list_display = ("name", "is_default", "badge_class")
+    list_display = ("name", "is_default", "badge_class", "companies_count")
     list_filter = ("is_default",)
     search_fields = ("name",)
     ordering = ("name",)
@@ -55,13 +58,20 @@ class CompanyCommentInline(admin.TabularInline):
     readonly_fields = ("created_at",)
 
 
+class CompanyPhotoInline(admin.TabularInline):
+    model = CompanyPhoto
+    extra = 0
+    fields = ("position", "file", "width", "height", "size")
+    readonly_fields = ("file", "width", "height", "size")
+
+
 @admin.register(Company)
 class CompanyAdmin(admin.ModelAdmin):
     list_display = ("client_id", "name", "city", "category", "status", "call_date")
     list_filter = ("city", "category", "status", "call_date")
     search_fields = ("client_id", "name", "keywords")
     readonly_fields = ("created_at", "updated_at")
-    inlines = (CompanyPhoneInline, CompanyCommentInline)
+    inlines = (CompanyPhoneInline, CompanyCommentInline, CompanyPhotoInline)
     ordering = ("name",)
 
 
@@ -109,3 +119,15 @@ class UserFavoriteCompanyAdmin(admin.ModelAdmin):
     search_fields = ("user__username", "company__name")
     readonly_fields = ("created_at",)
 
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "status", "progress", "total", "created_by", "created_at", "finished_at")
+    list_filter = ("kind", "status")
+    readonly_fields = ("created_at", "started_at", "heartbeat_at", "finished_at", "worker", "attempts")
+
+
+@admin.register(DuplicateScan)
+class DuplicateScanAdmin(admin.ModelAdmin):
+    list_display = ("started_at", "finished_at", "full", "processed", "links")
+    readonly_fields = ("started_at", "finished_at", "full", "processed", "links")
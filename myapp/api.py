@@ -0,0 +1,156 @@
+"""
+REST API (``/api/v1/``) для інтеграцій.
+
+* ``GET /api/v1/companies/`` — список з курсорною пагінацією (стабільна
+  вартість сторінки на будь-якій глибині) і тими самими фільтрами, що й
+  список компаній (myapp.filters), плюс ``updated_after`` для синхронізації;
+* ``GET /api/v1/companies/<id>/`` — одна компанія;
+* ``?fields=id,name,phones`` — лише потрібні поля, запит читає тільки їх;
+* відповіді мають ETag з ``updated_at``: ``If-None-Match`` дає 304 без тіла;
+* ``POST /api/v1/companies/bulk/`` — масове створення/оновлення (myapp.bulk),
+  недоступне спостерігачам.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from functools import cached_property
+
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework import permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+from . import bulk
+from .filters import CompanyFilterSet
+from .models import Company
+from .queries import CompanyQuery
+from .serializers import CompanySerializer
+
+
+class CompanyCursorPagination(CursorPagination):
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 500
+    ordering = "-id"
+
+
+class CompanyFilterBackend(DjangoFilterBackend):
+    """Фільтри списку компаній (myapp.queries.CompanyQuery) з обмеженням країною користувача."""
+
+    def filter_queryset(self, request, queryset, view):
+        return view.company_query.filter(queryset)
+
+
+def _user_country(user):
+    profile = getattr(user, "userprofile", None)
+    return profile.country if profile else None
+
+
+class CanEditCompanies(permissions.BasePermission):
+    """Зміни через API — для всіх ролей, крім спостерігача."""
+
+    message = "Спостерігач не може змінювати компанії."
+
+    def has_permission(self, request, view):
+        if request.method in permissions.SAFE_METHODS:
+            return True
+        profile = getattr(request.user, "userprofile", None)
+        return profile is not None and not profile.is_observer
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.md5(usedforsecurity=False)
+    for part in parts:
+        digest.update(repr(part).encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def _etag_matches(request, etag: str) -> bool:
+    header = request.headers.get("If-None-Match", "")
+    return header.strip() == "*" or etag in (value.strip().removeprefix("W/") for value in header.split(","))
+
+
+def _not_modified(etag: str) -> Response:
+    return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+
+class CompanyViewSet(viewsets.ReadOnlyModelViewSet):
+    serializer_class = CompanySerializer
+    pagination_class = CompanyCursorPagination
+    filter_backends = [CompanyFilterBackend]
+    filterset_class = CompanyFilterSet
+    permission_classes = [permissions.IsAuthenticated, CanEditCompanies]
+    lookup_value_regex = r"\d+"
+
+    @cached_property
+    def requested_fields(self) -> list[str]:
+        """Поля з ``?fields=`` (усі, якщо параметр не задано)."""
+        requested = [name.strip() for name in self.request.query_params.get("fields", "").split(",") if name.strip()]
+        unknown = set(requested) - set(CompanySerializer.Meta.fields)
+        if unknown:
+            raise ValidationError({"fields": f"Невідомі поля: {', '.join(sorted(unknown))}"})
+        return CompanySerializer.field_names(requested)
+
+    @cached_property
+    def company_query(self) -> CompanyQuery:
+        """Фільтри з параметрів запиту; невалідні — 400."""
+        query = CompanyQuery.from_params(self.request.query_params, _user_country(self.request.user))
+        if query.errors:
+            raise ValidationError(query.errors)
+        return query
+
+    def get_queryset(self):
+        # Фільтри застосовує CompanyFilterBackend (filter_queryset)
+        return CompanySerializer.optimize(Company.objects.all(), self.requested_fields)
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["fields"] = self.requested_fields
+        return context
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        etag = make_etag(request.get_full_path(), [(company.pk, company.updated_at) for company in page])
+        if _etag_matches(request, etag):
+            return _not_modified(etag)
+        response = self.get_paginated_response(self.get_serializer(page, many=True).data)
+        response["ETag"] = etag
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        # ETag перевіряється за однією колонкою, до читання компанії з телефонами й адресами
+        updated_at = (
+            self.filter_queryset(Company.objects.all())
+            .filter(pk=kwargs["pk"])
+            .values_list("updated_at", flat=True)
+            .first()
+        )
+        if updated_at is not None:
+            etag = make_etag(kwargs["pk"], updated_at, self.requested_fields)
+            if _etag_matches(request, etag):
+                return _not_modified(etag)
+        response = super().retrieve(request, *args, **kwargs)
+        if updated_at is not None:
+            response["ETag"] = etag
+        return response
+
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk(self, request):
+        """Створює або оновлює до ``bulk.BULK_MAX_ITEMS`` компаній; результат — по кожному запису."""
+        records = request.data
+        if not isinstance(records, list):
+            raise ValidationError({"non_field_errors": ["Очікується список компаній."]})
+        if len(records) > bulk.BULK_MAX_ITEMS:
+            raise ValidationError({"non_field_errors": [f"Не більше {bulk.BULK_MAX_ITEMS} компаній за запит."]})
+
+        country = _user_country(request.user)
+        scope = Company.objects.filter(city__country=country) if country else Company.objects.all()
+        results = bulk.upsert_companies(records, scope=scope, country=country)
+        counts = {key: 0 for key in (bulk.STATUS_CREATED, bulk.STATUS_UPDATED, bulk.STATUS_ERROR)}
+        for result in results:
+            counts[result["status"]] += 1
+        return Response({**counts, "results": results})
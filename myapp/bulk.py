@@ -0,0 +1,352 @@
+"""
+Масове збереження компаній з телефонами й адресами.
+
+``upsert_companies`` обробляє пакет записів API (``POST /api/v1/companies/bulk/``)
+фіксованою кількістю запитів незалежно від розміру пакета:
+
+1. кожен запис перевіряється: поля компанії — ``CompanyBulkForm`` (та сама
+   валідація, що й у формі), місто/розділ/статус — за кешем довідників;
+2. запис зіставляється з наявною компанією за ``client_id`` (лише ключ пошуку:
+   невідомий client_id — помилка, нові компанії отримують номер з
+   myapp.sequences) або, якщо його немає, за нормалізованими контактами (телефон, сайт, Instagram, Telegram —
+   колонки ``*_key``), по одному запиту на вид ключа для всього пакета;
+3. нові й знайдені компанії записуються одним ``bulk_create(update_conflicts=True)``
+   по ``client_id``, телефони й адреси — диф-синхронізацією ``sync_company_rows``
+   (один DELETE, один bulk_update, один bulk_create на модель), усе в одній транзакції.
+
+Помилковий запис пропускається; результат — список з підсумком по кожному запису.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any
+
+from django.db import transaction
+from django.forms.models import model_to_dict
+
+from . import reference_data, sequences
+from .forms import CompanyBulkForm
+from .models import Company, CompanyAddress, CompanyPhone
+from .normalization import COMPANY_CONTACT_KEYS, normalize_phone_number, phone_key
+from .serializers import CompanyAddressSerializer, CompanyPhoneSerializer
+from .signals import companies_bulk_changed
+
+
+# Найбільша кількість компаній в одному запиті
+BULK_MAX_ITEMS = 500
+
+FORM_FIELDS = tuple(CompanyBulkForm.Meta.fields)
+REFERENCE_FIELDS = ("city", "category", "status")
+ITEM_FIELDS = {"client_id", "phones", "addresses", *FORM_FIELDS, *REFERENCE_FIELDS}
+
+# Колонки, які перезаписує upsert для наявної компанії
+UPSERT_FIELDS = [
+    *FORM_FIELDS,
+    *(f"{name}_id" for name in REFERENCE_FIELDS),
+    *(f"{name}_key" for name in COMPANY_CONTACT_KEYS),
+    "updated_at",
+]
+
+PHONE_FIELDS = ["number", "number_key", "contact_name", "is_favorite"]
+ADDRESS_FIELDS = ["address", "is_favorite"]
+
+STATUS_CREATED = "created"
+STATUS_UPDATED = "updated"
+STATUS_ERROR = "error"
+
+
+# ============================================================================
+# Телефони й адреси
+# ============================================================================
+
+def sync_company_rows(model, desired_by_company: dict[int, list[dict]], match_field: str, fields: list[str]) -> set[int]:
+    """Приводить рядки ``model`` кожної компанії до списку ``desired`` фіксованою кількістю запитів.
+
+    Рядки зіставляються спершу за ``match_field``, решта — за порядком, тому первинні
+    ключі незмінених і відредагованих рядків зберігаються. Повертає id компаній, де щось змінилося.
+    """
+    if not desired_by_company:
+        return set()
+    existing_by_company = defaultdict(list)
+    for row in model.objects.filter(company_id__in=list(desired_by_company)).order_by("company_id", "id"):
+        existing_by_company[row.company_id].append(row)
+
+    to_create, to_update, to_delete = [], [], []
+    changed = set()
+    for company_id, desired in desired_by_company.items():
+        existing = existing_by_company[company_id]
+        by_key: dict[str, list] = {}
+        for row in existing:
+            by_key.setdefault(getattr(row, match_field), []).append(row)
+
+        matched = []
+        for values in desired:
+            rows = by_key.get(values[match_field])
+            matched.append(rows.pop(0) if rows else None)
+        matched_ids = {row.pk for row in matched if row is not None}
+        leftovers = [row for row in existing if row.pk not in matched_ids]
+
+        for values, row in zip(desired, matched):
+            if row is None and leftovers:
+                row = leftovers.pop(0)
+            if row is None:
+                to_create.append(model(company_id=company_id, **values))
+                changed.add(company_id)
+            elif any(getattr(row, name) != values[name] for name in fields):
+                for name in fields:
+                    setattr(row, name, values[name])
+                to_update.append(row)
+                changed.add(company_id)
+        if leftovers:
+            to_delete.extend(row.pk for row in leftovers)
+            changed.add(company_id)
+
+    if to_delete:
+        model.objects.filter(pk__in=to_delete).delete()
+    if to_update:
+        model.objects.bulk_update(to_update, fields)
+    if to_create:
+        model.objects.bulk_create(to_create)
+    return changed
+
+
+def _with_favorite(rows: list[dict]) -> list[dict]:
+    """Рівно один обраний запис: перший позначений, інакше перший у списку."""
+    favorite = next((index for index, row in enumerate(rows) if row.get("is_favorite")), 0)
+    return [{**row, "is_favorite": index == favorite} for index, row in enumerate(rows)]
+
+
+def desired_phones(phones: list[dict]) -> list[dict]:
+    rows = []
+    for phone in phones:
+        number = normalize_phone_number(phone["number"].strip())
+        rows.append({
+            "number": number,
+            "number_key": phone_key(number),
+            "contact_name": phone.get("contact_name", "").strip(),
+            "is_favorite": phone.get("is_favorite", False),
+        })
+    return _with_favorite(rows)
+
+
+def desired_addresses(addresses: list[dict]) -> list[dict]:
+    return _with_favorite([
+        {"address": address["address"].strip(), "is_favorite": address.get("is_favorite", False)}
+        for address in addresses
+    ])
+
+
+# ============================================================================
+# Пакет компаній
+# ============================================================================
+
+@dataclass
+class BulkItem:
+    """Запис пакета на шляху від перевірки до збереження."""
+
+    index: int
+    data: dict
+    client_id: str = ""
+    phones: list[dict] | None = None
+    addresses: list[dict] | None = None
+    company: Company | None = None
+    created: bool = False
+    errors: dict = field(default_factory=dict)
+
+    def result(self) -> dict[str, Any]:
+        if self.errors:
+            return {"index": self.index, "status": STATUS_ERROR, "errors": self.errors}
+        return {
+            "index": self.index,
+            "status": STATUS_CREATED if self.created else STATUS_UPDATED,
+            "id": self.company.pk,
+            "client_id": self.company.client_id,
+        }
+
+
+def _nested(serializer_class, value) -> tuple[list[dict] | None, Any]:
+    serializer = serializer_class(data=value, many=True)
+    if serializer.is_valid():
+        return serializer.validated_data, None
+    return None, serializer.errors
+
+
+def _parse(index: int, data, references: dict[str, set]) -> BulkItem:
+    """Перевіряє структуру запису, телефони, адреси та посилання на довідники."""
+    if not isinstance(data, dict):
+        return BulkItem(index, {}, errors={"non_field_errors": ["Очікується об'єкт компанії."]})
+    item = BulkItem(index, data, client_id=str(data.get("client_id") or "").strip())
+
+    unknown = set(data) - ITEM_FIELDS
+    if unknown:
+        item.errors["non_field_errors"] = [f"Невідомі поля: {', '.join(sorted(unknown))}"]
+    for name in REFERENCE_FIELDS:
+        value = data.get(name)
+        if value not in (None, "") and value not in references[name]:
+            item.errors[name] = [f"Невідомий id: {value}"]
+    if "phones" in data:
+        item.phones, errors = _nested(CompanyPhoneSerializer, data["phones"])
+        if errors:
+            item.errors["phones"] = errors
+        elif not item.phones:
+            item.errors["phones"] = ["Компанія повинна мати хоча б один телефон"]
+    if "addresses" in data:
+        item.addresses, errors = _nested(CompanyAddressSerializer, data["addresses"])
+        if errors:
+            item.errors["addresses"] = errors
+    return item
+
+
+def _contact_keys(item: BulkItem) -> set[tuple[str, str]]:
+    keys = {("phone", phone_key(phone["number"])) for phone in item.phones or ()}
+    for name, make_key in COMPANY_CONTACT_KEYS.items():
+        keys.add((name, make_key(item.data.get(name) or "")))
+    return {(rule, key) for rule, key in keys if key}
+
+
+def _match(items: list[BulkItem], scope) -> dict[int, int]:
+    """Індекс запису -> id наявної компанії (по одному запиту на вид ключа)."""
+    by_client_id, foreign = {}, set()
+    client_ids = {item.client_id for item in items if item.client_id}
+    if client_ids:
+        # client_id унікальний по всій базі: чужий (поза scope) не можна ні оновити, ні зайняти
+        by_client_id = dict(Company.objects.filter(client_id__in=client_ids).values_list("client_id", "id"))
+        allowed = set(scope.filter(pk__in=by_client_id.values()).values_list("id", flat=True))
+        foreign = {client_id for client_id, company_id in by_client_id.items() if company_id not in allowed}
+
+    keys = defaultdict(set)
+    for item in items:
+        if not item.client_id:
+            for rule, key in _contact_keys(item):
+                keys[rule].add(key)
+    by_key = defaultdict(set)
+    if keys["phone"]:
+        for key, company_id in CompanyPhone.objects.filter(
+            number_key__in=keys["phone"], company__in=scope
+        ).values_list("number_key", "company_id"):
+            by_key[("phone", key)].add(company_id)
+    for name in COMPANY_CONTACT_KEYS:
+        if keys[name]:
+            for key, company_id in scope.filter(**{f"{name}_key__in": keys[name]}).values_list(f"{name}_key", "id"):
+                by_key[(name, key)].add(company_id)
+
+    matches = {}
+    for item in items:
+        if item.client_id:
+            if item.client_id in foreign:
+                item.errors["client_id"] = ["Компанія з цим client_id недоступна."]
+            elif item.client_id in by_client_id:
+                matches[item.index] = by_client_id[item.client_id]
+            else:
+                # Довільний номер зайняв би значення, яке пізніше видасть послідовність
+                item.errors["client_id"] = ["Компанію з цим client_id не знайдено."]
+            continue
+        candidates = set().union(*(by_key.get(key, set()) for key in _contact_keys(item)))
+        if len(candidates) > 1:
+            item.errors["non_field_errors"] = [
+                f"Контакти збігаються з кількома компаніями: {', '.join(map(str, sorted(candidates)))}"
+            ]
+        elif candidates:
+            matches[item.index] = candidates.pop()
+    return matches
+
+
+def _build(item: BulkItem, company: Company | None, default_status_id: int | None) -> None:
+    """Переносить поля запису на компанію (нову або наявну) через CompanyBulkForm."""
+    item.created = company is None
+    if company is None:
+        company = Company(status_id=default_status_id)
+        if not item.phones:
+            item.errors["phones"] = ["Компанія повинна мати хоча б один телефон"]
+
+    values = model_to_dict(company, fields=FORM_FIELDS)
+    values.update({name: item.data[name] for name in FORM_FIELDS if name in item.data})
+    form = CompanyBulkForm(data=values, instance=company)
+    if not form.is_valid():
+        item.errors.update(form.errors.get_json_data())
+        return
+    for name in REFERENCE_FIELDS:
+        if name in item.data:
+            setattr(company, f"{name}_id", item.data[name] or None)
+    company.update_keys()
+    item.company = company
+
+
+def upsert_companies(records: list, scope=None, country=None) -> list[dict]:
+    """Створює або оновлює компанії з ``records``; повертає результат по кожному запису.
+
+    ``scope`` — компанії, серед яких шукати збіги (за замовчуванням усі),
+    ``country`` — країна користувача: місто має бути з неї.
+    """
+    if scope is None:
+        scope = Company.objects.all()
+    statuses = reference_data.get_statuses()
+    references = {
+        "city": {city.pk for city in reference_data.get_cities(country)},
+        "category": {category.pk for category in reference_data.get_categories()},
+        "status": {status.pk for status in statuses},
+    }
+    default_status_id = next((status.pk for status in statuses if status.is_default), None)
+
+    items = [_parse(index, data, references) for index, data in enumerate(records)]
+    valid = [item for item in items if not item.errors]
+    matches = _match(valid, scope)
+    existing = Company.objects.in_bulk(set(matches.values()))
+
+    targets = {}
+    for item in valid:
+        if item.errors:
+            continue
+        company_id = matches.get(item.index)
+        if company_id and company_id in targets:
+            item.errors["non_field_errors"] = [f"Компанія вже є в цьому пакеті (запис {targets[company_id]})"]
+            continue
+        if company_id:
+            targets[company_id] = item.index
+        _build(item, existing.get(company_id), default_status_id)
+
+    ready = [item for item in valid if not item.errors]
+    if ready:
+        _save(ready)
+    return [item.result() for item in items]
+
+
+def _save(items: list[BulkItem]) -> None:
+    new = [item.company for item in items if not item.company.client_id]
+    for company, client_id in zip(new, sequences.reserve_client_ids(len(new))):
+        company.client_id = client_id
+
+    companies = [item.company for item in items]
+    for company in companies:
+        # Наявні компанії оновлюються через конфлікт по client_id
+        company.pk = None
+    with transaction.atomic():
+        Company.objects.bulk_create(
+            companies,
+            update_conflicts=True,
+            unique_fields=["client_id"],
+            update_fields=UPSERT_FIELDS,
+        )
+        if any(company.pk is None for company in companies):
+            # БД не повертає id з upsert — дочитуємо за client_id
+            ids = dict(Company.objects.filter(
+                client_id__in=[company.client_id for company in companies]
+            ).values_list("client_id", "id"))
+            for company in companies:
+                company.pk = ids[company.client_id]
+
+        sync_company_rows(
+            CompanyPhone,
+            {item.company.pk: desired_phones(item.phones) for item in items if item.phones is not None},
+            "number",
+            PHONE_FIELDS,
+        )
+        sync_company_rows(
+            CompanyAddress,
+            {item.company.pk: desired_addresses(item.addresses) for item in items if item.addresses is not None},
+            "address",
+            ADDRESS_FIELDS,
+        )
+        companies_bulk_changed.send(sender=Company, company_ids=[company.pk for company in companies])
@@ -2,12 +2,18 @@
 Контекстні процесори для глобального контексту всіх шаблонів.
 """
 
-from .models import Country, UserProfile
+from django.utils.functional import SimpleLazyObject
+
+from . import reference_data
+from .models import UserProfile
 
 
 def global_context(request):
-    """Додає країни і профіль користувача до контексту для всіх шаблонів."""
-    countries = Country.objects.all().order_by('name')
+    """Додає країни і профіль користувача до контексту для всіх шаблонів.
+
+    Країни беруться з кешу довідників лише тоді, коли шаблон їх використовує.
+    """
+    countries = SimpleLazyObject(reference_data.get_countries)
     user_profile = None
     
     if request.user.is_authenticated:
@@ -0,0 +1,317 @@
+"""
+Пошук дублікатів компаній по всій базі.
+
+Замість порівняння кожної пари (O(n²)) кожна компанія отримує ключі
+блокування (``DuplicateKey``):
+
+* нормалізовані телефони, домен сайту, акаунти Instagram і Telegram
+  (ті самі ключі, що й у ``company_check_duplicates``);
+* слова назви в межах міста — ``<city_id>:<слово>``.
+
+Порівнюються лише компанії з однаковим ключем. Збіг контакту одразу дає пару,
+для ключа назви пара лишається, якщо схожість назв за триграмами не менша за
+NAME_SIMILARITY. Надто великі блоки (загальні слова, номер колл-центру)
+пропускаються — MAX_BLOCK_SIZE обмежує роботу на компанію, тож прохід лінійний.
+
+Прохід інкрементальний: перераховуються лише компанії з ``updated_at`` після
+початку попереднього проходу (``DuplicateScan``). Пари (``DuplicateLink``)
+об'єднуються в кластери на льоту, для кожного кластера пропонується компанія,
+в яку варто злити решту.
+"""
+
+from __future__ import annotations
+
+import re
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Iterator
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Company, CompanyPhone, DuplicateKey, DuplicateLink, DuplicateScan
+
+
+# Скільки компаній обробляти за один прохід циклу
+SCAN_CHUNK_SIZE = 1000
+
+# Блоки, більші за цей розмір, не порівнюються
+MAX_BLOCK_SIZE = 50
+
+# Мінімальна схожість назв (коефіцієнт Жаккара за триграмами)
+NAME_SIMILARITY = 0.6
+
+# Слова назви, коротші за це, не стають ключами
+MIN_NAME_TOKEN = 3
+
+# Організаційно-правові форми та службові слова, що не розрізняють компанії
+NAME_STOP_WORDS = frozenset({
+    "ооо", "тов", "фоп", "ип", "пп", "чп", "зао", "оао", "пао", "ат", "прат",
+    "llc", "ltd", "inc", "компания", "компанія", "company", "магазин", "the",
+})
+
+# Вага збігу для сортування пар: контакти важать більше за назву
+REASON_WEIGHTS = {
+    DuplicateKey.KIND_PHONE: 1.0,
+    DuplicateKey.KIND_DOMAIN: 1.0,
+    DuplicateKey.KIND_INSTAGRAM: 1.0,
+    DuplicateKey.KIND_TELEGRAM: 1.0,
+}
+
+_WORD_RE = re.compile(r"\w+")
+
+
+# ============================================================================
+# Ключі
+# ============================================================================
+
+def name_tokens(name: str) -> list[str]:
+    """Значущі слова назви в нижньому регістрі."""
+    words = _WORD_RE.findall((name or "").lower().replace("ё", "е"))
+    return [word for word in words if len(word) >= MIN_NAME_TOKEN and word not in NAME_STOP_WORDS]
+
+
+def name_trigrams(name: str) -> set[str]:
+    trigrams = set()
+    for token in name_tokens(name):
+        padded = f"  {token} "
+        trigrams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return trigrams
+
+
+def name_similarity(first: str, second: str) -> float:
+    """Схожість назв від 0 до 1 (Жаккар за триграмами слів)."""
+    a, b = name_trigrams(first), name_trigrams(second)
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def company_keys(company: Company, phone_keys: Iterable[str]) -> set[tuple[str, str]]:
+    """Ключі блокування компанії: (вид, значення)."""
+    keys = {(DuplicateKey.KIND_PHONE, key) for key in phone_keys if key}
+    domain = company.website_key.split("/", 1)[0]
+    if domain:
+        keys.add((DuplicateKey.KIND_DOMAIN, domain))
+    if company.instagram_key:
+        keys.add((DuplicateKey.KIND_INSTAGRAM, company.instagram_key))
+    if company.telegram_key:
+        keys.add((DuplicateKey.KIND_TELEGRAM, company.telegram_key))
+    if company.city_id:
+        keys.update(
+            (DuplicateKey.KIND_NAME, f"{company.city_id}:{token}"[:255])
+            for token in name_tokens(company.name)
+        )
+    return keys
+
+
+def _chunks(ids: list[int], size: int) -> Iterator[list[int]]:
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def rebuild_keys(company_ids: list[int]) -> None:
+    """Перераховує ключі блокування для компаній."""
+    phones = defaultdict(list)
+    for company_id, key in CompanyPhone.objects.filter(company_id__in=company_ids).values_list(
+        "company_id", "number_key"
+    ):
+        phones[company_id].append(key)
+
+    companies = Company.objects.filter(pk__in=company_ids).only(
+        "id", "name", "city_id", "website_key", "instagram_key", "telegram_key"
+    )
+    keys = [
+        DuplicateKey(company_id=company.pk, kind=kind, value=value)
+        for company in companies
+        for kind, value in company_keys(company, phones[company.pk])
+    ]
+    with transaction.atomic():
+        DuplicateKey.objects.filter(company_id__in=company_ids).delete()
+        DuplicateKey.objects.bulk_create(keys)
+
+
+# ============================================================================
+# Пари
+# ============================================================================
+
+def _blocks(keys: set[tuple[str, str]]) -> dict[tuple[str, str], list[int]]:
+    """Компанії кожного ключа (один запит на вид ключа); надто великі блоки відкидаються."""
+    values = defaultdict(set)
+    for kind, value in keys:
+        values[kind].add(value)
+
+    blocks = defaultdict(list)
+    for kind, kind_values in values.items():
+        for value, company_id in DuplicateKey.objects.filter(kind=kind, value__in=kind_values).values_list(
+            "value", "company_id"
+        ):
+            blocks[(kind, value)].append(company_id)
+    return {key: ids for key, ids in blocks.items() if 1 < len(ids) <= MAX_BLOCK_SIZE}
+
+
+def find_links(company_ids: list[int]) -> list[DuplicateLink]:
+    """Пари дублікатів, у яких бере участь хоча б одна з компаній ``company_ids``."""
+    own_keys = defaultdict(set)
+    for company_id, kind, value in DuplicateKey.objects.filter(company_id__in=company_ids).values_list(
+        "company_id", "kind", "value"
+    ):
+        own_keys[company_id].add((kind, value))
+    blocks = _blocks({key for keys in own_keys.values() for key in keys})
+
+    reasons: dict[tuple[int, int], set[str]] = defaultdict(set)
+    name_candidates = set()
+    for company_id, keys in own_keys.items():
+        for key in keys:
+            for other_id in blocks.get(key, ()):
+                if other_id == company_id:
+                    continue
+                pair = (min(company_id, other_id), max(company_id, other_id))
+                if key[0] == DuplicateKey.KIND_NAME:
+                    name_candidates.add(pair)
+                else:
+                    reasons[pair].add(key[0])
+
+    scores = {pair: sum(REASON_WEIGHTS[reason] for reason in pair_reasons) for pair, pair_reasons in reasons.items()}
+    if name_candidates:
+        names = dict(Company.objects.filter(
+            pk__in={company_id for pair in name_candidates for company_id in pair}
+        ).values_list("id", "name"))
+        for pair in name_candidates:
+            similarity = name_similarity(names.get(pair[0], ""), names.get(pair[1], ""))
+            if similarity >= NAME_SIMILARITY:
+                reasons[pair].add(DuplicateKey.KIND_NAME)
+                scores[pair] = scores.get(pair, 0) + similarity
+
+    return [
+        DuplicateLink(company_id=first, duplicate_id=second, reasons=sorted(pair_reasons), score=round(scores[(first, second)], 3))
+        for (first, second), pair_reasons in reasons.items()
+    ]
+
+
+def relink(company_ids: list[int]) -> int:
+    """Перераховує пари для компаній; повертає кількість знайдених пар."""
+    links = find_links(company_ids)
+    with transaction.atomic():
+        DuplicateLink.objects.filter(Q(company_id__in=company_ids) | Q(duplicate_id__in=company_ids)).delete()
+        DuplicateLink.objects.bulk_create(links, ignore_conflicts=True)
+    return len(links)
+
+
+# ============================================================================
+# Прохід
+# ============================================================================
+
+def last_scan() -> DuplicateScan | None:
+    return DuplicateScan.objects.filter(finished_at__isnull=False).first()
+
+
+def scan(full: bool = False, progress: Callable[[int, int | None], None] | None = None) -> DuplicateScan:
+    """Оновлює ключі та пари для компаній, змінених після попереднього проходу (або всіх)."""
+    previous = None if full else last_scan()
+    record = DuplicateScan.objects.create(started_at=timezone.now(), full=previous is None)
+
+    companies = Company.objects.order_by("id")
+    if previous is not None:
+        companies = companies.filter(updated_at__gte=previous.started_at)
+    company_ids = list(companies.values_list("id", flat=True))
+    # Прогрес рахується по обох проходах: ключі, потім пари
+    if progress is not None:
+        progress(0, 2 * len(company_ids))
+
+    # Спершу ключі всіх змінених компаній, потім пари: так пари між змінними
+    # компаніями будуються за новими ключами обох сторін
+    done = 0
+    for chunk in _chunks(company_ids, SCAN_CHUNK_SIZE):
+        rebuild_keys(chunk)
+        done += len(chunk)
+        if progress is not None:
+            progress(done)
+    for chunk in _chunks(company_ids, SCAN_CHUNK_SIZE):
+        relink(chunk)
+        done += len(chunk)
+        if progress is not None:
+            progress(done)
+
+    record.finished_at = timezone.now()
+    record.processed = len(company_ids)
+    record.links = DuplicateLink.objects.count()
+    record.save(update_fields=["finished_at", "processed", "links"])
+    return record
+
+
+# ============================================================================
+# Кластери
+# ============================================================================
+
+@dataclass
+class Cluster:
+    """Група ймовірних дублікатів і пропозиція злиття."""
+
+    companies: list[Company]
+    reasons: list[str]
+    score: float
+    primary: Company = field(init=False)
+    merge: list[Company] = field(init=False)
+
+    def __post_init__(self):
+        # Залишаємо найстаріший запис — на нього, найімовірніше, вже посилаються
+        self.companies.sort(key=lambda company: (company.created_at, company.pk))
+        self.primary = self.companies[0]
+        self.merge = self.companies[1:]
+
+    @property
+    def reason_labels(self) -> list[str]:
+        labels = dict(DuplicateKey.KIND_CHOICES)
+        return [labels.get(reason, reason) for reason in self.reasons]
+
+
+def _components(links: Iterable[tuple[int, int]]) -> list[set[int]]:
+    """Зв'язні компоненти графа пар (union-find)."""
+    parent: dict[int, int] = {}
+
+    def find(node: int) -> int:
+        parent.setdefault(node, node)
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    for first, second in links:
+        root_first, root_second = find(first), find(second)
+        if root_first != root_second:
+            parent[root_second] = root_first
+
+    components = defaultdict(set)
+    for node in parent:
+        components[find(node)].add(node)
+    return list(components.values())
+
+
+def clusters(limit: int | None = None) -> list[Cluster]:
+    """Кластери дублікатів, від найбільш певних; ``limit`` обмежує кількість."""
+    rows = list(DuplicateLink.objects.values_list("company_id", "duplicate_id", "reasons", "score"))
+    components = _components((first, second) for first, second, _, _ in rows)
+
+    member_of = {company_id: index for index, component in enumerate(components) for company_id in component}
+    reasons = defaultdict(set)
+    scores = defaultdict(float)
+    for first, _, pair_reasons, score in rows:
+        index = member_of[first]
+        reasons[index].update(pair_reasons)
+        scores[index] = max(scores[index], score)
+
+    order = sorted(range(len(components)), key=lambda index: (-scores[index], -len(components[index])))
+    if limit is not None:
+        order = order[:limit]
+
+    companies = Company.objects.select_related("city").in_bulk(
+        {company_id for index in order for company_id in components[index]}
+    )
+    result = []
+    for index in order:
+        members = [companies[company_id] for company_id in components[index] if company_id in companies]
+        if len(members) > 1:
+            result.append(Cluster(members, sorted(reasons[index]), scores[index]))
+    return result
@@ -0,0 +1,170 @@
+"""
+Масовий експорт компаній у CSV та XLSX.
+
+Компанії читаються через ``QuerySet.iterator(chunk_size=...)``: телефони, адреси
+та коментарі довантажуються окремим запитом на кожен блок, тож пам'ять не
+залежить від розміру вибірки.
+
+* CSV віддається рядок за рядком (``StreamingHttpResponse``);
+* XLSX пишеться openpyxl у write-only режимі в тимчасовий файл, який потім
+  віддається частинами (``FileResponse``).
+"""
+
+from __future__ import annotations
+
+import csv
+import tempfile
+from typing import Callable, Iterable, Iterator
+
+from django.db.models import QuerySet
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+
+
+# Скільки компаній читати з БД за один запит
+EXPORT_CHUNK_SIZE = 1000
+
+EXPORT_FORMATS = ("csv", "xlsx")
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+HEADERS = [
+    "ID",
+    "Назва",
+    "Місто",
+    "Розділ",
+    "Статус",
+    "Телефони",
+    "Адреси",
+    "Telegram",
+    "Сайт",
+    "Instagram",
+    "Короткий коментар",
+    "Повний опис",
+    "Ключові слова",
+    "Дата дзвінка",
+    "Дата створення",
+    "Дата оновлення",
+    "Коментарі",
+]
+
+
+def export_queryset(queryset: QuerySet) -> QuerySet:
+    """Готує вибірку до експорту: пов'язані дані та стабільний порядок."""
+    return (
+        queryset.select_related("city", "category", "status")
+        .prefetch_related("phones", "addresses", "comments")
+        .order_by("id")
+    )
+
+
+def _format_phone(phone) -> str:
+    favorite = "⭐ " if phone.is_favorite else ""
+    contact = f" ({phone.contact_name})" if phone.contact_name else ""
+    return f"{favorite}{phone.number}{contact}"
+
+
+def company_row(company) -> list[str]:
+    """Рядок експорту для компанії (пов'язані дані мають бути довантажені)."""
+    local_created = timezone.localtime(company.created_at)
+    local_updated = timezone.localtime(company.updated_at)
+    return [
+        company.client_id,
+        company.name,
+        company.city.name if company.city else "",
+        company.category.name if company.category else "",
+        company.status.name if company.status else "",
+        "; ".join(_format_phone(phone) for phone in company.phones.all()),
+        "; ".join(address.address for address in company.addresses.all()),
+        company.telegram,
+        company.website,
+        company.instagram,
+        company.short_comment,
+        company.full_description,
+        company.keywords,
+        company.call_date.strftime("%d.%m.%Y") if company.call_date else "",
+        local_created.strftime("%d.%m.%Y %H:%M"),
+        local_updated.strftime("%d.%m.%Y %H:%M"),
+        "\n".join(
+            f'{timezone.localtime(comment.created_at).strftime("%d.%m.%Y %H:%M")} - {comment.author_name}: {comment.text}'
+            for comment in company.comments.all()
+        ),
+    ]
+
+
+def iter_rows(
+    queryset: QuerySet,
+    chunk_size: int = EXPORT_CHUNK_SIZE,
+    progress: Callable[[int], None] | None = None,
+) -> Iterator[list[str]]:
+    """Заголовок і рядки компаній, прочитані блоками по ``chunk_size``.
+
+    ``progress`` (якщо задано) отримує кількість уже експортованих компаній
+    після кожного блоку.
+    """
+    yield HEADERS
+    exported = 0
+    for company in export_queryset(queryset).iterator(chunk_size=chunk_size):
+        yield company_row(company)
+        exported += 1
+        if progress is not None and exported % chunk_size == 0:
+            progress(exported)
+    if progress is not None:
+        progress(exported)
+
+
+class _Echo:
+    """Псевдофайл для csv.writer: повертає записаний рядок замість збереження."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def iter_csv(rows: Iterable[list[str]]) -> Iterator[str]:
+    writer = csv.writer(_Echo())
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def write_xlsx(rows: Iterable[list[str]], file) -> None:
+    """Записує рядки у файл XLSX (write-only: рядки не тримаються в пам'яті)."""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Компанії")
+    for row in rows:
+        sheet.append(row)
+    workbook.save(file)
+
+
+def write_export(queryset: QuerySet, export_format: str, file, progress: Callable[[int], None] | None = None) -> None:
+    """Записує експорт у бінарний файл (для фонових задач, див. myapp.jobs)."""
+    rows = iter_rows(queryset, progress=progress)
+    if export_format == "xlsx":
+        write_xlsx(rows, file)
+        return
+    for line in iter_csv(rows):
+        file.write(line.encode("utf-8"))
+
+
+def export_filename(extension: str) -> str:
+    return f"companies_{timezone.localtime().strftime('%Y%m%d_%H%M')}.{extension}"
+
+
+def export_response(queryset: QuerySet, export_format: str):
+    """HTTP-відповідь з експортом вибірки у форматі ``csv`` або ``xlsx``."""
+    rows = iter_rows(queryset)
+    if export_format == "xlsx":
+        file = tempfile.TemporaryFile()
+        write_xlsx(rows, file)
+        file.seek(0)
+        return FileResponse(
+            file,
+            as_attachment=True,
+            filename=export_filename("xlsx"),
+            content_type=XLSX_CONTENT_TYPE,
+        )
+
+    response = StreamingHttpResponse(iter_csv(rows), content_type="text/csv; charset=utf-8")
+    response["Content-Disposition"] = f'attachment; filename="{export_filename("csv")}"'
+    return response
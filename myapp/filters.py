@@ -0,0 +1,127 @@
+"""
+Фільтри списку компаній.
+
+Ті самі параметри GET (``search``, ``status``, ``city``, ``category``,
+``date_updated_from/to``, ``call_date_from/to``) використовують список компаній,
+масовий експорт, фонові задачі експорту та REST API (``CompanyFilterSet``,
+вибірки будує myapp.queries.CompanyQuery).
+
+Усі параметри перевіряються одним проходом форми фільтра; невалідні
+пропускаються (список і експорт) або дають 400 (API). Межі дат стають
+напіввідкритими діапазонами ``[початок дня from, початок дня після to)`` у
+поточному часовому поясі — порівняння з самою колонкою, тож працюють індекси
+по ``updated_at`` (див. Company.Meta.indexes).
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta
+
+import django_filters
+from django import forms
+from django.db.models import Case, F, FilteredRelation, IntegerField, Q, QuerySet, Value, When
+from django.utils import timezone
+
+from .models import Company
+from .search import search_companies
+
+
+def day_start(day: date) -> datetime:
+    """Початок дня ``day`` у поточному часовому поясі (aware datetime)."""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+class NamesField(forms.Field):
+    """Кілька рядкових значень параметра (``?status=a&status=b``) без переліку допустимих."""
+
+    widget = forms.SelectMultiple
+
+    def to_python(self, value):
+        if not value:
+            return []
+        if isinstance(value, str):
+            value = [value]
+        return [str(item).strip() for item in value if item and str(item).strip()]
+
+
+class NameInFilter(django_filters.Filter):
+    """Кілька назв — одна умова ``IN``; невідома назва дає порожній результат, а не помилку."""
+
+    field_class = NamesField
+
+    def filter(self, qs, value):
+        if not value:
+            return qs
+        return self.get_method(qs)(**{f"{self.field_name}__in": value})
+
+
+class CompanyFilterSet(django_filters.FilterSet):
+    """Фільтри списку компаній; ``country`` обмежує вибірку містами країни користувача."""
+
+    search = django_filters.CharFilter(method="filter_search")
+    status = NameInFilter(field_name="status__name")
+    city = NameInFilter(field_name="city__name")
+    category = django_filters.CharFilter(method="filter_category")
+    date_updated_from = django_filters.DateFilter(method="filter_updated_from")
+    date_updated_to = django_filters.DateFilter(method="filter_updated_to")
+    call_date_from = django_filters.DateFilter(field_name="call_date", lookup_expr="gte")
+    call_date_to = django_filters.DateFilter(method="filter_call_date_to")
+    # Для синхронізації через API: змінені строго після моменту
+    updated_after = django_filters.IsoDateTimeFilter(field_name="updated_at", lookup_expr="gt")
+
+    class Meta:
+        model = Company
+        fields: list[str] = []
+
+    def __init__(self, data=None, queryset=None, *, country=None, **kwargs):
+        super().__init__(data, queryset, **kwargs)
+        self.country = country
+
+    def filter_queryset(self, queryset):
+        # Фільтрація по країні користувача (якщо призначена)
+        if self.country:
+            queryset = queryset.filter(city__country=self.country)
+        return super().filter_queryset(queryset)
+
+    def filter_search(self, queryset, name, value):
+        # Повнотекстовий індекс, див. myapp.search
+        value = value.strip()
+        return search_companies(queryset, value) if value else queryset
+
+    def filter_category(self, queryset, name, value):
+        value = value.strip()
+        if value.isdigit():
+            return queryset.filter(category_id=int(value))
+        return queryset.filter(category__name=value) if value else queryset
+
+    def filter_updated_from(self, queryset, name, value):
+        return queryset.filter(updated_at__gte=day_start(value))
+
+    def filter_updated_to(self, queryset, name, value):
+        return queryset.filter(updated_at__lt=day_start(value + timedelta(days=1)))
+
+    def filter_call_date_to(self, queryset, name, value):
+        return queryset.filter(call_date__lt=value + timedelta(days=1))
+
+
+def favorites_first(companies_queryset: QuerySet, user, ranked: bool = False) -> tuple[QuerySet, list[str]]:
+    """Сортування списку компаній: спочатку обрані користувача, далі за датою оновлення.
+
+    ``ranked`` — у вибірці є ``search_rank`` (пошуковий запит), він іде після обраних.
+    Повертає вибірку і список полів сортування (для KeysetPaginator).
+    """
+    # Один LEFT JOIN на UserFavoriteCompany (unique user+company, тож рядки не множаться),
+    # розмір SQL не залежить від кількості обраних.
+    companies_queryset = companies_queryset.annotate(
+        user_favorite=FilteredRelation('favorited_by', condition=Q(favorited_by__user=user)),
+        favorite_date=F('user_favorite__created_at'),
+        is_favorite=Case(
+            When(user_favorite__created_at__isnull=False, then=Value(1)),
+            default=Value(0),
+            output_field=IntegerField()
+        ),
+    )
+    ordering = ['-is_favorite', '-favorite_date', '-updated_at', '-id']
+    if ranked:
+        ordering.insert(2, '-search_rank')
+    return companies_queryset.order_by(*ordering), ordering
@@ -43,6 +43,15 @@ class CompanyForm(forms.ModelForm):
         }
 
 
+class CompanyBulkForm(CompanyForm):
+    """CompanyForm для масового API: довідники перевіряються за кешем (myapp.bulk), логотипу немає."""
+
+    class Meta(CompanyForm.Meta):
+        fields: Iterable[str] = tuple(
+            name for name in CompanyForm.Meta.fields if name not in ("city", "category", "status", "logo")
+        )
+
+
 class LoginForm(forms.Form):
     """Проста форма логіну під поточну верстку (username/password)."""
 
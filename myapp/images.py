@@ -0,0 +1,194 @@
+"""
+Обробка зображень компаній (логотипи, фото) на Pillow.
+
+* оригінал пишеться у сховище частинами (``File.chunks()``), без читання
+  всього файлу в пам'ять;
+* імена файлів — хеш вмісту, тож однаковий файл не зберігається двічі, а URL
+  ніколи не змінюють вміст (можна кешувати назавжди);
+* для кожного зображення будуються WebP-копії RENDITIONS (за більшою стороною);
+  шаблони беруть найменшу придатну через ``srcset``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import os
+from dataclasses import dataclass, field
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+
+# Назва копії -> розмір більшої сторони, px (від меншої до більшої)
+RENDITIONS = {
+    "thumb": 160,
+    "preview": 800,
+}
+
+WEBP_QUALITY = 80
+
+# Каталоги у сховищі (далі — підкаталог з id компанії)
+PHOTOS_DIR = "companies/photos"
+LOGOS_DIR = "companies/logos"
+
+ALLOWED_FORMATS = ("JPEG", "PNG", "GIF", "WEBP")
+
+# Скільки символів хешу вмісту брати в ім'я файлу
+HASH_LENGTH = 20
+
+# EXIF-орієнтації, за яких ширина і висота міняються місцями
+_ROTATED_ORIENTATIONS = (5, 6, 7, 8)
+
+
+class ImageError(ValueError):
+    """Файл не є зображенням підтримуваного формату."""
+
+
+@dataclass
+class StoredImage:
+    """Збережене зображення з URL оригіналу та його копій."""
+
+    url: str
+    renditions: dict[str, str] = field(default_factory=dict)
+
+    def rendition_url(self, name: str) -> str:
+        """URL копії ``name`` (або оригіналу, якщо копії немає)."""
+        return self.renditions.get(name, self.url)
+
+    @property
+    def thumb_url(self) -> str:
+        return self.rendition_url("thumb")
+
+    @property
+    def preview_url(self) -> str:
+        return self.rendition_url("preview")
+
+    @property
+    def srcset(self) -> str:
+        return ", ".join(
+            f"{self.renditions[name]} {size}w" for name, size in RENDITIONS.items() if name in self.renditions
+        )
+
+    @classmethod
+    def from_paths(cls, path: str, renditions: dict[str, str] | None = None) -> StoredImage:
+        return cls(
+            url=storage_url(path),
+            renditions={name: storage_url(value) for name, value in (renditions or {}).items()},
+        )
+
+
+def is_external(path: str) -> bool:
+    """Адреса поза сховищем (старі записи фото зберігали URL)."""
+    return "://" in path or path.startswith("/")
+
+
+def storage_url(path: str) -> str:
+    """URL файлу у сховищі; зовнішні адреси повертаються як є."""
+    return path if is_external(path) else default_storage.url(path)
+
+
+def content_hash(file) -> str:
+    """Хеш вмісту файлу, прочитаного частинами."""
+    digest = hashlib.sha256()
+    file.seek(0)
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+def open_image(file) -> Image.Image:
+    """Відкриває зображення (лише заголовок) і перевіряє формат."""
+    file.seek(0)
+    try:
+        image = Image.open(file)
+    except (UnidentifiedImageError, Image.DecompressionBombError) as exc:
+        raise ImageError(f'Файл "{os.path.basename(file.name)}" не є зображенням') from exc
+    if image.format not in ALLOWED_FORMATS:
+        raise ImageError(
+            f'Файл "{os.path.basename(file.name)}" має недозволений формат. Дозволені: {", ".join(ALLOWED_FORMATS)}'
+        )
+    return image
+
+
+def image_size(image: Image.Image) -> tuple[int, int]:
+    """Розміри з урахуванням EXIF-орієнтації (без декодування пікселів)."""
+    width, height = image.size
+    if image.getexif().get(0x0112) in _ROTATED_ORIENTATIONS:
+        return height, width
+    return width, height
+
+
+def _save_once(name: str, content) -> str:
+    # Ім'я — хеш вмісту, тож наявний файл уже має потрібний вміст
+    if default_storage.exists(name):
+        return name
+    return default_storage.save(name, content)
+
+
+def _encode_webp(image: Image.Image, size: int) -> ContentFile:
+    rendition = image.copy()
+    rendition.thumbnail((size, size), Image.Resampling.LANCZOS)
+    if rendition.mode not in ("RGB", "RGBA"):
+        has_alpha = "A" in rendition.getbands() or "transparency" in rendition.info
+        rendition = rendition.convert("RGBA" if has_alpha else "RGB")
+    buffer = io.BytesIO()
+    rendition.save(buffer, "WEBP", quality=WEBP_QUALITY, method=4)
+    return ContentFile(buffer.getvalue())
+
+
+def make_renditions(image: Image.Image, directory: str, digest: str) -> dict[str, str]:
+    """Будує WebP-копії RENDITIONS; повертає назва -> шлях у сховищі."""
+    # JPEG одразу декодується в зменшеному масштабі — менше пам'яті на великих фото
+    image.draft("RGB", (max(RENDITIONS.values()),) * 2)
+    image = ImageOps.exif_transpose(image)
+    return {
+        name: _save_once(f"{directory}/{digest}_{name}.webp", _encode_webp(image, size))
+        for name, size in RENDITIONS.items()
+    }
+
+
+def save_image(file, directory: str) -> dict:
+    """Зберігає завантажене зображення і його копії.
+
+    Повертає опис для ``CompanyPhoto``: шлях оригіналу, шляхи копій,
+    розміри (px) та розмір файлу (байт).
+    """
+    image = open_image(file)
+    width, height = image_size(image)
+    digest = content_hash(file)
+    extension = os.path.splitext(file.name)[1].lower() or f".{image.format.lower()}"
+    path = _save_once(f"{directory}/{digest}{extension}", file)
+    file.seek(0)
+    renditions = make_renditions(open_image(file), directory, digest)
+    return {
+        "path": path,
+        "renditions": renditions,
+        "width": width,
+        "height": height,
+        "size": file.size,
+    }
+
+
+def renditions_for(file, directory: str) -> dict[str, str]:
+    """Копії для вже збереженого відкритого файлу (наприклад, ``Company.logo``)."""
+    digest = content_hash(file)
+    return make_renditions(open_image(file), directory, digest)
+
+
+def describe_stored(path: str, directory: str) -> dict:
+    """Опис для ``CompanyPhoto`` для файлу, що вже лежить у сховищі під ``path``."""
+    with default_storage.open(path, "rb") as file:
+        width, height = image_size(open_image(file))
+        renditions = renditions_for(file, directory)
+        size = file.size
+    return {"path": path, "renditions": renditions, "width": width, "height": height, "size": size}
+
+
+def delete_files(*paths: str) -> None:
+    """Видаляє файли зі сховища, пропускаючи відсутні."""
+    for path in paths:
+        if path and not is_external(path) and default_storage.exists(path):
+            default_storage.delete(path)
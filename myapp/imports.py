@@ -0,0 +1,439 @@
+"""
+Масовий імпорт компаній з CSV/XLSX.
+
+Файл читається потоком і обробляється блоками по IMPORT_CHUNK_SIZE рядків:
+
+1. рядок розбирається і перевіряється (назва, хоча б один телефон, відомі
+   місто/розділ/статус — за словниками з myapp.reference_data);
+2. правила дублікатів з ``company_check_duplicates`` (телефон, сайт, Instagram,
+   Telegram) перевіряються за нормалізованими ключами (myapp.normalization)
+   одним запитом на правило для всього блоку, а також між рядками самого файлу;
+3. компанії, телефони, адреси та пошукові документи створюються через
+   ``bulk_create`` в одній транзакції на блок, client_id резервуються блоком
+   (myapp.sequences).
+
+Помилковий рядок пропускається і потрапляє у звіт з номером рядка файлу.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import os
+import re
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Callable, Iterable, Iterator
+
+from django import forms
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from . import reference_data, search, sequences
+from .models import Company, CompanyAddress, CompanyPhone, CompanySearchDocument
+from .normalization import COMPANY_CONTACT_KEYS, normalize_phone_number, phone_key
+from .signals import companies_bulk_changed
+
+
+IMPORT_CHUNK_SIZE = 1000
+
+IMPORT_EXTENSIONS = (".csv", ".xlsx")
+
+# Скільки помилок зберігати у звіті (рахуються всі)
+MAX_REPORTED_ERRORS = 500
+
+# Заголовки колонок (у нижньому регістрі) -> поле імпорту.
+# Підходять файли масового експорту (myapp.exports) і прості таблиці.
+HEADER_ALIASES = {
+    "назва": "name", "название": "name", "компания": "name", "компанія": "name", "name": "name",
+    "місто": "city", "город": "city", "city": "city",
+    "розділ": "category", "раздел": "category", "категорія": "category", "category": "category",
+    "статус": "status", "status": "status",
+    "телефони": "phones", "телефон": "phones", "телефоны": "phones", "phone": "phones", "phones": "phones",
+    "адреси": "addresses", "адреса": "addresses", "адрес": "addresses", "address": "addresses",
+    "addresses": "addresses",
+    "telegram": "telegram",
+    "instagram": "instagram",
+    "сайт": "website", "website": "website",
+    "короткий коментар": "short_comment", "комментарий": "short_comment", "short_comment": "short_comment",
+    "повний опис": "full_description", "описание": "full_description", "full_description": "full_description",
+    "ключові слова": "keywords", "ключевые слова": "keywords", "keywords": "keywords",
+    "дата дзвінка": "call_date", "дата звонка": "call_date", "call_date": "call_date",
+}
+
+# Роздільники кількох телефонів/адрес в одній клітинці
+_LIST_SPLIT_RE = re.compile(r"[;\n]+")
+# Ім'я контакту в дужках після номера: "+380671234567 (Іван)"
+_PHONE_CONTACT_RE = re.compile(r"\(([^()]*[^\W\d_][^()]*)\)\s*$")
+
+_DATE_FORMATS = ("%Y-%m-%d", "%d.%m.%Y")
+
+_MAX_LENGTHS = {
+    f.attname: f.max_length for f in Company._meta.concrete_fields if getattr(f, "max_length", None)
+}
+_PHONE_MAX_LENGTH = CompanyPhone._meta.get_field("number").max_length
+_ADDRESS_MAX_LENGTH = CompanyAddress._meta.get_field("address").max_length
+
+# Сайт перевіряється і доповнюється схемою так само, як у CompanyForm
+_WEBSITE_FIELD = forms.URLField(required=False, assume_scheme="http")
+
+
+@dataclass
+class RowError:
+    row: int
+    message: str
+
+
+@dataclass
+class ImportResult:
+    processed: int = 0
+    created: int = 0
+    error_count: int = 0
+    errors: list[RowError] = field(default_factory=list)
+
+    def add_error(self, row: int, message: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(RowError(row, message))
+
+    @property
+    def message(self) -> str:
+        return f"Создано компаний: {self.created} из {self.processed}, ошибок: {self.error_count}"
+
+
+@dataclass
+class ParsedRow:
+    """Перевірений рядок, готовий до створення компанії."""
+
+    row: int
+    company: dict
+    phones: list[tuple[str, str]]
+    addresses: list[str]
+    # (правило, нормалізований ключ) -> значення з файлу (див. DuplicateChecker)
+    keys: dict[tuple[str, str], str] = field(default_factory=dict)
+
+
+# ============================================================================
+# Читання файлів
+# ============================================================================
+
+def _map_header(header: Iterable) -> list[str | None]:
+    return [HEADER_ALIASES.get(str(name or "").strip().lower()) for name in header]
+
+
+def _iter_csv(file) -> Iterator[list]:
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    sample = text.read(4096)
+    text.seek(0)
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+    except csv.Error:
+        dialect = csv.excel
+    yield from csv.reader(text, dialect)
+
+
+def _iter_xlsx(file) -> Iterator[list]:
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        for row in workbook.active.iter_rows(values_only=True):
+            yield list(row)
+    finally:
+        workbook.close()
+
+
+def read_rows(file, filename: str) -> Iterator[tuple[int, dict]]:
+    """Рядки файлу як (номер рядка, {поле: значення}); порожні рядки пропускаються."""
+    extension = os.path.splitext(filename)[1].lower()
+    if extension not in IMPORT_EXTENSIONS:
+        raise ValueError(f"Непідтримуваний формат файлу: {extension or filename}")
+    rows = _iter_xlsx(file) if extension == ".xlsx" else _iter_csv(file)
+
+    columns = _map_header(next(rows, []))
+    if "name" not in columns:
+        raise ValueError("У файлі немає колонки з назвою компанії")
+
+    for number, values in enumerate(rows, start=2):
+        record = {}
+        for key, value in zip(columns, values):
+            if key and value not in (None, ""):
+                record[key] = value
+        if record:
+            yield number, record
+
+
+def chunked(rows: Iterable, size: int) -> Iterator[list]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# ============================================================================
+# Розбір рядків
+# ============================================================================
+
+class Lookups:
+    """Словники назва -> об'єкт для міст, розділів і статусів (з кешу довідників)."""
+
+    def __init__(self, country=None):
+        self.cities = {}
+        for city in reference_data.get_cities(country):
+            self.cities.setdefault(city.name.strip().lower(), city)
+        self.categories = {c.name.strip().lower(): c for c in reference_data.get_categories()}
+        statuses = reference_data.get_statuses()
+        self.statuses = {s.name.strip().lower(): s for s in statuses}
+        self.default_status = next((s for s in statuses if s.is_default), None)
+
+
+def _text(record: dict, key: str) -> str:
+    value = record.get(key)
+    return str(value).strip() if value is not None else ""
+
+
+def _parse_phone(item: str) -> tuple[str, str]:
+    item = item.replace("⭐", "").strip()
+    contact = ""
+    match = _PHONE_CONTACT_RE.search(item)
+    if match:
+        contact = match.group(1).strip()
+        item = item[:match.start()]
+    return normalize_phone_number(item.strip()), contact
+
+
+def _parse_date(value) -> date | None:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(str(value).strip(), fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Невірна дата дзвінка: {value}")
+
+
+def _website(value: str) -> str:
+    try:
+        return _WEBSITE_FIELD.clean(value)
+    except ValidationError:
+        raise ValueError(f"Невірна адреса сайту: {value}") from None
+
+
+def _resolve(mapping: dict, value: str, label: str):
+    if not value:
+        return None
+    try:
+        return mapping[value.lower()]
+    except KeyError:
+        raise ValueError(f"{label} «{value}» не знайдено") from None
+
+
+def parse_row(number: int, record: dict, lookups: Lookups) -> ParsedRow:
+    """Перетворює рядок файлу на ParsedRow; кидає ValueError з описом помилки."""
+    name = _text(record, "name")
+    if not name:
+        raise ValueError("Не вказано назву компанії")
+
+    phones = []
+    for item in _LIST_SPLIT_RE.split(_text(record, "phones")):
+        number_value, contact = _parse_phone(item)
+        if number_value:
+            phones.append((number_value, contact))
+    if not phones:
+        raise ValueError("Компанія повинна мати хоча б один телефон")
+
+    addresses = [item.strip() for item in _LIST_SPLIT_RE.split(_text(record, "addresses")) if item.strip()]
+
+    company = {
+        "name": name,
+        "city": _resolve(lookups.cities, _text(record, "city"), "Місто"),
+        "category": _resolve(lookups.categories, _text(record, "category"), "Розділ"),
+        "status": _resolve(lookups.statuses, _text(record, "status"), "Статус") or lookups.default_status,
+        "telegram": _text(record, "telegram"),
+        "instagram": _text(record, "instagram"),
+        "website": _website(_text(record, "website")),
+        "short_comment": _text(record, "short_comment"),
+        "full_description": _text(record, "full_description"),
+        "keywords": _text(record, "keywords"),
+        "call_date": _parse_date(record["call_date"]) if record.get("call_date") else None,
+    }
+    for field_name, value in company.items():
+        max_length = _MAX_LENGTHS.get(field_name)
+        if max_length and isinstance(value, str) and len(value) > max_length:
+            raise ValueError(f"Поле «{field_name}» довше за {max_length} символів")
+    if any(len(number_value) > _PHONE_MAX_LENGTH for number_value, _ in phones):
+        raise ValueError(f"Телефон довший за {_PHONE_MAX_LENGTH} символів")
+    if any(len(address) > _ADDRESS_MAX_LENGTH for address in addresses):
+        raise ValueError(f"Адреса довша за {_ADDRESS_MAX_LENGTH} символів")
+    return ParsedRow(
+        row=number,
+        company=company,
+        phones=phones,
+        addresses=addresses,
+        keys=contact_keys(company, phones),
+    )
+
+
+# ============================================================================
+# Дублікати
+# ============================================================================
+
+# Правила з company_check_duplicates: ключ -> (назва для звіту, поле Company)
+COMPANY_DUPLICATE_FIELDS = {
+    "website": "сайт",
+    "instagram": "Instagram",
+    "telegram": "Telegram",
+}
+
+
+def contact_keys(company: dict, phones: list[tuple[str, str]]) -> dict[tuple[str, str], str]:
+    """(правило, нормалізований ключ) -> значення з файлу."""
+    keys = {}
+    for number, _ in phones:
+        key = phone_key(number)
+        if key:
+            keys.setdefault(("phone", key), number)
+    for field_name in COMPANY_DUPLICATE_FIELDS:
+        value = company[field_name]
+        key = COMPANY_CONTACT_KEYS[field_name](value)
+        if key:
+            keys.setdefault((field_name, key), value)
+    return keys
+
+
+class DuplicateChecker:
+    """Перевіряє блок рядків на дублікати в БД і серед попередніх рядків файлу.
+
+    Ключі рядків рахуються в ``parse_row`` (``ParsedRow.keys``), тож помилка
+    нормалізації відкидає лише свій рядок.
+    """
+
+    def __init__(self):
+        # (правило, ключ) -> номер рядка файлу, де значення вже зустрілося
+        self.seen: dict[tuple[str, str], int] = {}
+
+    def _existing(self, rows: list[ParsedRow]) -> dict[tuple[str, str], str]:
+        """Ключі з блоку, що вже є в БД -> назва компанії (один запит на правило)."""
+        values: dict[str, set] = {"phone": set(), **{name: set() for name in COMPANY_DUPLICATE_FIELDS}}
+        for parsed in rows:
+            for rule, key in parsed.keys:
+                values[rule].add(key)
+
+        existing = {}
+        if values["phone"]:
+            for key, company_name in CompanyPhone.objects.filter(
+                number_key__in=values["phone"]
+            ).values_list("number_key", "company__name"):
+                existing.setdefault(("phone", key), company_name)
+        for field_name in COMPANY_DUPLICATE_FIELDS:
+            if values[field_name]:
+                for key, company_name in Company.objects.filter(
+                    **{f"{field_name}_key__in": values[field_name]}
+                ).values_list(f"{field_name}_key", "name"):
+                    existing.setdefault((field_name, key), company_name)
+        return existing
+
+    def check(self, rows: list[ParsedRow], result: ImportResult) -> list[ParsedRow]:
+        """Повертає рядки без дублікатів, решту записує в помилки."""
+        existing = self._existing(rows)
+        unique = []
+        for parsed in rows:
+            problem = None
+            for (rule, key), value in parsed.keys.items():
+                label = "телефон" if rule == "phone" else COMPANY_DUPLICATE_FIELDS[rule]
+                if (rule, key) in existing:
+                    problem = f"Дублікат: {label} {value} вже є у компанії «{existing[(rule, key)]}»"
+                elif (rule, key) in self.seen:
+                    problem = f"Дублікат: {label} {value} вже є у рядку {self.seen[(rule, key)]}"
+                if problem:
+                    break
+            if problem:
+                result.add_error(parsed.row, problem)
+                continue
+            for key in parsed.keys:
+                self.seen.setdefault(key, parsed.row)
+            unique.append(parsed)
+        return unique
+
+
+# ============================================================================
+# Створення
+# ============================================================================
+
+def create_companies(rows: list[ParsedRow]) -> list[int]:
+    """Створює компанії з телефонами й адресами масовими INSERT; повертає їхні id."""
+    if not rows:
+        return []
+    client_ids = sequences.reserve_client_ids(len(rows))
+    with transaction.atomic():
+        companies = [
+            Company(client_id=client_id, **parsed.company)
+            for client_id, parsed in zip(client_ids, rows)
+        ]
+        # bulk_create оминає save(), тож ключі дублікатів рахуються тут
+        for company in companies:
+            company.update_keys()
+        companies = Company.objects.bulk_create(companies)
+        phones, addresses, documents = [], [], []
+        for company, parsed in zip(companies, rows):
+            company_phones = [
+                CompanyPhone(company=company, number=number, contact_name=contact, is_favorite=index == 0)
+                for index, (number, contact) in enumerate(parsed.phones)
+            ]
+            company_addresses = [
+                CompanyAddress(company=company, address=address, is_favorite=index == 0)
+                for index, address in enumerate(parsed.addresses)
+            ]
+            for phone in company_phones:
+                phone.update_keys()
+            phones.extend(company_phones)
+            addresses.extend(company_addresses)
+            # Документ будується з об'єктів у пам'яті, без повторного читання з БД
+            documents.append(CompanySearchDocument(
+                company=company,
+                document=search.build_document(company, company_phones, company_addresses),
+            ))
+        CompanyPhone.objects.bulk_create(phones)
+        CompanyAddress.objects.bulk_create(addresses)
+        search.save_documents(documents)
+
+        company_ids = [company.pk for company in companies]
+        companies_bulk_changed.send(sender=Company, company_ids=company_ids, search_indexed=True)
+    return company_ids
+
+
+def import_file(
+    file,
+    filename: str,
+    country=None,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    progress: Callable[[int], None] | None = None,
+) -> ImportResult:
+    """Імпортує компанії з файлу і повертає звіт.
+
+    ``country`` — країна користувача: назви міст шукаються лише серед її міст.
+    """
+    result = ImportResult()
+    lookups = Lookups(country)
+    duplicates = DuplicateChecker()
+
+    for chunk in chunked(read_rows(file, filename), chunk_size):
+        parsed_rows = []
+        for number, record in chunk:
+            try:
+                parsed_rows.append(parse_row(number, record, lookups))
+            except ValueError as exc:
+                result.add_error(number, str(exc))
+        unique_rows = duplicates.check(parsed_rows, result)
+        result.created += len(create_companies(unique_rows))
+        result.processed += len(chunk)
+        if progress is not None:
+            progress(result.processed)
+    return result
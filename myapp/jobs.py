@@ -0,0 +1,293 @@
+"""
+Фонові задачі на базі таблиці ``Job`` (без Redis і брокерів).
+
+Веб-процес лише ставить задачу в чергу (``enqueue``), виконує її команда
+``python manage.py run_jobs``. Воркер забирає задачу через
+``select_for_update(skip_locked=True)`` і умовний UPDATE, тож кілька воркерів
+можуть працювати паралельно, не беручи одну задачу двічі.
+
+Обробник задачі — функція ``handler(job, progress)``, зареєстрована через
+``@register("kind")``. Вона повертає словник, який зберігається в ``Job.result``;
+``progress(done, total=None)`` оновлює прогрес (не частіше ніж раз на
+PROGRESS_INTERVAL секунд). Поки обробник працює, окремий потік раз на
+HEARTBEAT_INTERVAL секунд оновлює ``heartbeat_at``, тож довгий крок без
+виклику ``progress`` не робить задачу покинутою (``requeue_stale``).
+
+Файли задач лежать у ``job_storage`` (settings.JOB_FILES_ROOT, поза MEDIA_ROOT),
+тож їх не можна завантажити за прямим URL; файли експорту видаляються через
+settings.JOB_FILES_MAX_AGE секунд (``purge_expired_files``, викликає воркер).
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import tempfile
+import threading
+import time
+import traceback
+from datetime import timedelta
+from typing import Callable
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.db import connection, transaction
+from django.http import QueryDict
+from django.utils import timezone
+from django.utils.functional import LazyObject
+
+from .models import Company, Job
+
+
+logger = logging.getLogger(__name__)
+
+# Як часто (секунд) записувати прогрес у БД
+PROGRESS_INTERVAL = 1.0
+
+# Задача без оновлення heartbeat_at довше цього часу вважається покинутою
+STALE_AFTER = timedelta(minutes=15)
+
+# Як часто (секунд) воркер підтверджує, що задача виконується; значно менше за STALE_AFTER
+HEARTBEAT_INTERVAL = 60.0
+
+# Скільки разів пробувати покинуту задачу знову
+MAX_ATTEMPTS = 3
+
+# Каталоги в job_storage
+EXPORTS_DIR = "exports"
+IMPORTS_DIR = "imports"
+
+HANDLERS: dict[str, Callable] = {}
+
+
+class _JobStorage(LazyObject):
+    def _setup(self):
+        self._wrapped = FileSystemStorage(location=settings.JOB_FILES_ROOT, base_url=None)
+
+
+# Приватне сховище файлів задач (не має URL)
+job_storage = _JobStorage()
+
+
+def register(kind: str):
+    """Декоратор: реєструє обробник задач типу ``kind``."""
+    def decorator(func):
+        HANDLERS[kind] = func
+        return func
+    return decorator
+
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def enqueue(kind: str, params: dict | None = None, user=None) -> Job:
+    """Ставить задачу в чергу."""
+    if kind not in HANDLERS:
+        raise ValueError(f"Невідомий тип задачі: {kind}")
+    return Job.objects.create(kind=kind, params=params or {}, created_by=user)
+
+
+# ============================================================================
+# Воркер
+# ============================================================================
+
+def claim_next(worker: str) -> Job | None:
+    """Забирає найстарішу задачу з черги або повертає None."""
+    with transaction.atomic():
+        job = (
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(status=Job.STATUS_PENDING)
+            .order_by('created_at', 'id')
+            .first()
+        )
+        if job is None:
+            return None
+        now = timezone.now()
+        # Умовний UPDATE захищає і там, де SELECT FOR UPDATE не підтримується (SQLite)
+        claimed = Job.objects.filter(pk=job.pk, status=Job.STATUS_PENDING).update(
+            status=Job.STATUS_RUNNING,
+            worker=worker,
+            attempts=job.attempts + 1,
+            started_at=now,
+            heartbeat_at=now,
+        )
+    if not claimed:
+        return None
+    job.refresh_from_db()
+    return job
+
+
+def requeue_stale() -> int:
+    """Повертає в чергу задачі покинутих воркерів (або завершує їх помилкою)."""
+    deadline = timezone.now() - STALE_AFTER
+    stale = Job.objects.filter(status=Job.STATUS_RUNNING, heartbeat_at__lt=deadline)
+    failed = stale.filter(attempts__gte=MAX_ATTEMPTS).update(
+        status=Job.STATUS_FAILED,
+        error="Воркер перестав відповідати",
+        finished_at=timezone.now(),
+    )
+    requeued = stale.update(status=Job.STATUS_PENDING, worker="")
+    return failed + requeued
+
+
+def purge_expired_files() -> int:
+    """Видаляє файли завершених задач, старші за JOB_FILES_MAX_AGE; повертає кількість задач."""
+    deadline = timezone.now() - timedelta(seconds=settings.JOB_FILES_MAX_AGE)
+    expired = Job.objects.filter(status=Job.STATUS_DONE, finished_at__lt=deadline, result__has_key='file')
+    count = 0
+    for job in expired.only('id', 'result'):
+        name = job.result.pop('file')
+        if job_storage.exists(name):
+            job_storage.delete(name)
+        job.result['expired'] = True
+        job.save(update_fields=['result'])
+        count += 1
+    return count
+
+
+class _Progress:
+    """Колбек прогресу з обмеженням частоти записів у БД."""
+
+    def __init__(self, job: Job):
+        self.job = job
+        self.saved_at = 0.0
+
+    def __call__(self, done: int, total: int | None = None) -> None:
+        self.job.progress = done
+        if total is not None:
+            self.job.total = total
+        now = time.monotonic()
+        if now - self.saved_at < PROGRESS_INTERVAL:
+            return
+        self.saved_at = now
+        Job.objects.filter(pk=self.job.pk).update(
+            progress=self.job.progress,
+            total=self.job.total,
+            heartbeat_at=timezone.now(),
+        )
+
+
+class _Heartbeat:
+    """Потік, що оновлює ``heartbeat_at`` задачі, поки виконується її обробник."""
+
+    def __init__(self, job: Job, interval: float | None = None):
+        self.job = job
+        self.interval = HEARTBEAT_INTERVAL if interval is None else interval
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"job-{job.pk}-heartbeat", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        try:
+            while not self._stopped.wait(self.interval):
+                try:
+                    # Лише поки задача наша: повернуту в чергу вже веде інший воркер
+                    Job.objects.filter(
+                        pk=self.job.pk, status=Job.STATUS_RUNNING, worker=self.job.worker
+                    ).update(heartbeat_at=timezone.now())
+                except Exception:
+                    logger.exception("Heartbeat of job %s failed", self.job.pk)
+        finally:
+            # Потік має власне з'єднання з БД
+            connection.close()
+
+
+def run_job(job: Job) -> Job:
+    """Виконує задачу і зберігає результат або помилку."""
+    handler = HANDLERS.get(job.kind)
+    try:
+        if handler is None:
+            raise ValueError(f"Невідомий тип задачі: {job.kind}")
+        with _Heartbeat(job):
+            result = handler(job, _Progress(job))
+    except Exception:
+        logger.exception("Job %s (%s) failed", job.pk, job.kind)
+        job.status = Job.STATUS_FAILED
+        job.error = traceback.format_exc(limit=5)
+    else:
+        job.status = Job.STATUS_DONE
+        job.result = result or {}
+        if job.total is not None:
+            job.progress = job.total
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'result', 'error', 'progress', 'total', 'finished_at'])
+    return job
+
+
+# ============================================================================
+# Обробники
+# ============================================================================
+
+def _user_country(user):
+    profile = getattr(user, 'userprofile', None) if user else None
+    return profile.country if profile else None
+
+
+@register("export_companies")
+def export_companies(job: Job, progress) -> dict:
+    """Експорт відфільтрованих компаній у файл (параметри — рядок запиту списку)."""
+    from . import exports
+    from .queries import CompanyQuery
+
+    export_format = job.params.get('format', 'csv')
+    if export_format not in exports.EXPORT_FORMATS:
+        raise ValueError(f"Невідомий формат експорту: {export_format}")
+
+    params = QueryDict(job.params.get('query', ''))
+    queryset = CompanyQuery.from_params(params, _user_country(job.created_by)).for_export()
+    progress(0, queryset.count())
+
+    filename = exports.export_filename(export_format)
+    with tempfile.TemporaryFile() as file:
+        exports.write_export(queryset, export_format, file, progress=progress)
+        file.seek(0)
+        name = job_storage.save(f"{EXPORTS_DIR}/{job.pk}_{filename}", File(file))
+    return {'file': name, 'filename': filename}
+
+
+@register("import_companies")
+def import_companies(job: Job, progress) -> dict:
+    """Імпорт компаній із завантаженого файлу (див. myapp.imports)."""
+    from .imports import import_file
+
+    name = job.params['file']
+    try:
+        with job_storage.open(name, 'rb') as file:
+            result = import_file(
+                file,
+                job.params.get('filename', name),
+                country=_user_country(job.created_by),
+                progress=progress,
+            )
+    finally:
+        job_storage.delete(name)
+    return {
+        'message': result.message,
+        'created': result.created,
+        'processed': result.processed,
+        'error_count': result.error_count,
+        'errors': [{'row': error.row, 'message': error.message} for error in result.errors],
+    }
+
+
+@register("find_duplicates")
+def find_duplicates(job: Job, progress) -> dict:
+    """Пошук дублікатів по всій базі (див. myapp.duplicates)."""
+    from . import duplicates
+
+    record = duplicates.scan(full=job.params.get('full', False), progress=progress)
+    return {
+        'message': f"Проверено компаний: {record.processed}, пар-кандидатов: {record.links}",
+        'processed': record.processed,
+        'links': record.links,
+    }
@@ -0,0 +1,53 @@
+"""
+WebP-копії для логотипів і фото, завантажених до появи myapp.images.
+
+Старі фото (перенесені з колишнього списку URL) отримують копії та розміри;
+шлях оригіналу лишається тим самим.
+"""
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from myapp import images
+from myapp.models import Company, CompanyPhoto
+
+
+class Command(BaseCommand):
+    help = "Будує WebP-копії (thumb, preview) для логотипів і фото без них"
+
+    def handle(self, *args, **options):
+        logos = photos = failed = 0
+
+        companies = Company.objects.filter(logo_renditions={}).exclude(Q(logo__isnull=True) | Q(logo="")).only(
+            "id", "logo", "logo_renditions"
+        )
+        for company in companies.iterator(chunk_size=100):
+            try:
+                with company.logo.open("rb") as logo:
+                    company.logo_renditions = images.renditions_for(logo, f"{images.LOGOS_DIR}/{company.pk}")
+            except (OSError, images.ImageError) as exc:
+                failed += 1
+                self.stderr.write(f"Компанія #{company.pk}, логотип: {exc}")
+                continue
+            company.save(update_fields=["logo_renditions"])
+            logos += 1
+
+        for photo in CompanyPhoto.objects.filter(renditions={}).iterator(chunk_size=100):
+            if images.is_external(photo.file.name):
+                continue
+            try:
+                description = images.describe_stored(photo.file.name, f"{images.PHOTOS_DIR}/{photo.company_id}")
+            except (OSError, images.ImageError) as exc:
+                failed += 1
+                self.stderr.write(f"Компанія #{photo.company_id}, фото {photo.file.name}: {exc}")
+                continue
+            photo.renditions = description["renditions"]
+            photo.width = description["width"]
+            photo.height = description["height"]
+            photo.size = description["size"]
+            photo.save(update_fields=["renditions", "width", "height", "size"])
+            photos += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Логотипів: {logos}, фото: {photos}, помилок: {failed}"
+        ))
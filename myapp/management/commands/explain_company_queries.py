@@ -0,0 +1,38 @@
+"""
+EXPLAIN основних запитів списку компаній (див. myapp.query_plans).
+
+Завершується з помилкою, якщо план якогось запиту регресував, тож команду
+можна запускати після міграцій на копії робочої бази.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from myapp import query_plans
+
+
+class Command(BaseCommand):
+    help = "Перевіряє плани запитів списку компаній: повні проходи таблиці та невикористані індекси"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--json",
+            action="store_true",
+            help="Вивести звіт з планами у JSON",
+        )
+
+    def handle(self, *args, **options):
+        reports = query_plans.check_all()
+        if options["json"]:
+            self.stdout.write(query_plans.as_json(reports))
+        else:
+            for report in reports:
+                if report.ok:
+                    self.stdout.write(self.style.SUCCESS(f"OK    {report.case.name}"))
+                else:
+                    self.stdout.write(self.style.ERROR(f"FAIL  {report.case.name}: {'; '.join(report.problems)}"))
+                if options["verbosity"] > 1 or not report.ok:
+                    self.stdout.write(report.plan)
+
+        failed = [report.case.name for report in reports if not report.ok]
+        if failed:
+            raise CommandError(f"Регресії планів: {', '.join(failed)}")
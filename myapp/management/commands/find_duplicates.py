@@ -0,0 +1,40 @@
+"""
+Пошук дублікатів компаній (див. myapp.duplicates).
+
+Без ``--full`` обробляє лише компанії, змінені після попереднього запуску,
+тож команду можна ставити в cron.
+"""
+
+from django.core.management.base import BaseCommand
+
+from myapp import duplicates
+
+
+class Command(BaseCommand):
+    help = "Шукає дублікати компаній за телефоном, сайтом, акаунтами та схожою назвою в місті"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Перерахувати всі компанії, а не лише змінені",
+        )
+        parser.add_argument(
+            "--show",
+            type=int,
+            default=0,
+            metavar="N",
+            help="Вивести N найпевніших кластерів",
+        )
+
+    def handle(self, *args, **options):
+        record = duplicates.scan(full=options["full"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Оброблено компаній: {record.processed}, пар-кандидатів: {record.links}"
+        ))
+        if options["show"]:
+            for cluster in duplicates.clusters(limit=options["show"]):
+                names = ", ".join(f"{company.name} (#{company.pk})" for company in cluster.merge)
+                self.stdout.write(
+                    f"[{', '.join(cluster.reasons)}] {cluster.primary.name} (#{cluster.primary.pk}) <- {names}"
+                )
@@ -0,0 +1,44 @@
+"""
+Імпорт компаній з CSV/XLSX з командного рядка (див. myapp.imports).
+"""
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from myapp import imports
+
+
+class Command(BaseCommand):
+    help = "Імпортує компанії з файлу CSV або XLSX"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Шлях до файлу .csv або .xlsx")
+        parser.add_argument(
+            "--user",
+            help="Логін користувача: міста шукаються лише в його країні",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=imports.IMPORT_CHUNK_SIZE,
+            help="Кількість рядків за один прохід",
+        )
+
+    def handle(self, *args, **options):
+        country = None
+        if options["user"]:
+            try:
+                user = User.objects.select_related("userprofile__country").get(username=options["user"])
+            except User.DoesNotExist:
+                raise CommandError(f"Користувача {options['user']} не знайдено")
+            country = getattr(user, "userprofile", None) and user.userprofile.country
+
+        try:
+            with open(options["path"], "rb") as file:
+                result = imports.import_file(file, options["path"], country=country, chunk_size=options["chunk_size"])
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+
+        for error in result.errors:
+            self.stderr.write(f"Рядок {error.row}: {error.message}")
+        self.stdout.write(self.style.SUCCESS(result.message))
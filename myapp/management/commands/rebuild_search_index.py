@@ -0,0 +1,29 @@
+"""
+Повна перебудова пошукових документів компаній.
+"""
+
+from django.core.management.base import BaseCommand
+
+from myapp import search
+from myapp.models import Company
+
+
+class Command(BaseCommand):
+    help = "Перебудовує пошукові документи (CompanySearchDocument) для всіх компаній"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=search.REFRESH_CHUNK_SIZE,
+            help="Кількість компаній за один прохід",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        ids = list(Company.objects.order_by("id").values_list("id", flat=True))
+        for start in range(0, len(ids), chunk_size):
+            search.refresh_documents(ids[start:start + chunk_size])
+        self.stdout.write(self.style.SUCCESS(
+            f"Пошуковий індекс перебудовано ({len(ids)} компаній, бекенд: {search.get_backend()})"
+        ))
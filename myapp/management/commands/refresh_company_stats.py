@@ -0,0 +1,21 @@
+"""
+Звірка лічильників компаній (кеш нових компаній, companies_count довідників) з БД.
+
+Можна запускати періодично (cron), щоб виправити зміни, які оминули сигнали.
+"""
+
+from django.core.management.base import BaseCommand
+
+from myapp import stats
+
+
+class Command(BaseCommand):
+    help = "Перераховує лічильники компаній (нові за 30 днів, companies_count міст, розділів і статусів)"
+
+    def handle(self, *args, **options):
+        result = stats.reconcile()
+        self.stdout.write(self.style.SUCCESS(
+            f"Лічильники оновлено: нових за {stats.NEW_COMPANIES_DAYS} днів — {result['new']['total']}, "
+            f"виправлено міст — {result['fixed']['city']}, розділів — {result['fixed']['category']}, "
+            f"статусів — {result['fixed']['status']}"
+        ))
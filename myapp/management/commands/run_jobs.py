@@ -0,0 +1,66 @@
+"""
+Воркер фонових задач (див. myapp.jobs).
+
+Запуск: ``python manage.py run_jobs`` (у Procfile — процес ``worker``, на Render —
+разом з gunicorn у startCommand, див. render.yaml).
+Можна запускати кілька воркерів паралельно.
+"""
+
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from myapp import jobs
+
+
+# Як часто (секунд) видаляти прострочені файли задач
+PURGE_INTERVAL = 60 * 60
+
+
+class Command(BaseCommand):
+    help = "Виконує фонові задачі з черги Job"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Виконати всі задачі з черги і завершитися",
+        )
+        parser.add_argument(
+            "--sleep",
+            type=float,
+            default=2.0,
+            help="Пауза (секунд) між перевірками порожньої черги",
+        )
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        worker = jobs.worker_name()
+        self.stdout.write(f"Воркер {worker} запущено")
+        purged_at = 0.0
+        while not self.stopping:
+            close_old_connections()
+            jobs.requeue_stale()
+            if time.monotonic() - purged_at >= PURGE_INTERVAL:
+                jobs.purge_expired_files()
+                purged_at = time.monotonic()
+            job = jobs.claim_next(worker)
+            if job is None:
+                if options["once"]:
+                    break
+                time.sleep(options["sleep"])
+                continue
+
+            job = jobs.run_job(job)
+            style = self.style.SUCCESS if job.status == job.STATUS_DONE else self.style.ERROR
+            self.stdout.write(style(f"{job.kind} #{job.pk}: {job.get_status_display()}"))
+        self.stdout.write("Воркер зупинено")
+
+    def _stop(self, signum, frame):
+        # Поточна задача доробляється, нову воркер уже не бере
+        self.stopping = True
@@ -0,0 +1,156 @@
+"""
+Віддача завантажених файлів (``MEDIA_URL``) з кешуванням.
+
+* імена з хешем вмісту (myapp.images) ніколи не змінюють вміст — для них
+  ``Cache-Control: immutable`` на рік, браузер більше не звертається до сервера;
+* решта файлів кешується на MEDIA_MAX_AGE секунд і перевіряється через
+  ETag / If-None-Match (відповідь 304 без тіла);
+* підтримується один діапазон ``Range: bytes=...`` (206);
+* повний файл віддається ``FileResponse``: WSGI-сервер (gunicorn) надсилає його
+  через ``sendfile`` без копіювання в Python. Якщо задано MEDIA_ACCEL_REDIRECT,
+  Django лише перевіряє запит, а файл віддає nginx (``X-Accel-Redirect``).
+"""
+
+from __future__ import annotations
+
+import mimetypes
+import os
+import re
+import stat
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.http import http_date
+from django.views.decorators.http import require_http_methods
+
+from .images import HASH_LENGTH
+
+
+# Ім'я файлу з хешем вмісту: <hash>.<ext> або <hash>_<rendition>.webp
+_HASHED_NAME_RE = re.compile(rf"^(?P<hash>[0-9a-f]{{{HASH_LENGTH}}})(?:_\w+)?\.\w+$")
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+BLOCK_SIZE = 64 * 1024
+
+
+def content_hash(path: str) -> str | None:
+    """Хеш вмісту з імені файлу або None, якщо ім'я не хешоване."""
+    match = _HASHED_NAME_RE.match(os.path.basename(path))
+    return match.group("hash") if match else None
+
+
+def etag_for(path: str, stats: os.stat_result) -> str:
+    digest = content_hash(path)
+    if digest is None:
+        return f'"{stats.st_mtime_ns:x}-{stats.st_size:x}"'
+    # Копії мають однаковий хеш з оригіналом, тож додаємо ім'я
+    return f'"{os.path.basename(path)}"'
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    return etag in (value.strip().removeprefix("W/") for value in header.split(","))
+
+
+def parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """Один діапазон ``bytes=start-end`` -> (start, end) включно; None — віддати весь файл.
+
+    Некоректний або незадовільний діапазон дає ValueError.
+    """
+    match = _RANGE_RE.match(header.strip())
+    if match is None:
+        return None  # кілька діапазонів або інші одиниці — віддаємо весь файл
+    start, end = match.groups()
+    if not start and not end:
+        raise ValueError(header)
+    if not start:
+        length = int(end)
+        if length == 0:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise ValueError(header)
+    return start, end
+
+
+class _RangeFile:
+    """Частина файлу для FileResponse: читає не більше ``length`` байтів."""
+
+    def __init__(self, file, start: int, length: int):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size: int = -1) -> bytes:
+        if self.remaining <= 0:
+            return b""
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def _cache_headers(response: HttpResponse, path: str, stats: os.stat_result, etag: str) -> HttpResponse:
+    if content_hash(path):
+        response["Cache-Control"] = f"public, max-age={settings.MEDIA_IMMUTABLE_MAX_AGE}, immutable"
+    else:
+        response["Cache-Control"] = f"public, max-age={settings.MEDIA_MAX_AGE}"
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(stats.st_mtime)
+    response["Accept-Ranges"] = "bytes"
+    return response
+
+
+@require_http_methods(["GET", "HEAD"])
+def serve(request, path: str):
+    """Віддає файл з MEDIA_ROOT."""
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, path)
+        stats = os.stat(fullpath)
+    except (ValueError, OSError):
+        raise Http404("Файл не знайдено")
+    if not stat.S_ISREG(stats.st_mode):
+        raise Http404("Файл не знайдено")
+
+    etag = etag_for(path, stats)
+    if _etag_matches(request.headers.get("If-None-Match", ""), etag):
+        return _cache_headers(HttpResponseNotModified(), path, stats, etag)
+
+    content_type, encoding = mimetypes.guess_type(fullpath)
+    content_type = content_type or "application/octet-stream"
+
+    if settings.MEDIA_ACCEL_REDIRECT:
+        response = HttpResponse(content_type=content_type)
+        response["X-Accel-Redirect"] = f"{settings.MEDIA_ACCEL_REDIRECT.rstrip('/')}/{path}"
+        return _cache_headers(response, path, stats, etag)
+
+    byte_range = None
+    range_header = request.headers.get("Range")
+    if_range = request.headers.get("If-Range")
+    if range_header and (not if_range or if_range.strip() == etag):
+        try:
+            byte_range = parse_range(range_header, stats.st_size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{stats.st_size}"
+            return response
+
+    file = open(fullpath, "rb")
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type)
+    else:
+        start, end = byte_range
+        response = FileResponse(_RangeFile(file, start, end - start + 1), status=206, content_type=content_type)
+        response["Content-Length"] = str(end - start + 1)
+        response["Content-Range"] = f"bytes {start}-{end}/{stats.st_size}"
+    if encoding:
+        response["Content-Encoding"] = encoding
+    return _cache_headers(response, path, stats, etag)
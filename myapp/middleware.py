@@ -0,0 +1,142 @@
+"""
+Middleware для вимірювання SQL-навантаження кожного запиту.
+
+Рахує кількість запитів, сумарний час БД і повтори однакового SQL (ознака N+1),
+додає заголовок ``Server-Timing`` і пише структуровані рядки в логер ``myapp``.
+Пороги задаються в ``settings.QUERY_INSTRUMENTATION`` окремо для імен URL
+(``company_list``) або шаблонів (``settings_*``).
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_THRESHOLDS = {
+    "slow_request_ms": 1000,
+    "slow_db_ms": 300,
+    "max_queries": 50,
+    "duplicate_queries": 10,
+}
+
+
+class QueryStats:
+    """Обгортка для ``connection.execute_wrapper``, що накопичує статистику."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.duration = 0.0
+        self.statements: Counter[str] = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.statements[sql] += 1
+
+    @property
+    def duration_ms(self) -> float:
+        return self.duration * 1000
+
+    def most_duplicated(self) -> tuple[str, int]:
+        """Найчастіший SQL (з різними параметрами) і кількість його повторів."""
+        if not self.statements:
+            return "", 0
+        return self.statements.most_common(1)[0]
+
+
+def get_thresholds(url_name: str | None) -> dict:
+    """Пороги для імені URL: точний збіг, потім шаблон, потім 'default'."""
+    config = getattr(settings, "QUERY_INSTRUMENTATION", {}).get("THRESHOLDS", {})
+    thresholds = {**DEFAULT_THRESHOLDS, **config.get("default", {})}
+    if url_name:
+        if url_name in config:
+            return {**thresholds, **config[url_name]}
+        for pattern, values in config.items():
+            if pattern != "default" and fnmatch.fnmatchcase(url_name, pattern):
+                return {**thresholds, **values}
+    return thresholds
+
+
+class QueryInstrumentationMiddleware:
+    """Вимірює SQL-запити запиту і повідомляє про перевищення порогів."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        config = getattr(settings, "QUERY_INSTRUMENTATION", {})
+        self.enabled = config.get("ENABLED", True)
+        self.server_timing = config.get("SERVER_TIMING", True)
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if not self.enabled:
+            return self.get_response(request)
+
+        stats = QueryStats()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(stats))
+            response = self.get_response(request)
+        total_ms = (time.perf_counter() - start) * 1000
+
+        if self.server_timing:
+            response["Server-Timing"] = (
+                f'db;dur={stats.duration_ms:.1f};desc="{stats.count} queries", '
+                f"app;dur={total_ms:.1f}"
+            )
+
+        self._log(request, response, stats, total_ms)
+        return response
+
+    def _log(self, request: HttpRequest, response: HttpResponse, stats: QueryStats, total_ms: float) -> None:
+        match = getattr(request, "resolver_match", None)
+        url_name = match.url_name if match else None
+        thresholds = get_thresholds(url_name)
+        duplicated_sql, duplicates = stats.most_duplicated()
+
+        problems = []
+        if total_ms >= thresholds["slow_request_ms"]:
+            problems.append("slow_request")
+        if stats.duration_ms >= thresholds["slow_db_ms"]:
+            problems.append("slow_db")
+        if stats.count > thresholds["max_queries"]:
+            problems.append("too_many_queries")
+        if duplicates >= thresholds["duplicate_queries"]:
+            problems.append("n_plus_one")
+
+        if not problems and not logger.isEnabledFor(logging.DEBUG):
+            return
+
+        data = {
+            "method": request.method,
+            "path": request.path,
+            "view": url_name or "",
+            "status": response.status_code,
+            "queries": stats.count,
+            "db_ms": round(stats.duration_ms, 1),
+            "total_ms": round(total_ms, 1),
+            "duplicates": duplicates,
+            "problems": ",".join(problems),
+        }
+        message = " ".join(f"{key}={value}" for key, value in data.items())
+        if "n_plus_one" in problems:
+            message += f" duplicated_sql={duplicated_sql[:200]!r}"
+        logger.log(
+            logging.WARNING if problems else logging.DEBUG,
+            "request_db_stats %s",
+            message,
+            extra={"db_stats": data},
+        )
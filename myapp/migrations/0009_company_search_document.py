@@ -0,0 +1,196 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:46
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Копії з myapp.search на момент міграції: міграція не повинна залежати від
+# коду застосунку, який згодом зміниться.
+FTS_TABLE = "myapp_companysearch_fts"
+PHONE_SUFFIX_MIN_LENGTH = 4
+PHONE_SUFFIX_PREFIX = "tel"
+
+_TOKEN_RE = re.compile(r"[^\W_]+")
+
+
+def tokenize(text):
+    if not text:
+        return []
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _phone_tokens(number):
+    digits = re.sub(r"\D", "", number or "")
+    if not digits:
+        return []
+    suffixes = [
+        f"{PHONE_SUFFIX_PREFIX}{digits[i:]}"
+        for i in range(1, len(digits) - PHONE_SUFFIX_MIN_LENGTH + 1)
+    ]
+    return [digits, *suffixes]
+
+
+def build_document(company, phones, addresses):
+    tokens = []
+    for value in (
+        company.name,
+        company.short_comment,
+        company.keywords,
+        company.instagram,
+        company.telegram,
+        company.website,
+    ):
+        tokens.extend(tokenize(value))
+
+    client_digits = re.sub(r"\D", "", company.client_id or "")
+    if client_digits:
+        tokens.append(client_digits)
+        if client_digits.lstrip("0"):
+            tokens.append(client_digits.lstrip("0"))
+
+    if company.city_id:
+        tokens.extend(tokenize(company.city.name))
+    if company.category_id:
+        tokens.extend(tokenize(company.category.name))
+
+    for phone in phones:
+        tokens.extend(_phone_tokens(phone.number))
+        tokens.extend(tokenize(phone.contact_name))
+
+    for address in addresses:
+        tokens.extend(tokenize(address.address))
+
+    return " ".join(dict.fromkeys(tokens))
+
+
+POSTGRES_FORWARD = [
+    """
+    ALTER TABLE myapp_companysearchdocument
+    ADD COLUMN search_vector tsvector
+    GENERATED ALWAYS AS (to_tsvector('simple', document)) STORED
+    """,
+    """
+    CREATE INDEX myapp_companysearch_vector_gin
+    ON myapp_companysearchdocument USING gin (search_vector)
+    """,
+]
+
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS myapp_companysearch_vector_gin",
+    "ALTER TABLE myapp_companysearchdocument DROP COLUMN IF EXISTS search_vector",
+]
+
+# External content FTS5: тексти лежать у myapp_companysearchdocument,
+# індекс синхронізується тригерами.
+SQLITE_FORWARD = [
+    f"""
+    CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        document,
+        content='myapp_companysearchdocument',
+        content_rowid='company_id'
+    )
+    """,
+    f"""
+    CREATE TRIGGER myapp_companysearch_ai AFTER INSERT ON myapp_companysearchdocument BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, document) VALUES (new.company_id, new.document);
+    END
+    """,
+    f"""
+    CREATE TRIGGER myapp_companysearch_ad AFTER DELETE ON myapp_companysearchdocument BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, document) VALUES ('delete', old.company_id, old.document);
+    END
+    """,
+    f"""
+    CREATE TRIGGER myapp_companysearch_au AFTER UPDATE ON myapp_companysearchdocument BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, document) VALUES ('delete', old.company_id, old.document);
+        INSERT INTO {FTS_TABLE}(rowid, document) VALUES (new.company_id, new.document);
+    END
+    """,
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS myapp_companysearch_ai",
+    "DROP TRIGGER IF EXISTS myapp_companysearch_ad",
+    "DROP TRIGGER IF EXISTS myapp_companysearch_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+
+def create_search_index(apps, schema_editor):
+    """Створює tsvector/GIN (PostgreSQL) або FTS5-таблицю (SQLite)."""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        statements = POSTGRES_FORWARD
+    elif vendor == 'sqlite':
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+            if not cursor.fetchone()[0]:
+                # Без FTS5 пошук працює через запасний icontains-фільтр
+                return
+        statements = SQLITE_FORWARD
+    else:
+        return
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    """Зворотна операція."""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        statements = POSTGRES_BACKWARD
+    elif vendor == 'sqlite':
+        statements = SQLITE_BACKWARD
+    else:
+        return
+    for statement in statements:
+        schema_editor.execute(statement)
+
+
+def populate_search_documents(apps, schema_editor):
+    """Будує пошукові документи для всіх існуючих компаній."""
+    Company = apps.get_model('myapp', 'Company')
+    CompanySearchDocument = apps.get_model('myapp', 'CompanySearchDocument')
+
+    companies = (
+        Company.objects.select_related('city', 'category')
+        .prefetch_related('phones', 'addresses')
+        .order_by('id')
+    )
+    batch = []
+    for company in companies.iterator(chunk_size=500):
+        batch.append(CompanySearchDocument(
+            company=company,
+            document=build_document(company, company.phones.all(), company.addresses.all()),
+        ))
+        if len(batch) >= 500:
+            CompanySearchDocument.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        CompanySearchDocument.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0008_set_first_superadmin'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompanySearchDocument',
+            fields=[
+                ('company', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='myapp.company')),
+                ('document', models.TextField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Company search document',
+                'verbose_name_plural': 'Company search documents',
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(populate_search_documents, migrations.RunPython.noop),
+    ]
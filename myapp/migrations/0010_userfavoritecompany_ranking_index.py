@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0009_company_search_document'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='userfavoritecompany',
+            index=models.Index(fields=['user', 'company', 'created_at'], name='myapp_fav_user_company_created'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0010_userfavoritecompany_ranking_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='company',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, db_index=True),
+        ),
+    ]
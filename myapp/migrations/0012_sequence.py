@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:10
+
+import re
+
+from django.db import migrations, models
+
+
+CLIENT_ID_SEQUENCE = "company_client_id"
+POSTGRES_SEQUENCE = "myapp_company_client_id_seq"
+
+
+def _used_max(Company) -> int:
+    numbers = [0]
+    for client_id in Company.objects.exclude(client_id="").values_list("client_id", flat=True).iterator():
+        match = re.match(r"^#(\d+)$", client_id)
+        if match:
+            numbers.append(int(match.group(1)))
+    last_id = Company.objects.order_by("-id").values_list("id", flat=True).first() or 0
+    return max(max(numbers), last_id)
+
+
+def create_client_id_sequence(apps, schema_editor):
+    Company = apps.get_model("myapp", "Company")
+    Sequence = apps.get_model("myapp", "Sequence")
+    start = _used_max(Company)
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(f"CREATE SEQUENCE IF NOT EXISTS {POSTGRES_SEQUENCE} START WITH {start + 1}")
+    else:
+        Sequence.objects.update_or_create(name=CLIENT_ID_SEQUENCE, defaults={"value": start})
+
+
+def drop_client_id_sequence(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(f"DROP SEQUENCE IF EXISTS {POSTGRES_SEQUENCE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0011_company_created_at_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Sequence',
+            fields=[
+                ('name', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Sequence',
+                'verbose_name_plural': 'Sequences',
+            },
+        ),
+        migrations.RunPython(create_client_id_sequence, drop_client_id_sequence),
+    ]
@@ -0,0 +1,124 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:03
+
+import re
+from urllib.parse import urlsplit
+
+from django.db import migrations, models
+
+
+BATCH_SIZE = 1000
+
+# Копії з myapp.normalization на момент міграції: міграція не повинна залежати
+# від коду застосунку, який згодом зміниться.
+DEFAULT_COUNTRY_CODE = "38"
+INSTAGRAM_HOSTS = ("instagram.com", "instagr.am")
+TELEGRAM_HOSTS = ("t.me", "telegram.me", "telegram.dog")
+
+_NON_DIGITS_RE = re.compile(r"\D")
+_HANDLE_RE = re.compile(r"[^\w.]")
+
+
+def phone_key(phone):
+    digits = _NON_DIGITS_RE.sub("", phone or "")
+    if digits.startswith("00"):
+        digits = digits[2:]
+    if len(digits) == 10 and digits.startswith("0"):
+        digits = DEFAULT_COUNTRY_CODE + digits
+    return digits
+
+
+def _split_url(value):
+    value = value.strip()
+    if "://" not in value:
+        value = f"//{value}"
+    try:
+        return urlsplit(value)
+    except ValueError:
+        return None
+
+
+def website_key(url):
+    if not url or not url.strip():
+        return ""
+    parts = _split_url(url.lower())
+    if parts is None:
+        return url.strip().lower()
+    host = (parts.hostname or "").removeprefix("www.")
+    path = parts.path.rstrip("/")
+    return f"{host}{path}"
+
+
+def _handle_key(value, hosts):
+    value = (value or "").strip().lower()
+    if not value:
+        return ""
+    parts = _split_url(value) if "/" in value else None
+    if parts is not None and (parts.hostname or "").removeprefix("www.") in hosts:
+        value = parts.path.strip("/").split("/", 1)[0]
+    return _HANDLE_RE.sub("", value.lstrip("@"))
+
+
+def instagram_key(value):
+    return _handle_key(value, INSTAGRAM_HOSTS)
+
+
+def telegram_key(value):
+    return _handle_key(value, TELEGRAM_HOSTS)
+
+
+def populate_contact_keys(apps, schema_editor):
+    Company = apps.get_model("myapp", "Company")
+    CompanyPhone = apps.get_model("myapp", "CompanyPhone")
+
+    batch = []
+    for company in Company.objects.only("id", "website", "instagram", "telegram").iterator(chunk_size=BATCH_SIZE):
+        company.website_key = website_key(company.website)
+        company.instagram_key = instagram_key(company.instagram)
+        company.telegram_key = telegram_key(company.telegram)
+        batch.append(company)
+        if len(batch) >= BATCH_SIZE:
+            Company.objects.bulk_update(batch, ["website_key", "instagram_key", "telegram_key"])
+            batch = []
+    if batch:
+        Company.objects.bulk_update(batch, ["website_key", "instagram_key", "telegram_key"])
+
+    batch = []
+    for phone in CompanyPhone.objects.only("id", "number").iterator(chunk_size=BATCH_SIZE):
+        phone.number_key = phone_key(phone.number)
+        batch.append(phone)
+        if len(batch) >= BATCH_SIZE:
+            CompanyPhone.objects.bulk_update(batch, ["number_key"])
+            batch = []
+    if batch:
+        CompanyPhone.objects.bulk_update(batch, ["number_key"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0013_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='company',
+            name='instagram_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='company',
+            name='telegram_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='company',
+            name='website_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='companyphone',
+            name='number_key',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=32),
+        ),
+        migrations.RunPython(populate_contact_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0014_contact_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DuplicateScan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('started_at', models.DateTimeField()),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('full', models.BooleanField(default=False, help_text='Повний перерахунок, а не лише змінені компанії')),
+                ('processed', models.PositiveIntegerField(default=0)),
+                ('links', models.PositiveIntegerField(default=0, help_text='Кількість пар-кандидатів після проходу')),
+            ],
+            options={
+                'verbose_name': 'Duplicate scan',
+                'verbose_name_plural': 'Duplicate scans',
+                'ordering': ('-started_at',),
+            },
+        ),
+        migrations.CreateModel(
+            name='DuplicateKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('phone', 'Телефон'), ('domain', 'Сайт'), ('instagram', 'Instagram'), ('telegram', 'Telegram'), ('name', 'Название')], max_length=16)),
+                ('value', models.CharField(max_length=255)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='duplicate_keys', to='myapp.company')),
+            ],
+            options={
+                'verbose_name': 'Duplicate key',
+                'verbose_name_plural': 'Duplicate keys',
+                'indexes': [models.Index(fields=['kind', 'value'], name='myapp_dupkey_kind_value')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DuplicateLink',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reasons', models.JSONField(default=list, help_text='Види ключів, за якими збіглися компанії')),
+                ('score', models.FloatField(default=0)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='myapp.company')),
+                ('duplicate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='myapp.company')),
+            ],
+            options={
+                'verbose_name': 'Duplicate link',
+                'verbose_name_plural': 'Duplicate links',
+                'constraints': [models.UniqueConstraint(fields=('company', 'duplicate'), name='myapp_duplink_unique_pair')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0015_duplicates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='company',
+            name='logo_renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False, help_text='WebP-копії логотипу: назва -> шлях у сховищі (див. myapp.images)'),
+        ),
+        migrations.AlterField(
+            model_name='company',
+            name='photos',
+            field=models.JSONField(blank=True, default=list, help_text='Фотографії компанії (JSON array): опис з myapp.images.save_image або URL старих записів'),
+        ),
+    ]
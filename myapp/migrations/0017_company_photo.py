@@ -0,0 +1,96 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:11
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+BATCH_SIZE = 1000
+
+
+def _photo_row(CompanyPhoto, company_id, position, photo):
+    # Записи списку: опис з myapp.images.save_image або (старі) URL файлу
+    if isinstance(photo, dict):
+        return CompanyPhoto(
+            company_id=company_id,
+            position=position,
+            file=photo["path"],
+            renditions=photo.get("renditions") or {},
+            width=photo.get("width"),
+            height=photo.get("height"),
+            size=photo.get("size"),
+        )
+    if photo.startswith(settings.MEDIA_URL):
+        photo = photo[len(settings.MEDIA_URL):]
+    return CompanyPhoto(company_id=company_id, position=position, file=photo)
+
+
+def photos_to_rows(apps, schema_editor):
+    Company = apps.get_model("myapp", "Company")
+    CompanyPhoto = apps.get_model("myapp", "CompanyPhoto")
+
+    rows = []
+    # values_list читає саме JSON-колонку (зворотний зв'язок CompanyPhoto має ту саму назву)
+    for company_id, photos in Company.objects.exclude(photos=[]).values_list("id", "photos").iterator(chunk_size=BATCH_SIZE):
+        rows.extend(
+            _photo_row(CompanyPhoto, company_id, position, photo)
+            for position, photo in enumerate(photos or [])
+            if photo
+        )
+        if len(rows) >= BATCH_SIZE:
+            CompanyPhoto.objects.bulk_create(rows)
+            rows = []
+    if rows:
+        CompanyPhoto.objects.bulk_create(rows)
+
+
+def rows_to_photos(apps, schema_editor):
+    Company = apps.get_model("myapp", "Company")
+    CompanyPhoto = apps.get_model("myapp", "CompanyPhoto")
+
+    photos = {}
+    for photo in CompanyPhoto.objects.order_by("company_id", "position", "id").iterator(chunk_size=BATCH_SIZE):
+        photos.setdefault(photo.company_id, []).append({
+            "path": photo.file.name,
+            "renditions": photo.renditions,
+            "width": photo.width,
+            "height": photo.height,
+            "size": photo.size,
+        })
+    for company_id, company_photos in photos.items():
+        Company.objects.filter(pk=company_id).update(photos=company_photos)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0016_company_logo_renditions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompanyPhoto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.FileField(help_text="Оригінал у сховищі (ім'я — хеш вмісту)", max_length=255, upload_to='')),
+                ('renditions', models.JSONField(blank=True, default=dict, help_text='Назва копії -> шлях у сховищі')),
+                ('position', models.PositiveIntegerField(default=0)),
+                ('width', models.PositiveIntegerField(blank=True, null=True)),
+                ('height', models.PositiveIntegerField(blank=True, null=True)),
+                ('size', models.PositiveBigIntegerField(blank=True, help_text='Розмір оригіналу, байт', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='photos', to='myapp.company')),
+            ],
+            options={
+                'verbose_name': 'Company photo',
+                'verbose_name_plural': 'Company photos',
+                'ordering': ('position', 'id'),
+                'indexes': [models.Index(fields=['company', 'position'], name='myapp_companyphoto_position')],
+            },
+        ),
+        migrations.RunPython(photos_to_rows, rows_to_photos),
+        migrations.RemoveField(
+            model_name='company',
+            name='photos',
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0017_company_photo'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='company',
+            index=models.Index(fields=['-updated_at', '-id'], name='myapp_company_updated'),
+        ),
+        migrations.AddIndex(
+            model_name='company',
+            index=models.Index(fields=['city', '-updated_at', '-id'], name='myapp_company_city_updated'),
+        ),
+        migrations.AddIndex(
+            model_name='company',
+            index=models.Index(fields=['status', '-updated_at', '-id'], name='myapp_company_status_updated'),
+        ),
+        migrations.AddIndex(
+            model_name='company',
+            index=models.Index(condition=models.Q(('call_date__isnull', False)), fields=['call_date'], name='myapp_company_call_date'),
+        ),
+    ]
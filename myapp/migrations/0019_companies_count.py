@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:22
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+# Довідник -> поле Company
+COUNTED = {"city": "city_id", "category": "category_id", "status": "status_id"}
+
+
+def populate_companies_count(apps, schema_editor):
+    Company = apps.get_model("myapp", "Company")
+    for model_name, field in COUNTED.items():
+        companies = (
+            Company.objects.filter(**{field: OuterRef("pk")})
+            .order_by()
+            .values(field)
+            .annotate(total=Count("id"))
+            .values("total")
+        )
+        apps.get_model("myapp", model_name).objects.update(companies_count=Coalesce(Subquery(companies), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0018_company_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='companies_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='city',
+            name='companies_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='status',
+            name='companies_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_companies_count, migrations.RunPython.noop),
+    ]
@@ -2,6 +2,7 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from django.utils.functional import cached_property
 
 
 class Country(models.Model):
@@ -20,7 +21,27 @@ class Country(models.Model):
         return self.name
 
 
-class City(models.Model):
+class CompaniesCountMixin(models.Model):
+    """Довідник з денормалізованою кількістю компаній (підтримує myapp.stats)."""
+
+    companies_count: int = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        # Лічильник змінюють лише атомарні UPDATE з F(): збереження довідника
+        # не повинно записати назад значення, прочитане раніше
+        if not self._state.adding and kwargs.get("update_fields") is None and not kwargs.get("force_insert"):
+            kwargs["update_fields"] = [
+                field.name
+                for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != "companies_count"
+            ]
+        super().save(*args, **kwargs)
+
+
+class City(CompaniesCountMixin):
     """Довідник міст."""
 
     name: str = models.CharField(max_length=100)
@@ -40,7 +61,7 @@ class City(models.Model):
         return f"{self.name} ({self.country.code})"
 
 
-class Category(models.Model):
+class Category(CompaniesCountMixin):
     """Розділ/категорія компанії з кольором бейджа."""
 
     name: str = models.CharField(max_length=100, unique=True)
@@ -69,7 +90,7 @@ class Category(models.Model):
         return self.name
 
 
-class Status(models.Model):
+class Status(CompaniesCountMixin):
     """Статус компанії з кольором/класом бейджа."""
 
     name: str = models.CharField(max_length=100, unique=True)
@@ -148,33 +169,91 @@ class Company(models.Model):
         help_text="Логотип компанії"
     )
 
-    photos = models.JSONField(
-        default=list,
+    logo_renditions = models.JSONField(
+        default=dict,
         blank=True,
-        help_text="Список URL фотографій компанії (JSON array)"
+        editable=False,
+        help_text="WebP-копії логотипу: назва -> шлях у сховищі (див. myapp.images)"
     )
 
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Нормалізовані ключі для пошуку дублікатів (див. myapp.normalization), оновлюються в save()
+    website_key: str = models.CharField(max_length=255, blank=True, db_index=True, editable=False)
+    instagram_key: str = models.CharField(max_length=255, blank=True, db_index=True, editable=False)
+    telegram_key: str = models.CharField(max_length=255, blank=True, db_index=True, editable=False)
+
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name = "Company"
         verbose_name_plural = "Companies"
         ordering = ("name",)
+        indexes = [
+            # Список компаній і API сортують за -updated_at, -id (див. myapp.filters.favorites_first);
+            # з фільтром міста чи статусу береться відрізок індексу вже в потрібному порядку
+            models.Index(fields=['-updated_at', '-id'], name='myapp_company_updated'),
+            models.Index(fields=['city', '-updated_at', '-id'], name='myapp_company_city_updated'),
+            models.Index(fields=['status', '-updated_at', '-id'], name='myapp_company_status_updated'),
+            # Дата дзвінка задана в меншості компаній — частковий індекс лише по них
+            models.Index(
+                fields=['call_date'],
+                condition=models.Q(call_date__isnull=False),
+                name='myapp_company_call_date',
+            ),
+        ]
 
     def __str__(self) -> str:  # pragma: no cover
         return self.name
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """Запам'ятовує завантажені значення FK, щоб лічильники (myapp.stats) бачили зміни."""
+        instance = super().from_db(db, field_names, values)
+        instance._original_refs = {
+            name: instance.__dict__[name]
+            for name in ("city_id", "status_id", "category_id")
+            if name in instance.__dict__
+        }
+        return instance
+
+    @property
+    def logo_image(self):
+        """Логотип з URL копій для ``srcset`` (None, якщо логотипу немає)."""
+        from .images import StoredImage
+
+        if not self.logo:
+            return None
+        return StoredImage.from_paths(self.logo.name, self.logo_renditions)
+
+    def update_keys(self, fields=None) -> None:
+        """Перераховує ключі дублікатів (викликати перед bulk_create/bulk_update).
+
+        ``fields`` — поля-джерела, ключі яких треба перерахувати (усі, якщо не вказано).
+        """
+        from .normalization import COMPANY_CONTACT_KEYS
+
+        for field_name, make_key in COMPANY_CONTACT_KEYS.items():
+            if fields is None or field_name in fields:
+                setattr(self, f"{field_name}_key", make_key(getattr(self, field_name)))
+
     def save(self, *args, **kwargs) -> None:
-        """Генерує client_id, якщо він не заданий."""
-        if not self.client_id:
-            last_id = (
-                Company.objects.order_by("-id")
-                .values_list("id", flat=True)
-                .first()
-            )
-            next_number = (last_id or 0) + 1
-            self.client_id = f"#{next_number:05d}"
+        """Генерує client_id, якщо він не заданий, і оновлює ключі полів, що зберігаються."""
+        from .normalization import COMPANY_CONTACT_KEYS
+
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None:
+            # Без update_fields Django зберігає всі завантажені поля; відкладені не читаємо
+            saved = {field.attname for field in self._meta.concrete_fields} - self.get_deferred_fields()
+        else:
+            saved = set(update_fields)
+        if "client_id" in saved and not self.client_id:
+            from .sequences import next_client_id
+
+            self.client_id = next_client_id()
+        sources = [name for name in COMPANY_CONTACT_KEYS if name in saved]
+        self.update_keys(sources)
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, *(f"{name}_key" for name in sources)}
         super().save(*args, **kwargs)
 
     @property
@@ -219,11 +298,15 @@ class Company(models.Model):
 
     @property
     def favorite_phone(self):
-        """Повертає улюблений телефон або перший телефон, якщо улюбленого немає."""
-        favorite = self.phones.filter(is_favorite=True).first()
-        if favorite:
-            return favorite
-        return self.phones.first()
+        """Повертає улюблений телефон або перший телефон, якщо улюбленого немає.
+
+        Якщо телефони завантажені через prefetch_related('phones'), запитів до БД немає.
+        """
+        prefetched = getattr(self, '_prefetched_objects_cache', {}).get('phones')
+        if prefetched is not None:
+            phones = sorted(prefetched, key=lambda phone: phone.pk)
+            return next((phone for phone in phones if phone.is_favorite), phones[0] if phones else None)
+        return self.phones.order_by('-is_favorite', 'id').first()
 
 
 class CompanyPhone(models.Model):
@@ -235,6 +318,8 @@ class CompanyPhone(models.Model):
         related_name="phones",
     )
     number: str = models.CharField(max_length=32)
+    # Номер у форматі E.164 без '+' для пошуку дублікатів, оновлюється в save()
+    number_key: str = models.CharField(max_length=32, blank=True, db_index=True, editable=False)
     contact_name: str = models.CharField(max_length=255, blank=True)
     is_favorite: bool = models.BooleanField(default=False)
 
@@ -245,6 +330,19 @@ class CompanyPhone(models.Model):
     def __str__(self) -> str:  # pragma: no cover
         return f"{self.number} ({self.company.name})"
 
+    def update_keys(self) -> None:
+        """Перераховує ключ номера (викликати перед bulk_create/bulk_update)."""
+        from .normalization import phone_key
+
+        self.number_key = phone_key(self.number)
+
+    def save(self, *args, **kwargs) -> None:
+        self.update_keys()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "number" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "number_key"}
+        super().save(*args, **kwargs)
+
 
 class CompanyComment(models.Model):
     """Коментар до компанії (історія взаємодій)."""
@@ -286,6 +384,104 @@ class CompanyAddress(models.Model):
         return f"{self.address} ({self.company.name})"
 
 
+class CompanyPhoto(models.Model):
+    """Фотографія компанії з WebP-копіями (див. myapp.images)."""
+
+    company = models.ForeignKey(
+        Company,
+        on_delete=models.CASCADE,
+        related_name="photos"
+    )
+    file = models.FileField(max_length=255, help_text="Оригінал у сховищі (ім'я — хеш вмісту)")
+    renditions = models.JSONField(default=dict, blank=True, help_text="Назва копії -> шлях у сховищі")
+    position = models.PositiveIntegerField(default=0)
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    size = models.PositiveBigIntegerField(null=True, blank=True, help_text="Розмір оригіналу, байт")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "Company photo"
+        verbose_name_plural = "Company photos"
+        ordering = ('position', 'id')
+        indexes = [
+            models.Index(fields=['company', 'position'], name='myapp_companyphoto_position'),
+        ]
+
+    def __str__(self) -> str:  # pragma: no cover
+        return self.file.name
+
+    @cached_property
+    def image(self):
+        """Оригінал і копії з URL для шаблонів (``url``, ``thumb_url``, ``srcset``...)."""
+        from .images import StoredImage
+
+        return StoredImage.from_paths(self.file.name, self.renditions)
+
+    @property
+    def url(self) -> str:
+        return self.image.url
+
+    @property
+    def thumb_url(self) -> str:
+        return self.image.thumb_url
+
+    @property
+    def preview_url(self) -> str:
+        return self.image.preview_url
+
+    @property
+    def srcset(self) -> str:
+        return self.image.srcset
+
+    @property
+    def paths(self) -> list[str]:
+        """Усі файли фото у сховищі (оригінал і копії)."""
+        return [self.file.name, *self.renditions.values()]
+
+
+class CompanySearchDocument(models.Model):
+    """Денормалізований пошуковий документ компанії (див. myapp.search).
+
+    На PostgreSQL таблиця має додаткову генеровану колонку ``search_vector``
+    з GIN-індексом, на SQLite її дзеркалить FTS5-таблиця. Обидві створюються
+    міграцією 0009 і не описані в моделі.
+    """
+
+    company = models.OneToOneField(
+        Company,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="search_document",
+    )
+    document = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Company search document"
+        verbose_name_plural = "Company search documents"
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"Search document #{self.company_id}"
+
+
+class Sequence(models.Model):
+    """Лічильник для БД без нативних послідовностей (див. myapp.sequences).
+
+    На PostgreSQL замість рядка цієї таблиці використовується SEQUENCE.
+    """
+
+    name: str = models.CharField(max_length=64, primary_key=True)
+    value: int = models.BigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Sequence"
+        verbose_name_plural = "Sequences"
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"{self.name} = {self.value}"
+
+
 class UserProfile(models.Model):
     """Профіль користувача з роллю, країною та аватаром."""
     
@@ -394,7 +590,144 @@ class UserFavoriteCompany(models.Model):
         verbose_name_plural = "User Favorite Companies"
         unique_together = ('user', 'company')
         ordering = ('-created_at',)
+        indexes = [
+            # Покриває LEFT JOIN для сортування списку компаній за обраними
+            models.Index(fields=['user', 'company', 'created_at'], name='myapp_fav_user_company_created'),
+        ]
     
     def __str__(self) -> str:  # pragma: no cover
         return f"{self.user.username} → {self.company.name}"
 
+
+class Job(models.Model):
+    """Фонова задача (експорт, імпорт тощо), яку виконує команда run_jobs."""
+
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'В очереди'),
+        (STATUS_RUNNING, 'Выполняется'),
+        (STATUS_DONE, 'Готово'),
+        (STATUS_FAILED, 'Ошибка'),
+    ]
+
+    kind = models.CharField(max_length=64, help_text="Тип задачі (див. myapp.jobs.HANDLERS)")
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    params = models.JSONField(default=dict, blank=True)
+    result = models.JSONField(default=dict, blank=True)
+    error = models.TextField(blank=True)
+
+    progress = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(null=True, blank=True)
+
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='jobs'
+    )
+    worker = models.CharField(max_length=128, blank=True, help_text="Воркер, що виконує задачу")
+    attempts = models.PositiveSmallIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Job"
+        verbose_name_plural = "Jobs"
+        ordering = ('-created_at',)
+        indexes = [
+            # Вибір наступної задачі воркером
+            models.Index(fields=['status', 'created_at'], name='myapp_job_status_created'),
+        ]
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"{self.kind} #{self.pk} ({self.status})"
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (self.STATUS_DONE, self.STATUS_FAILED)
+
+    @property
+    def percent(self) -> int:
+        """Відсоток виконання для індикатора прогресу."""
+        if self.status == self.STATUS_DONE:
+            return 100
+        if not self.total:
+            return 0
+        return min(100, self.progress * 100 // self.total)
+
+
+class DuplicateScan(models.Model):
+    """Прохід пошуку дублікатів (див. myapp.duplicates); останній задає межу інкрементального запуску."""
+
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField(null=True, blank=True)
+    full = models.BooleanField(default=False, help_text="Повний перерахунок, а не лише змінені компанії")
+    processed = models.PositiveIntegerField(default=0)
+    links = models.PositiveIntegerField(default=0, help_text="Кількість пар-кандидатів після проходу")
+
+    class Meta:
+        verbose_name = "Duplicate scan"
+        verbose_name_plural = "Duplicate scans"
+        ordering = ('-started_at',)
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"Duplicate scan {self.started_at:%Y-%m-%d %H:%M}"
+
+
+class DuplicateKey(models.Model):
+    """Ключ блокування компанії: компанії з однаковим ключем порівнюються між собою."""
+
+    KIND_PHONE = 'phone'
+    KIND_DOMAIN = 'domain'
+    KIND_INSTAGRAM = 'instagram'
+    KIND_TELEGRAM = 'telegram'
+    KIND_NAME = 'name'
+
+    KIND_CHOICES = [
+        (KIND_PHONE, 'Телефон'),
+        (KIND_DOMAIN, 'Сайт'),
+        (KIND_INSTAGRAM, 'Instagram'),
+        (KIND_TELEGRAM, 'Telegram'),
+        (KIND_NAME, 'Название'),
+    ]
+
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='duplicate_keys')
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    value = models.CharField(max_length=255)
+
+    class Meta:
+        verbose_name = "Duplicate key"
+        verbose_name_plural = "Duplicate keys"
+        indexes = [
+            models.Index(fields=['kind', 'value'], name='myapp_dupkey_kind_value'),
+        ]
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"{self.kind}: {self.value}"
+
+
+class DuplicateLink(models.Model):
+    """Пара ймовірних дублікатів (``company_id < duplicate_id``)."""
+
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='+')
+    duplicate = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='+')
+    reasons = models.JSONField(default=list, help_text="Види ключів, за якими збіглися компанії")
+    score = models.FloatField(default=0)
+
+    class Meta:
+        verbose_name = "Duplicate link"
+        verbose_name_plural = "Duplicate links"
+        constraints = [
+            models.UniqueConstraint(fields=['company', 'duplicate'], name='myapp_duplink_unique_pair'),
+        ]
+
+    def __str__(self) -> str:  # pragma: no cover
+        return f"{self.company_id} ~ {self.duplicate_id} ({', '.join(self.reasons)})"
@@ -0,0 +1,91 @@
+"""
+Нормалізація контактних даних компаній.
+
+``*_key`` функції будують ключі для пошуку дублікатів (колонки ``number_key``,
+``website_key``, ``instagram_key``, ``telegram_key``): різні записи одного
+контакту дають однаковий ключ, порожнє значення — порожній ключ.
+"""
+
+from __future__ import annotations
+
+import re
+from urllib.parse import urlsplit
+
+
+# Код країни для локальних номерів (0XX XXX XX XX)
+DEFAULT_COUNTRY_CODE = "38"
+
+_NON_DIGITS_RE = re.compile(r"\D")
+_HANDLE_RE = re.compile(r"[^\w.]")
+
+# Домени, з URL яких береться ім'я акаунта
+INSTAGRAM_HOSTS = ("instagram.com", "instagr.am")
+TELEGRAM_HOSTS = ("t.me", "telegram.me", "telegram.dog")
+
+
+def normalize_phone_number(phone: str) -> str:
+    """Нормалізує телефонний номер: видаляє пробіли, дефіси, дужки."""
+    if not phone:
+        return phone
+    return phone.replace(' ', '').replace('-', '').replace('(', '').replace(')', '')
+
+
+def phone_key(phone: str | None) -> str:
+    """Номер у вигляді цифр E.164 без '+': '+38 (067) 123-45-67', '0671234567' -> '380671234567'."""
+    digits = _NON_DIGITS_RE.sub("", phone or "")
+    if digits.startswith("00"):
+        digits = digits[2:]
+    if len(digits) == 10 and digits.startswith("0"):
+        digits = DEFAULT_COUNTRY_CODE + digits
+    return digits
+
+
+def _split_url(value: str):
+    """Частини URL або None, якщо рядок не розбирається як URL ('http://[shop')."""
+    value = value.strip()
+    if "://" not in value:
+        value = f"//{value}"
+    try:
+        return urlsplit(value)
+    except ValueError:
+        return None
+
+
+def website_key(url: str | None) -> str:
+    """Хост без 'www.' і шлях без кінцевого '/': 'https://www.X.com/shop/' -> 'x.com/shop'."""
+    if not url or not url.strip():
+        return ""
+    parts = _split_url(url.lower())
+    if parts is None:
+        return url.strip().lower()
+    host = (parts.hostname or "").removeprefix("www.")
+    path = parts.path.rstrip("/")
+    return f"{host}{path}"
+
+
+def _handle_key(value: str | None, hosts: tuple[str, ...]) -> str:
+    value = (value or "").strip().lower()
+    if not value:
+        return ""
+    parts = _split_url(value) if "/" in value else None
+    if parts is not None and (parts.hostname or "").removeprefix("www.") in hosts:
+        value = parts.path.strip("/").split("/", 1)[0]
+    return _HANDLE_RE.sub("", value.lstrip("@"))
+
+
+def instagram_key(value: str | None) -> str:
+    """Ім'я акаунта Instagram: '@Shop', 'https://instagram.com/shop/' -> 'shop'."""
+    return _handle_key(value, INSTAGRAM_HOSTS)
+
+
+def telegram_key(value: str | None) -> str:
+    """Ім'я акаунта Telegram: '@Shop', 't.me/shop' -> 'shop'."""
+    return _handle_key(value, TELEGRAM_HOSTS)
+
+
+# Поле Company -> функція ключа (колонка ``<поле>_key``)
+COMPANY_CONTACT_KEYS = {
+    "website": website_key,
+    "instagram": instagram_key,
+    "telegram": telegram_key,
+}
@@ -0,0 +1,131 @@
+"""
+Кеш сторінок списку компаній.
+
+Під ключем лежать лише id компаній сторінки (у порядку сортування), курсори
+сусідніх сторінок і загальна кількість; дані компаній читаються одним запитом
+``id__in``. Ключ складається з:
+
+* ``CompanyQuery.cache_key`` — нормалізовані фільтри і країна користувача;
+* версії "компанії змінилися" — її збільшують сигнали збереження/видалення
+  компаній, телефонів, адрес і довідників (див. myapp.signals), тож будь-яка
+  зміна даних робить усі збережені сторінки недосяжними;
+* користувача і версії його обраних — обрані йдуть першими, тому порядок
+  залежить від користувача;
+* курсора й розміру сторінки.
+
+Версії збільшуються після коміту транзакції; старі записи самі витісняються
+через PAGE_TIMEOUT.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import time
+from dataclasses import dataclass
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import QuerySet
+
+from .pagination import KeysetPage, KeysetPaginator, estimate_count
+from .queries import CompanyQuery
+
+
+# Час життя сторінки в кеші, с
+PAGE_TIMEOUT = 5 * 60
+
+CACHE_PREFIX = "companies:pages"
+
+_CHANGES_KEY = f"{CACHE_PREFIX}:changes:version"
+
+
+def _favorites_key(user_id: int) -> str:
+    return f"{CACHE_PREFIX}:favorites:{user_id}:version"
+
+
+def _initial_version() -> int:
+    # Унікальна початкова версія, щоб не підхопити сторінки, що залишилися після очищення кешу
+    return int(time.time() * 1000)
+
+
+def _versions(*keys: str) -> list[int]:
+    """Поточні версії ``keys`` одним зверненням до кешу (відсутні створюються)."""
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, _initial_version(), None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+def _bump(key: str) -> None:
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _initial_version(), None)
+
+
+def invalidate() -> None:
+    """Скидає всі сторінки після коміту поточної транзакції (дані компаній змінилися)."""
+    transaction.on_commit(lambda: _bump(_CHANGES_KEY))
+
+
+def invalidate_favorites(user_id: int) -> None:
+    """Скидає сторінки користувача після зміни його обраних."""
+    transaction.on_commit(lambda: _bump(_favorites_key(user_id)))
+
+
+@dataclass
+class CachedPage:
+    ids: list[int]
+    next_cursor: str | None
+    previous_cursor: str | None
+    total_count: int
+    total_is_estimate: bool
+
+
+def page_key(query: CompanyQuery, user_id: int, cursor: str | None, per_page: int) -> str:
+    changes, favorites = _versions(_CHANGES_KEY, _favorites_key(user_id))
+    position = hashlib.sha1((cursor or "").encode()).hexdigest()
+    return f"{CACHE_PREFIX}:{changes}:{user_id}:{favorites}:{query.cache_key}:{per_page}:{position}"
+
+
+def hydrate(queryset: QuerySet, ids: list[int]) -> list:
+    """Компанії ``ids`` з ``queryset`` одним запитом, у порядку ``ids``."""
+    companies = {company.pk: company for company in queryset.order_by().filter(pk__in=ids)}
+    return [companies[pk] for pk in ids if pk in companies]
+
+
+def keyset_page(
+    query: CompanyQuery,
+    user,
+    queryset: QuerySet,
+    ordering: list[str],
+    cursor: str | None,
+    per_page: int,
+) -> tuple[KeysetPage, int, bool]:
+    """Сторінка списку (з кешу або з БД), загальна кількість і чи є вона оцінкою."""
+    key = page_key(query, user.pk, cursor, per_page)
+    entry = cache.get(key)
+    if entry is not None:
+        page = KeysetPage(
+            object_list=hydrate(queryset, entry.ids),
+            next_cursor=entry.next_cursor,
+            previous_cursor=entry.previous_cursor,
+        )
+        return page, entry.total_count, entry.total_is_estimate
+
+    page = KeysetPaginator(queryset, ordering, per_page).get_page(cursor)
+    total_count, total_is_estimate = estimate_count(queryset)
+    cache.set(
+        key,
+        CachedPage(
+            ids=[company.pk for company in page],
+            next_cursor=page.next_cursor,
+            previous_cursor=page.previous_cursor,
+            total_count=total_count,
+            total_is_estimate=total_is_estimate,
+        ),
+        PAGE_TIMEOUT,
+    )
+    return page, total_count, total_is_estimate
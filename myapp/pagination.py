@@ -0,0 +1,221 @@
+"""
+Курсорна (keyset) пагінація для списку компаній.
+
+Замість OFFSET сторінка визначається значеннями полів сортування останнього
+(або першого) рядка попередньої сторінки, тому глибокі сторінки коштують
+стільки ж, скільки перша, а загальна кількість не потрібна для навігації.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Sequence
+
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q, QuerySet
+
+
+# Нижче цього порогу (за оцінкою планувальника) рахуємо точну кількість
+EXACT_COUNT_THRESHOLD = 10_000
+
+
+class InvalidCursor(ValueError):
+    """Курсор пошкоджений або не відповідає поточному сортуванню."""
+
+
+@dataclass
+class KeysetPage:
+    """Сторінка результатів курсорної пагінації."""
+
+    object_list: list
+    next_cursor: str | None = None
+    previous_cursor: str | None = None
+    extra: dict = field(default_factory=dict)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self) -> int:
+        return len(self.object_list)
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    def has_other_pages(self) -> bool:
+        return self.has_next or self.has_previous
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"dec": str(value)}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+        if "dec" in value:
+            return Decimal(value["dec"])
+    return value
+
+
+def encode_cursor(values: Sequence[Any], direction: str) -> str:
+    """Пакує значення полів сортування в непрозорий токен."""
+    payload = json.dumps(
+        {"v": [_encode_value(v) for v in values], "d": direction},
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, size: int) -> tuple[list[Any], str]:
+    """Розпаковує токен; кидає InvalidCursor, якщо він некоректний."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = [_decode_value(v) for v in payload["v"]]
+        direction = payload["d"]
+    except (binascii.Error, ValueError, KeyError, TypeError) as exc:
+        raise InvalidCursor(str(exc)) from exc
+    if direction not in ("next", "prev") or len(values) != size:
+        raise InvalidCursor("cursor does not match ordering")
+    return values, direction
+
+
+class KeysetPaginator:
+    """Пагінатор за кортежем полів сортування.
+
+    ``ordering`` — ті самі рядки, що й для ``order_by`` (напр. ``'-updated_at'``);
+    останнє поле має бути унікальним (``'-id'``). Поле, яке може бути NULL,
+    має бути сталим (NULL або не NULL) у межах групи з однаковими значеннями
+    попередніх полів — так, як ``favorite_date`` залежить від ``is_favorite``.
+    """
+
+    def __init__(self, queryset: QuerySet, ordering: Sequence[str], per_page: int):
+        self.queryset = queryset
+        self.ordering = list(ordering)
+        self.per_page = per_page
+        self.fields = [name.lstrip("-") for name in self.ordering]
+        self.descending = [name.startswith("-") for name in self.ordering]
+
+    def _seek_filter(self, values: Sequence[Any], forward: bool) -> Q:
+        """Умова "рядки після (або перед) позицією ``values``"."""
+        condition = Q(pk__in=[])
+        equal_prefix = Q()
+        for name, descending, value in zip(self.fields, self.descending, values):
+            if value is not None:
+                lookup = "lt" if descending == forward else "gt"
+                condition |= equal_prefix & Q(**{f"{name}__{lookup}": value})
+                equal_prefix &= Q(**{name: value})
+            else:
+                equal_prefix &= Q(**{f"{name}__isnull": True})
+        return condition
+
+    def _coerce(self, values: Sequence[Any]) -> list[Any]:
+        """Приводить значення курсора до типів полів сортування; кидає InvalidCursor.
+
+        Токен приходить з URL, тож значення можуть мати будь-який тип.
+        """
+        coerced = []
+        for name, value in zip(self.fields, values):
+            if value is not None:
+                output_field = self.queryset.query.resolve_ref(name).output_field
+                try:
+                    value = output_field.to_python(value)
+                except (ValidationError, ValueError, TypeError) as exc:
+                    raise InvalidCursor(f"bad value for {name}") from exc
+            coerced.append(value)
+        return coerced
+
+    def _row_values(self, obj) -> list[Any]:
+        return [getattr(obj, name) for name in self.fields]
+
+    def get_page(self, cursor: str | None) -> KeysetPage:
+        """Повертає сторінку за токеном (або першу, якщо токена немає).
+
+        Некоректний токен означає першу сторінку, як ``Paginator.get_page``.
+        """
+        values, direction = None, "next"
+        if cursor:
+            try:
+                values, direction = decode_cursor(cursor, len(self.fields))
+                values = self._coerce(values)
+            except InvalidCursor:
+                values, direction = None, "next"
+
+        forward = direction == "next"
+        queryset = self.queryset
+        if values is not None:
+            queryset = queryset.filter(self._seek_filter(values, forward))
+        if forward:
+            queryset = queryset.order_by(*self.ordering)
+        else:
+            queryset = queryset.order_by(*[
+                name[1:] if name.startswith("-") else f"-{name}" for name in self.ordering
+            ])
+
+        rows = list(queryset[:self.per_page + 1])
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if not forward:
+            rows.reverse()
+
+        page = KeysetPage(object_list=rows)
+        if rows:
+            has_next = has_more if forward else True
+            has_previous = values is not None if forward else has_more
+            if has_next:
+                page.next_cursor = encode_cursor(self._row_values(rows[-1]), "next")
+            if has_previous:
+                page.previous_cursor = encode_cursor(self._row_values(rows[0]), "prev")
+        return page
+
+
+def estimate_count(queryset: QuerySet, threshold: int = EXACT_COUNT_THRESHOLD) -> tuple[int, bool]:
+    """Кількість рядків: оцінка планувальника PostgreSQL для великих вибірок.
+
+    Повертає ``(count, is_estimate)``. Для малих вибірок і для інших БД
+    виконується звичайний COUNT(*).
+    """
+    queryset = queryset.order_by()
+    if connections[queryset.db].vendor == "postgresql":
+        estimate = _planner_rows(queryset)
+        if estimate >= threshold:
+            return estimate, True
+    return queryset.count(), False
+
+
+def _planner_rows(queryset: QuerySet) -> int:
+    """Оцінка кількості рядків з ``EXPLAIN (FORMAT JSON)`` (лише PostgreSQL).
+
+    План читається напряму з курсора: ``QuerySet.explain(format="json")``
+    склеює рядки результату в текст, і форма JSON залежить від драйвера.
+    """
+    sql, params = queryset.query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    # psycopg розбирає json сам; без цього приходить рядок
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    if isinstance(plan, list):
+        plan = plan[0]
+    return int(plan["Plan"]["Plan Rows"])
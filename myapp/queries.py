@@ -0,0 +1,148 @@
+"""
+Вибірка компаній для списку, експорту та REST API.
+
+``CompanyQuery`` — нормалізовані фільтри (myapp.filters.CompanyFilterSet) і
+країна користувача. З нього кожен споживач бере вибірку з потрібним лише йому
+набором колонок:
+
+* ``for_list(user)`` — сторінка списку: колонки карток, довідники, телефони
+  й адреси, сортування ``favorites_first``;
+* ``for_export()`` — колонки експорту (myapp.exports довантажує зв'язки);
+* ``for_api(fields)`` — поля з ``?fields=`` (CompanySerializer.optimize).
+
+``cache_key`` однаковий для однакових фільтрів незалежно від порядку і
+форматування параметрів у запиті — під нього можна кешувати результати.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from functools import cached_property
+from typing import Any
+
+from django.db.models import QuerySet
+from django.http import QueryDict
+
+from .filters import CompanyFilterSet, favorites_first
+from .models import Company
+from .serializers import CompanySerializer
+
+
+# Колонки Company, які читає список компаній (templates/companies/list_content.html)
+LIST_COLUMNS = (
+    "id",
+    "client_id",
+    "name",
+    "city",
+    "category",
+    "status",
+    "telegram",
+    "instagram",
+    "on_site_url",
+    "short_comment",
+    "call_date",
+    "logo",
+    "logo_renditions",
+    "updated_at",
+)
+
+# Колонки Company, які читає експорт (myapp.exports.company_row)
+EXPORT_COLUMNS = (
+    "id",
+    "client_id",
+    "name",
+    "city",
+    "category",
+    "status",
+    "telegram",
+    "website",
+    "instagram",
+    "short_comment",
+    "full_description",
+    "keywords",
+    "call_date",
+    "created_at",
+    "updated_at",
+)
+
+CACHE_KEY_PREFIX = "companies:query"
+
+
+def _normalize(value) -> Any:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, (list, tuple)):
+        return sorted({str(item) for item in value})
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+@dataclass
+class CompanyQuery:
+    """Фільтри списку компаній у канонічному вигляді та вибірки під кожного споживача."""
+
+    # Назва фільтра -> значення (рядок або відсортований список рядків); порожні відкинуто
+    filters: dict[str, Any] = field(default_factory=dict)
+    country: Any = None
+    # Помилки перевірки параметрів (невалідні фільтри не потрапляють у ``filters``)
+    errors: dict[str, list[str]] = field(default_factory=dict)
+
+    @classmethod
+    def from_params(cls, params: QueryDict, country=None) -> CompanyQuery:
+        """Перевіряє параметри GET одним проходом форми фільтра."""
+        filterset = CompanyFilterSet(params, Company.objects.none(), country=country)
+        filterset.is_valid()
+        filters = {}
+        for name, value in filterset.form.cleaned_data.items():
+            value = _normalize(value)
+            if value not in (None, "", []):
+                filters[name] = value
+        errors = {name: list(messages) for name, messages in filterset.errors.items()}
+        return cls(filters=filters, country=country, errors=errors)
+
+    @property
+    def search(self) -> str:
+        return self.filters.get("search", "")
+
+    def as_params(self) -> QueryDict:
+        """Нормалізовані фільтри як параметри GET."""
+        params = QueryDict(mutable=True)
+        for name, value in self.filters.items():
+            params.setlist(name, value if isinstance(value, list) else [value])
+        return params
+
+    @cached_property
+    def cache_key(self) -> str:
+        payload = json.dumps(
+            {"filters": self.filters, "country": getattr(self.country, "pk", self.country)},
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return f"{CACHE_KEY_PREFIX}:{hashlib.sha1(payload.encode()).hexdigest()}"
+
+    def filter(self, queryset: QuerySet) -> QuerySet:
+        """Застосовує фільтри і обмеження країною до ``queryset``."""
+        return CompanyFilterSet(self.as_params(), queryset, country=self.country).qs
+
+    def queryset(self) -> QuerySet:
+        return self.filter(Company.objects.all())
+
+    def for_list(self, user) -> tuple[QuerySet, list[str]]:
+        """Вибірка сторінки списку і поля сортування (для KeysetPaginator)."""
+        companies = (
+            self.queryset()
+            .only(*LIST_COLUMNS)
+            .select_related("city", "category", "status")
+            .prefetch_related("phones", "addresses")
+        )
+        return favorites_first(companies, user, ranked=bool(self.search))
+
+    def for_export(self) -> QuerySet:
+        return self.queryset().only(*EXPORT_COLUMNS)
+
+    def for_api(self, fields) -> QuerySet:
+        return CompanySerializer.optimize(self.queryset(), fields)
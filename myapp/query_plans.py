@@ -0,0 +1,133 @@
+"""
+Перевірка планів основних запитів списку компаній (EXPLAIN).
+
+Кожен ``PlanCase`` — запит у тому вигляді, в якому його будує список компаній
+(``CompanyQuery.for_list``), і індекси, якими він
+має користуватися. Регресія — повний прохід таблиці компаній або план без
+жодного з очікуваних індексів. Має сенс на базі з реальним обсягом даних:
+на майже порожній таблиці PostgreSQL законно обирає послідовний прохід.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Callable
+
+from django.db import connection
+from django.db.models import QuerySet
+from django.http import QueryDict
+from django.utils import timezone
+
+from . import reference_data
+from .models import Company
+from .queries import CompanyQuery
+
+
+@dataclass(frozen=True)
+class PlanCase:
+    name: str
+    build: Callable[[], QuerySet]
+    # Хоча б один з індексів має бути в плані (порожньо — лише перевірка на повний прохід)
+    indexes: tuple[str, ...] = ()
+    # Повний прохід очікуваний (немає селективного фільтра)
+    full_scan: bool = False
+
+
+@dataclass
+class PlanReport:
+    case: PlanCase
+    plan: str
+    problems: list[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.problems
+
+
+# Повний прохід таблиці компаній у виводі EXPLAIN
+_FULL_SCAN_RE = {
+    "postgresql": re.compile(r'Seq Scan on "?myapp_company"?(\s|$)'),
+    "sqlite": re.compile(r"\bSCAN (TABLE )?myapp_company\b(?! USING)"),
+}
+
+
+def _list_queryset(**params) -> QuerySet:
+    """Запит сторінки списку компаній з параметрами GET ``params``."""
+    query = QueryDict(mutable=True)
+    for name, value in params.items():
+        query.setlist(name, value if isinstance(value, list) else [value])
+    # Користувач без обраних: план той самий, LEFT JOIN лишається
+    companies, _ = CompanyQuery.from_params(query).for_list(user=0)
+    return companies
+
+
+def _first_name(items: list) -> str:
+    return items[0].name if items else ""
+
+
+def canonical_cases() -> list[PlanCase]:
+    """Запити списку компаній, плани яких перевіряються."""
+    today = timezone.localdate()
+    return [
+        PlanCase("Список без фільтрів", lambda: _list_queryset(), full_scan=True),
+        PlanCase(
+            "Фільтр за містом",
+            lambda: _list_queryset(city=[_first_name(reference_data.get_cities())]),
+            ("myapp_company_city_updated",),
+        ),
+        PlanCase(
+            "Фільтр за статусом",
+            lambda: _list_queryset(status=[_first_name(reference_data.get_statuses())]),
+            ("myapp_company_status_updated",),
+        ),
+        PlanCase(
+            "Дата оновлення",
+            lambda: _list_queryset(
+                date_updated_from=(today - timedelta(days=7)).isoformat(), date_updated_to=today.isoformat()
+            ),
+            ("myapp_company_updated",),
+        ),
+        PlanCase(
+            "Дата дзвінка",
+            lambda: _list_queryset(
+                call_date_from=today.isoformat(), call_date_to=(today + timedelta(days=7)).isoformat()
+            ),
+            ("myapp_company_call_date",),
+        ),
+        PlanCase(
+            "Нові за 30 днів",
+            lambda: Company.objects.filter(created_at__gte=timezone.now() - timedelta(days=30)).order_by(),
+            ("myapp_company_created_at",),
+        ),
+    ]
+
+
+def _explain(queryset: QuerySet) -> str:
+    if connection.vendor == "postgresql":
+        return queryset.explain(format="text")
+    return queryset.explain()
+
+
+def check(case: PlanCase) -> PlanReport:
+    report = PlanReport(case, _explain(case.build()))
+    full_scan = _FULL_SCAN_RE.get(connection.vendor)
+    if not case.full_scan and full_scan is not None and full_scan.search(report.plan):
+        report.problems.append("повний прохід таблиці myapp_company")
+    if case.indexes and not any(name in report.plan for name in case.indexes):
+        report.problems.append(f"не використано індекс: {', '.join(case.indexes)}")
+    return report
+
+
+def check_all() -> list[PlanReport]:
+    return [check(case) for case in canonical_cases()]
+
+
+def as_json(reports: list[PlanReport]) -> str:
+    return json.dumps(
+        [{"case": report.case.name, "ok": report.ok, "problems": report.problems, "plan": report.plan} for report in reports],
+        ensure_ascii=False,
+        indent=2,
+    )
@@ -0,0 +1,223 @@
+"""
+Кеш довідників: країни, міста, розділи, статуси.
+
+Два рівні:
+* локальний кеш процесу — без звернень навіть до кешу Django протягом LOCAL_TTL;
+* спільний кеш Django (settings.CACHES) — дані під ключем з номером версії.
+
+Версію довідника збільшують сигнали post_save/post_delete (див. myapp.signals)
+після коміту транзакції, тож інші воркери бачать зміни не пізніше ніж
+через LOCAL_TTL секунд. Повернуті списки спільні для всіх запитів — їх не можна змінювати.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, NamedTuple
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Category, City, Country, Status
+
+
+# Скільки секунд процес довіряє локальній копії без перевірки версії
+LOCAL_TTL = 5
+
+# Час життя даних у спільному кеші (версія все одно перевіряється)
+SHARED_TIMEOUT = 24 * 60 * 60
+
+CACHE_PREFIX = "refdata"
+
+
+def _load_countries() -> list[Country]:
+    return list(Country.objects.order_by("name"))
+
+
+def _load_cities() -> list[City]:
+    return list(City.objects.select_related("country").order_by("name"))
+
+
+def _load_categories() -> list[Category]:
+    return list(Category.objects.order_by("name"))
+
+
+def _load_statuses() -> list[Status]:
+    return list(Status.objects.order_by("name"))
+
+
+LOADERS: dict[str, Callable[[], list]] = {
+    "countries": _load_countries,
+    "cities": _load_cities,
+    "categories": _load_categories,
+    "statuses": _load_statuses,
+}
+
+# Які довідники залежать від моделі (міста містять країну через select_related)
+MODEL_DATASETS = {
+    Country: ("countries", "cities"),
+    City: ("cities",),
+    Category: ("categories",),
+    Status: ("statuses",),
+}
+
+
+@dataclass
+class _Entry:
+    version: int
+    checked_at: float
+    data: list
+
+
+_local: dict[str, _Entry] = {}
+_lock = threading.Lock()
+
+# Похідні кортежі для шаблонів: ключ -> (список-джерело, результат)
+_choices: dict[tuple, tuple[list, tuple]] = {}
+
+
+def _version_key(name: str) -> str:
+    return f"{CACHE_PREFIX}:{name}:version"
+
+
+def _data_key(name: str, version: int) -> str:
+    return f"{CACHE_PREFIX}:{name}:{version}"
+
+
+def _current_version(name: str) -> int:
+    key = _version_key(name)
+    version = cache.get(key)
+    if version is None:
+        # Початкова версія унікальна, щоб не підхопити дані, що залишилися після очищення кешу
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+
+def get(name: str) -> list:
+    """Повертає довідник ``name`` з кешу, завантажуючи його з БД за потреби."""
+    now = time.monotonic()
+    entry = _local.get(name)
+    if entry is not None and now - entry.checked_at < LOCAL_TTL:
+        return entry.data
+
+    version = _current_version(name)
+    if entry is not None and entry.version == version:
+        entry.checked_at = now
+        return entry.data
+
+    data = cache.get(_data_key(name, version))
+    if data is None:
+        data = LOADERS[name]()
+        cache.set(_data_key(name, version), data, SHARED_TIMEOUT)
+
+    with _lock:
+        _local[name] = _Entry(version=version, checked_at=now, data=data)
+    return data
+
+
+def invalidate(*names: str) -> None:
+    """Негайно збільшує версію довідників (локальна копія скидається)."""
+    for name in names:
+        key = _version_key(name)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, int(time.time() * 1000), None)
+        with _lock:
+            _local.pop(name, None)
+
+
+def invalidate_for_model(model) -> None:
+    """Скидає довідники, залежні від моделі, після коміту поточної транзакції."""
+    names = MODEL_DATASETS.get(model, ())
+    if names:
+        transaction.on_commit(lambda: invalidate(*names))
+
+
+def get_countries() -> list[Country]:
+    """Усі країни, відсортовані за назвою."""
+    return get("countries")
+
+
+def get_cities(country=None) -> list[City]:
+    """Міста (з країною), за потреби лише для вказаної країни."""
+    cities = get("cities")
+    if country is None:
+        return cities
+    country_id = getattr(country, "pk", country)
+    return [city for city in cities if city.country_id == country_id]
+
+
+def get_categories() -> list[Category]:
+    """Усі розділи, відсортовані за назвою."""
+    return get("categories")
+
+
+def get_statuses() -> list[Status]:
+    """Усі статуси, відсортовані за назвою."""
+    return get("statuses")
+
+
+# ============================================================================
+# Готові до рендерингу варіанти для випадаючих списків
+# ============================================================================
+
+class Choice(NamedTuple):
+    """Пункт випадаючого списку (статус, розділ)."""
+
+    id: int
+    name: str
+
+
+class CityChoice(NamedTuple):
+    """Пункт випадаючого списку міст."""
+
+    id: int
+    name: str
+    country_id: int
+
+
+def _derived(key: tuple, source: list, build: Callable[[list], tuple]) -> tuple:
+    """Кешує кортеж, побудований з довідника, доки не зміниться версія довідника."""
+    cached = _choices.get(key)
+    if cached is not None and cached[0] is source:
+        return cached[1]
+    result = build(source)
+    with _lock:
+        _choices[key] = (source, result)
+    return result
+
+
+def status_choices() -> tuple[Choice, ...]:
+    """Статуси для фільтрів і форм."""
+    return _derived(
+        ("statuses",),
+        get_statuses(),
+        lambda items: tuple(Choice(item.pk, item.name) for item in items),
+    )
+
+
+def category_choices() -> tuple[Choice, ...]:
+    """Розділи для фільтрів і форм."""
+    return _derived(
+        ("categories",),
+        get_categories(),
+        lambda items: tuple(Choice(item.pk, item.name) for item in items),
+    )
+
+
+def city_choices(country=None) -> tuple[CityChoice, ...]:
+    """Міста для фільтрів і форм, за потреби лише для вказаної країни."""
+    country_id = getattr(country, "pk", country)
+    return _derived(
+        ("cities", country_id),
+        get("cities"),
+        lambda items: tuple(
+            CityChoice(item.pk, item.name, item.country_id)
+            for item in items
+            if country_id is None or item.country_id == country_id
+        ),
+    )
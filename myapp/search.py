@@ -0,0 +1,254 @@
+"""
+Повнотекстовий пошук компаній.
+
+Для кожної компанії зберігається денормалізований пошуковий документ
+(``CompanySearchDocument``): назва, коментар, ключові слова, місто, розділ,
+телефони, контакти, соцмережі та адреси одним рядком токенів.
+
+* PostgreSQL — генерована колонка ``search_vector`` (tsvector) з GIN-індексом;
+* SQLite — FTS5-таблиця ``myapp_companysearch_fts`` (external content),
+  яку синхронізують тригери на таблиці документів;
+* інші БД або SQLite без FTS5 — старий фільтр ``icontains`` по всіх полях.
+
+Документи оновлюються сигналами (див. ``myapp.signals``) після коміту транзакції.
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Iterable
+
+from django.db import connection, transaction
+from django.db.models import FloatField, Q, QuerySet, Value
+from django.db.models.expressions import RawSQL
+
+from .models import Company, CompanySearchDocument
+
+
+FTS_TABLE = "myapp_companysearch_fts"
+
+# Скільки компаній перебудовувати за один прохід
+REFRESH_CHUNK_SIZE = 500
+
+# Мінімальна довжина суфікса телефону, за яким можна знайти компанію
+PHONE_SUFFIX_MIN_LENGTH = 4
+
+# Суфікси телефонів індексуються з префіксом, щоб короткі числа у звичайному
+# текстовому запиті ("Компанія 7") не збігалися з будь-яким номером
+PHONE_SUFFIX_PREFIX = "tel"
+
+# Обмеження кількості слів у запиті (захист від надто важких запитів)
+MAX_QUERY_TERMS = 8
+
+_TOKEN_RE = re.compile(r"[^\W_]+")
+_PHONE_QUERY_RE = re.compile(r"^[\d\s()+\-.]+$")
+
+_fts_available: dict[str, bool] = {}
+
+
+# ============================================================================
+# Побудова документа
+# ============================================================================
+
+def tokenize(text: str | None) -> list[str]:
+    """Розбиває текст на слова у нижньому регістрі (без пунктуації і '_')."""
+    if not text:
+        return []
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _phone_tokens(number: str) -> list[str]:
+    """Цифри телефону та всі його суфікси, щоб працював пошук за частиною номера."""
+    digits = re.sub(r"\D", "", number or "")
+    if not digits:
+        return []
+    suffixes = [
+        f"{PHONE_SUFFIX_PREFIX}{digits[i:]}"
+        for i in range(1, len(digits) - PHONE_SUFFIX_MIN_LENGTH + 1)
+    ]
+    return [digits, *suffixes]
+
+
+def build_document(company, phones: Iterable, addresses: Iterable) -> str:
+    """Збирає пошуковий документ компанії.
+
+    Працює і з історичними моделями міграцій, тому звертається лише до полів.
+    """
+    tokens: list[str] = []
+    for value in (
+        company.name,
+        company.short_comment,
+        company.keywords,
+        company.instagram,
+        company.telegram,
+        company.website,
+    ):
+        tokens.extend(tokenize(value))
+
+    client_digits = re.sub(r"\D", "", company.client_id or "")
+    if client_digits:
+        tokens.append(client_digits)
+        if client_digits.lstrip("0"):
+            tokens.append(client_digits.lstrip("0"))
+
+    if company.city_id:
+        tokens.extend(tokenize(company.city.name))
+    if company.category_id:
+        tokens.extend(tokenize(company.category.name))
+
+    for phone in phones:
+        tokens.extend(_phone_tokens(phone.number))
+        tokens.extend(tokenize(phone.contact_name))
+
+    for address in addresses:
+        tokens.extend(tokenize(address.address))
+
+    # Прибираємо повтори, зберігаючи порядок
+    return " ".join(dict.fromkeys(tokens))
+
+
+def refresh_documents(company_ids: Iterable[int]) -> None:
+    """Перебудовує пошукові документи для вказаних компаній."""
+    ids = sorted({int(pk) for pk in company_ids if pk})
+    for start in range(0, len(ids), REFRESH_CHUNK_SIZE):
+        chunk = ids[start:start + REFRESH_CHUNK_SIZE]
+        companies = (
+            Company.objects.filter(pk__in=chunk)
+            .select_related("city", "category")
+            .prefetch_related("phones", "addresses")
+        )
+        save_documents([
+            CompanySearchDocument(
+                company=company,
+                document=build_document(company, company.phones.all(), company.addresses.all()),
+            )
+            for company in companies
+        ])
+
+
+def save_documents(documents: list[CompanySearchDocument]) -> None:
+    """Зберігає готові документи (вставка або оновлення існуючих)."""
+    if documents:
+        CompanySearchDocument.objects.bulk_create(
+            documents,
+            update_conflicts=True,
+            unique_fields=["company"],
+            update_fields=["document", "updated_at"],
+        )
+
+
+def schedule_refresh(company_ids: Iterable[int]) -> None:
+    """Оновлює документи після коміту поточної транзакції."""
+    ids = {pk for pk in company_ids if pk}
+    if ids:
+        transaction.on_commit(lambda: refresh_documents(ids))
+
+
+# ============================================================================
+# Пошук
+# ============================================================================
+
+def get_backend() -> str:
+    """Повертає 'postgresql', 'sqlite' або 'fallback' для поточного з'єднання."""
+    if connection.vendor == "postgresql":
+        return "postgresql"
+    if connection.vendor == "sqlite" and _sqlite_fts_available():
+        return "sqlite"
+    return "fallback"
+
+
+def _sqlite_fts_available() -> bool:
+    """Перевіряє наявність FTS5-таблиці (позитивний результат кешується)."""
+    if _fts_available.get(connection.alias):
+        return True
+    with connection.cursor() as cursor:
+        exists = FTS_TABLE in connection.introspection.table_names(cursor)
+    if exists:
+        _fts_available[connection.alias] = True
+    return exists
+
+
+def parse_query(query: str) -> list[tuple[str, ...]]:
+    """Перетворює пошуковий рядок на список термів для префіксного пошуку.
+
+    Кожен терм — кортеж альтернатив (OR), терми між собою поєднуються через AND.
+    Запит, схожий на телефон ("+38 (067) 123-45-67"), зводиться до однієї
+    послідовності цифр, як і раніше робив normalize_phone_number, і шукається
+    також серед суфіксів номерів.
+    """
+    query = (query or "").strip()
+    if _PHONE_QUERY_RE.match(query) and any(ch.isdigit() for ch in query):
+        digits = re.sub(r"\D", "", query)
+        if len(digits) >= PHONE_SUFFIX_MIN_LENGTH:
+            return [(digits, f"{PHONE_SUFFIX_PREFIX}{digits}")]
+        return [(digits,)]
+    return [(term,) for term in tokenize(query)[:MAX_QUERY_TERMS]]
+
+
+def search_companies(queryset: QuerySet, query: str) -> QuerySet:
+    """Фільтрує компанії за пошуковим запитом і додає анотацію ``search_rank``.
+
+    Чим більший ``search_rank``, тим релевантніша компанія.
+    """
+    terms = parse_query(query)
+    if not terms:
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+    backend = get_backend()
+    document_table = CompanySearchDocument._meta.db_table
+    company_table = Company._meta.db_table
+
+    if backend == "postgresql":
+        ts_query = " & ".join(
+            "(" + " | ".join(f"{word}:*" for word in term) + ")" for term in terms
+        )
+        match_sql = (
+            f"SELECT company_id FROM {document_table} "
+            f"WHERE search_vector @@ to_tsquery('simple', %s)"
+        )
+        rank_sql = (
+            f"SELECT ts_rank(d.search_vector, to_tsquery('simple', %s)) "
+            f"FROM {document_table} d WHERE d.company_id = {company_table}.id"
+        )
+        return queryset.filter(id__in=RawSQL(match_sql, [ts_query])).annotate(
+            search_rank=RawSQL(rank_sql, [ts_query], output_field=FloatField())
+        )
+
+    if backend == "sqlite":
+        fts_query = " AND ".join(
+            "(" + " OR ".join(f'"{word}"*' for word in term) + ")" for term in terms
+        )
+        match_sql = f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s"
+        # bm25() повертає від'ємні значення: чим менше, тим краще
+        rank_sql = (
+            f"SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} "
+            f"WHERE {FTS_TABLE} MATCH %s AND rowid = {company_table}.id"
+        )
+        return queryset.filter(id__in=RawSQL(match_sql, [fts_query])).annotate(
+            search_rank=RawSQL(rank_sql, [fts_query], output_field=FloatField())
+        )
+
+    return legacy_search(queryset, query)
+
+
+def legacy_search(queryset: QuerySet, query: str) -> QuerySet:
+    """Старий пошук через icontains (для БД без повнотекстового індексу)."""
+    # Нормалізація номера телефону (видалити пробіли, дефіси, дужки)
+    normalized_query = query.replace(' ', '').replace('-', '').replace('(', '').replace(')', '')
+    # Нормалізація для Instagram/Telegram (видалити @)
+    normalized_social = query.lstrip('@')
+
+    return queryset.filter(
+        Q(name__icontains=query) |
+        Q(short_comment__icontains=query) |
+        Q(client_id__icontains=query) |
+        Q(city__name__icontains=query) |
+        Q(category__name__icontains=query) |
+        Q(keywords__icontains=query) |
+        Q(phones__number__icontains=normalized_query) |
+        Q(phones__contact_name__icontains=query) |
+        Q(instagram__icontains=normalized_social) |
+        Q(website__icontains=query) |
+        Q(telegram__icontains=normalized_social) |
+        Q(addresses__address__icontains=query)
+    ).distinct().annotate(search_rank=Value(0.0, output_field=FloatField()))
@@ -0,0 +1,89 @@
+"""
+Видача послідовних номерів без гонок між воркерами.
+
+* PostgreSQL — нативна SEQUENCE (``nextval`` не блокує інші транзакції);
+* інші БД — рядок-лічильник ``Sequence``, який збільшується атомарним
+  ``UPDATE ... SET value = value + n`` (блокування рядка або всієї БД на SQLite).
+
+Номери можна резервувати блоками (``reserve``) — імпорт отримує всі номери
+одним запитом. Видані номери не повертаються: відкат транзакції лишає "дірку".
+"""
+
+from __future__ import annotations
+
+import re
+
+from django.db import connection, transaction
+from django.db.models import F
+
+from .models import Company, Sequence
+
+
+CLIENT_ID_SEQUENCE = "company_client_id"
+
+# Назви SEQUENCE на PostgreSQL (створюються міграцією 0012)
+POSTGRES_SEQUENCES = {
+    CLIENT_ID_SEQUENCE: "myapp_company_client_id_seq",
+}
+
+CLIENT_ID_FORMAT = "#{:05d}"
+
+_CLIENT_ID_RE = re.compile(r"^#(\d+)$")
+
+
+def format_client_id(number: int) -> str:
+    """Номер клієнта у вигляді #00123."""
+    return CLIENT_ID_FORMAT.format(number)
+
+
+def current_client_id_max() -> int:
+    """Найбільший номер, уже використаний компаніями (для ініціалізації лічильника)."""
+    numbers = [0]
+    for client_id in Company.objects.exclude(client_id="").values_list("client_id", flat=True).iterator():
+        match = _CLIENT_ID_RE.match(client_id)
+        if match:
+            numbers.append(int(match.group(1)))
+    last_id = Company.objects.order_by("-id").values_list("id", flat=True).first() or 0
+    return max(max(numbers), last_id)
+
+
+def reserve(name: str, count: int = 1) -> list[int]:
+    """Резервує ``count`` номерів послідовності ``name`` і повертає їх за зростанням."""
+    if count < 1:
+        return []
+    if connection.vendor == "postgresql" and name in POSTGRES_SEQUENCES:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT nextval(%s) FROM generate_series(1, %s)",
+                [POSTGRES_SEQUENCES[name], count],
+            )
+            return sorted(row[0] for row in cursor.fetchall())
+
+    with transaction.atomic():
+        updated = Sequence.objects.filter(name=name).update(value=F("value") + count)
+        if not updated:
+            _create_counter(name)
+            Sequence.objects.filter(name=name).update(value=F("value") + count)
+        last = Sequence.objects.filter(name=name).values_list("value", flat=True).get()
+    return list(range(last - count + 1, last + 1))
+
+
+def _create_counter(name: str) -> None:
+    """Створює відсутній лічильник, починаючи після вже виданих номерів."""
+    start = current_client_id_max() if name == CLIENT_ID_SEQUENCE else 0
+    Sequence.objects.get_or_create(name=name, defaults={"value": start})
+
+
+def next_value(name: str) -> int:
+    """Наступний номер послідовності ``name``."""
+    return reserve(name, 1)[0]
+
+
+def next_client_id() -> str:
+    """Новий client_id для компанії."""
+    return format_client_id(next_value(CLIENT_ID_SEQUENCE))
+
+
+def reserve_client_ids(count: int) -> list[str]:
+    """Блок client_id для масового створення компаній."""
+    return [format_client_id(number) for number in reserve(CLIENT_ID_SEQUENCE, count)]
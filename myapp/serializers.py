@@ -0,0 +1,106 @@
+"""
+Серіалізатори REST API (``/api/v1/``).
+
+``?fields=name,phones`` повертає лише вказані поля; ``CompanySerializer.optimize``
+будує під той самий набір полів запит: ``only()`` для колонок, ``select_related``
+для довідників і ``prefetch_related`` для телефонів і адрес.
+"""
+
+from __future__ import annotations
+
+from typing import Iterable
+
+from django.db.models import QuerySet
+from rest_framework import serializers
+
+from .models import Company, CompanyAddress, CompanyPhone
+
+
+class ReferenceSerializer(serializers.Serializer):
+    """Запис довідника (місто, розділ, статус)."""
+
+    id = serializers.IntegerField(read_only=True)
+    name = serializers.CharField(read_only=True)
+
+
+class CompanyPhoneSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CompanyPhone
+        fields = ("number", "contact_name", "is_favorite")
+
+
+class CompanyAddressSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CompanyAddress
+        fields = ("address", "is_favorite")
+
+
+class SparseFieldsMixin:
+    """Лишає в серіалізаторі лише поля з ``context["fields"]`` (якщо задано)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = self.context.get("fields")
+        if requested:
+            for name in set(self.fields) - set(requested):
+                self.fields.pop(name)
+
+
+class CompanySerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    city = ReferenceSerializer(read_only=True)
+    category = ReferenceSerializer(read_only=True)
+    status = ReferenceSerializer(read_only=True)
+    phones = CompanyPhoneSerializer(many=True, read_only=True)
+    addresses = CompanyAddressSerializer(many=True, read_only=True)
+
+    # Поле -> зв'язок, який треба довантажити для нього
+    SELECT_RELATED = {"city": "city", "category": "category", "status": "status"}
+    PREFETCH_RELATED = {"phones": "phones", "addresses": "addresses"}
+
+    class Meta:
+        model = Company
+        fields = (
+            "id",
+            "client_id",
+            "name",
+            "city",
+            "category",
+            "status",
+            "phones",
+            "addresses",
+            "telegram",
+            "website",
+            "on_site_url",
+            "instagram",
+            "short_comment",
+            "full_description",
+            "keywords",
+            "call_date",
+            "logo",
+            "created_at",
+            "updated_at",
+        )
+        read_only_fields = fields
+
+    @classmethod
+    def field_names(cls, requested: Iterable[str] | None = None) -> list[str]:
+        """Відомі поля з ``requested`` у порядку Meta.fields (усі, якщо не задано)."""
+        if not requested:
+            return list(cls.Meta.fields)
+        requested = set(requested)
+        return [name for name in cls.Meta.fields if name in requested]
+
+    @classmethod
+    def optimize(cls, queryset: QuerySet, fields: Iterable[str]) -> QuerySet:
+        """Запит, що читає рівно те, що потрібно для ``fields``."""
+        columns = {"id", "updated_at"}  # updated_at потрібен для ETag
+        for name in fields:
+            if name in cls.SELECT_RELATED:
+                relation = cls.SELECT_RELATED[name]
+                queryset = queryset.select_related(relation)
+                columns.update((f"{relation}__id", f"{relation}__name"))
+            elif name in cls.PREFETCH_RELATED:
+                queryset = queryset.prefetch_related(cls.PREFETCH_RELATED[name])
+            else:
+                columns.add(name)
+        return queryset.only(*columns)
@@ -0,0 +1,111 @@
+"""
+Сигнали, що підтримують денормалізовані дані компаній в актуальному стані.
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from . import page_cache, reference_data, search, stats
+from .models import Category, City, Company, CompanyAddress, CompanyPhone, Country, Status, UserFavoriteCompany
+
+
+# Масові зміни (bulk_create, bulk_update, QuerySet.update) не надсилають post_save,
+# тому код, що їх виконує, надсилає цей сигнал з аргументом company_ids.
+# search_indexed=True означає, що пошукові документи вже записано.
+companies_bulk_changed = Signal()
+
+
+@receiver(post_save, sender=Company)
+def refresh_company_search_document(sender, instance, raw=False, **kwargs):
+    """Оновлює пошуковий документ після збереження компанії."""
+    if raw:
+        return
+    search.schedule_refresh([instance.pk])
+
+
+@receiver(post_save, sender=Company)
+def update_company_stats_on_save(sender, instance, created=False, raw=False, update_fields=None, **kwargs):
+    """Коригує лічильники компаній (нові, за статусом, за розділом)."""
+    if raw:
+        return
+    stats.company_saved(instance, created, update_fields)
+
+
+@receiver(post_delete, sender=Company)
+def update_company_stats_on_delete(sender, instance, **kwargs):
+    """Зменшує лічильники після видалення компанії."""
+    stats.company_deleted(instance)
+
+
+@receiver(post_save, sender=CompanyPhone)
+@receiver(post_delete, sender=CompanyPhone)
+@receiver(post_save, sender=CompanyAddress)
+@receiver(post_delete, sender=CompanyAddress)
+def refresh_contact_search_document(sender, instance, raw=False, **kwargs):
+    """Оновлює пошуковий документ після зміни телефону або адреси."""
+    if raw:
+        return
+    search.schedule_refresh([instance.company_id])
+
+
+@receiver(companies_bulk_changed)
+def refresh_bulk_changed_search_documents(sender, company_ids, search_indexed=False, **kwargs):
+    """Оновлює пошукові документи компаній, змінених масовими операціями."""
+    if not search_indexed:
+        search.schedule_refresh(company_ids)
+
+
+@receiver(companies_bulk_changed, sender=Company)
+def invalidate_bulk_changed_stats(sender, **kwargs):
+    """Масово створені чи змінені компанії — лічильники перераховуються після коміту."""
+    transaction.on_commit(stats.invalidate)
+
+
+@receiver(post_save, sender=Company)
+@receiver(post_delete, sender=Company)
+@receiver(post_save, sender=CompanyPhone)
+@receiver(post_delete, sender=CompanyPhone)
+@receiver(post_save, sender=CompanyAddress)
+@receiver(post_delete, sender=CompanyAddress)
+@receiver(companies_bulk_changed)
+def invalidate_company_pages(sender, raw=False, **kwargs):
+    """Скидає кешовані сторінки списку компаній після будь-якої зміни даних."""
+    if raw:
+        return
+    page_cache.invalidate()
+
+
+@receiver(post_save, sender=UserFavoriteCompany)
+@receiver(post_delete, sender=UserFavoriteCompany)
+def invalidate_favorite_pages(sender, instance, raw=False, **kwargs):
+    """Обрані йдуть першими в списку — скидає сторінки користувача."""
+    if raw:
+        return
+    page_cache.invalidate_favorites(instance.user_id)
+
+
+@receiver(post_save, sender=City)
+@receiver(post_save, sender=Category)
+def refresh_reference_search_documents(sender, instance, created=False, raw=False, **kwargs):
+    """Назви міст і розділів входять у документи, тому перейменування їх оновлює."""
+    if raw or created:
+        return
+    search.schedule_refresh(instance.companies.values_list('id', flat=True))
+
+
+@receiver(post_save, sender=Country)
+@receiver(post_delete, sender=Country)
+@receiver(post_save, sender=City)
+@receiver(post_delete, sender=City)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Status)
+@receiver(post_delete, sender=Status)
+def invalidate_reference_data(sender, raw=False, **kwargs):
+    """Скидає кеш довідників після зміни країни, міста, розділу чи статусу."""
+    if raw:
+        return
+    reference_data.invalidate_for_model(sender)
+    # Фільтри списку посилаються на назви міст і статусів
+    page_cache.invalidate()
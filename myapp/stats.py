@@ -0,0 +1,170 @@
+"""
+Лічильники компаній для списку та сторінок налаштувань.
+
+* ``new_companies_count()`` — нові компанії за NEW_COMPANIES_DAYS днів. Компанії
+  самі "виходять" з вікна з часом, тому значення живе в кеші NEW_COUNT_TIMEOUT
+  секунд, а сигнали лише коригують його між перерахунками;
+* ``companies_count`` у містах, розділах і статусах — денормалізована колонка.
+  Сигнали збереження/видалення компанії змінюють її атомарним
+  ``UPDATE ... SET companies_count = companies_count ± 1`` (F()) у тій самій
+  транзакції, тож сторінки налаштувань читають лише таблицю довідника.
+
+Зміни, що оминають сигнали (``QuerySet.update()``), виправляє команда
+``refresh_company_stats``; масові операції (``companies_bulk_changed``)
+перераховують лічильники одразу.
+"""
+
+from __future__ import annotations
+
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Category, City, Company, Status
+
+
+NEW_COMPANIES_DAYS = 30
+
+# Як довго живе лічильник нових компаній до повного перерахунку
+NEW_COUNT_TIMEOUT = 10 * 60
+
+CACHE_PREFIX = "stats"
+
+# Довідники з колонкою companies_count: назва -> (модель, поле Company)
+COUNTERS = {
+    "city": (City, "city_id"),
+    "category": (Category, "category_id"),
+    "status": (Status, "status_id"),
+}
+
+# Поля Company, зміни яких відстежують лічильники (див. Company.from_db)
+TRACKED_FIELDS = tuple(field for _, field in COUNTERS.values())
+
+_NEW_KEY = f"{CACHE_PREFIX}:new_companies"
+
+
+def _adjust(key: str, delta: int) -> None:
+    """Змінює лічильник, лише якщо він уже є в кеші (інакше його перерахують)."""
+    try:
+        if delta > 0:
+            cache.incr(key, delta)
+        elif delta < 0:
+            cache.decr(key, -delta)
+    except ValueError:
+        pass
+
+
+def _shift(model, pk: int | None, delta: int) -> None:
+    """Атомарно змінює ``companies_count`` запису довідника."""
+    if pk is not None and delta:
+        model.objects.filter(pk=pk).update(companies_count=F("companies_count") + delta)
+
+
+# ============================================================================
+# Читання
+# ============================================================================
+
+def count_new_companies() -> int:
+    """Рахує нові компанії в БД (індекс по created_at)."""
+    since = timezone.now() - timedelta(days=NEW_COMPANIES_DAYS)
+    return Company.objects.filter(created_at__gte=since).count()
+
+
+def new_companies_count() -> int:
+    """Кількість компаній, створених за останні NEW_COMPANIES_DAYS днів."""
+    value = cache.get(_NEW_KEY)
+    if value is None:
+        value = count_new_companies()
+        cache.set(_NEW_KEY, value, NEW_COUNT_TIMEOUT)
+    return value
+
+
+# ============================================================================
+# Інкрементальне оновлення (викликається із сигналів)
+# ============================================================================
+
+def company_saved(company: Company, created: bool, update_fields=None) -> None:
+    """Коригує лічильники після збереження компанії.
+
+    ``update_fields`` — як у сигналі post_save: довідники, поля яких не
+    зберігалися, не чіпаються. Значення FK читаються з ``__dict__``: відкладене
+    (не завантажене) поле не змінювалося і не варте окремого запиту.
+    """
+    previous = getattr(company, "_original_refs", None) or {}
+    current = {field: company.__dict__[field] for field in TRACKED_FIELDS if field in company.__dict__}
+    company._original_refs = {**previous, **current}
+
+    if created:
+        transaction.on_commit(lambda: _adjust(_NEW_KEY, 1))
+        for model, field in COUNTERS.values():
+            _shift(model, current.get(field), 1)
+        return
+    for name, (model, field) in COUNTERS.items():
+        if update_fields is not None and name not in update_fields and field not in update_fields:
+            continue
+        if field not in current:
+            continue
+        if field not in previous:
+            # Невідомо, яким було значення — перераховуємо довідник
+            recount(name)
+        elif previous[field] != current[field]:
+            _shift(model, previous[field], -1)
+            _shift(model, current[field], 1)
+
+
+def company_deleted(company: Company) -> None:
+    """Коригує лічильники після видалення компанії."""
+    refs = getattr(company, "_original_refs", None) or {
+        field: getattr(company, field) for field in TRACKED_FIELDS
+    }
+    since = timezone.now() - timedelta(days=NEW_COMPANIES_DAYS)
+    if company.created_at is not None and company.created_at >= since:
+        transaction.on_commit(lambda: _adjust(_NEW_KEY, -1))
+    for model, field in COUNTERS.values():
+        _shift(model, refs.get(field), -1)
+
+
+# ============================================================================
+# Перерахунок
+# ============================================================================
+
+def _counted(name: str) -> Coalesce:
+    """Підзапит: кількість компаній запису довідника ``name``."""
+    _, field = COUNTERS[name]
+    companies = (
+        Company.objects.filter(**{field: OuterRef("pk")})
+        .order_by()
+        .values(field)
+        .annotate(total=Count("id"))
+        .values("total")
+    )
+    return Coalesce(Subquery(companies), 0)
+
+
+def recount(*names: str) -> dict[str, int]:
+    """Виправляє ``companies_count`` довідників (усіх, якщо не вказано).
+
+    Повертає кількість виправлених записів для кожного довідника.
+    """
+    fixed = {}
+    for name in names or tuple(COUNTERS):
+        model, _ = COUNTERS[name]
+        fixed[name] = model.objects.exclude(companies_count=_counted(name)).update(companies_count=_counted(name))
+    return fixed
+
+
+def invalidate() -> None:
+    """Скидає лічильник нових компаній і перераховує лічильники довідників."""
+    cache.delete(_NEW_KEY)
+    recount()
+
+
+def reconcile() -> dict[str, dict]:
+    """Перераховує всі лічильники з БД."""
+    new_count = count_new_companies()
+    cache.set(_NEW_KEY, new_count, NEW_COUNT_TIMEOUT)
+    return {"new": {"total": new_count}, "fixed": recount()}
@@ -1,3 +1,391 @@
-from django.test import TestCase
+"""
+Тести myapp.
 
-# Create your tests here.
+Запуск: ``python manage.py test myapp --settings=CRM_Nice.settings.test``.
+"""
+
+from __future__ import annotations
+
+import io
+import json
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.db import connections
+from django.http import QueryDict
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from . import bulk, imports, jobs, normalization, pagination, stats
+from .models import Company, CompanyAddress, CompanyPhone, Job, Status
+from .queries import CompanyQuery
+
+
+class _FakePostgres:
+    """З'єднання, яке прикидається PostgreSQL і повертає заданий EXPLAIN."""
+
+    vendor = "postgresql"
+
+    def __init__(self, plan):
+        self.plan = plan
+        self.executed = []
+
+    def cursor(self):
+        cursor = mock.MagicMock()
+        cursor.__enter__.return_value = cursor
+        cursor.execute.side_effect = lambda sql, params: self.executed.append(sql)
+        cursor.fetchone.return_value = (self.plan,)
+        return cursor
+
+
+class EstimateCountTests(TestCase):
+    def _estimate(self, plan, threshold=1000):
+        fake = _FakePostgres(plan)
+        with mock.patch.object(pagination, "connections", {"default": fake}):
+            result = pagination.estimate_count(Company.objects.all(), threshold=threshold)
+        return result, fake
+
+    def test_postgres_plan_parsed_by_driver(self):
+        # psycopg2 віддає json-колонку вже розібраною: список з одним планом
+        (count, is_estimate), fake = self._estimate([{"Plan": {"Plan Rows": 50_000}}])
+        self.assertEqual((count, is_estimate), (50_000, True))
+        self.assertTrue(fake.executed[0].startswith("EXPLAIN (FORMAT JSON) SELECT"))
+
+    def test_postgres_plan_as_text(self):
+        (count, is_estimate), _ = self._estimate(json.dumps([{"Plan": {"Plan Rows": 20_000}}]))
+        self.assertEqual((count, is_estimate), (20_000, True))
+
+    def test_postgres_plan_as_object(self):
+        (count, is_estimate), _ = self._estimate({"Plan": {"Plan Rows": 30_000}})
+        self.assertEqual((count, is_estimate), (30_000, True))
+
+    def test_small_estimate_falls_back_to_exact_count(self):
+        Company.objects.create(name="Компания")
+        (count, is_estimate), _ = self._estimate([{"Plan": {"Plan Rows": 10}}])
+        self.assertEqual((count, is_estimate), (1, False))
+
+    def test_other_databases_count_exactly(self):
+        self.assertNotEqual(connections["default"].vendor, "postgresql")
+        self.assertEqual(pagination.estimate_count(Company.objects.all()), (0, False))
+
+
+class ContactKeyTests(TestCase):
+    def test_keys(self):
+        self.assertEqual(normalization.website_key("https://www.Shop.com/catalog/"), "shop.com/catalog")
+        self.assertEqual(normalization.instagram_key("https://instagram.com/Shop/"), "shop")
+        self.assertEqual(normalization.telegram_key("@Shop"), "shop")
+        self.assertEqual(normalization.phone_key("+38 (067) 123-45-67"), "380671234567")
+
+    def test_unparsable_url_falls_back_to_plain_key(self):
+        # urlsplit кидає ValueError("Invalid IPv6 URL")
+        self.assertEqual(normalization.website_key(" HTTP://[Shop "), "http://[shop")
+        self.assertEqual(normalization.instagram_key("http://[shop"), "httpshop")
+        self.assertEqual(normalization.telegram_key("https://[t.me"), "httpst.me")
+
+
+class ImportTests(TestCase):
+    def _import(self, text: str) -> imports.ImportResult:
+        return imports.import_file(io.BytesIO(text.encode()), "companies.csv")
+
+    def test_bad_row_does_not_fail_import(self):
+        result = self._import(
+            "Название;Телефон;Сайт\n"
+            "Первая;+380671112233;http://[shop\n"
+            "Вторая;+380671112244;shop.com/catalog\n"
+        )
+        self.assertEqual((result.created, result.processed, result.error_count), (1, 2, 1))
+        self.assertEqual(result.errors[0].row, 2)
+        company = Company.objects.get()
+        self.assertEqual((company.website, company.website_key), ("http://shop.com/catalog", "shop.com/catalog"))
+
+    def test_duplicates_in_file_and_database(self):
+        self._import("Название;Телефон\nПервая;+380671112233\n")
+        result = self._import(
+            "Название;Телефон;Telegram\n"
+            "Копия;067 111 22 33;\n"
+            "Вторая;+380501112233;@shop\n"
+            "Третья;+380501112244;t.me/Shop\n"
+        )
+        self.assertEqual(result.created, 1)
+        self.assertEqual([error.row for error in result.errors], [2, 4])
+
+
+class CompaniesCountTests(TestCase):
+    def setUp(self):
+        self.new, self.closed = Status.objects.order_by("pk")[:2]
+        self.company = Company.objects.create(name="Компания", status=self.new)
+
+    def _counts(self):
+        return [status.companies_count for status in Status.objects.filter(pk__in=[self.new.pk, self.closed.pk]).order_by("pk")]
+
+    def test_status_change_moves_counter(self):
+        self.assertEqual(self._counts(), [1, 0])
+        self.company.status = self.closed
+        self.company.save(update_fields=["status"])
+        self.assertEqual(self._counts(), [0, 1])
+        self.company.delete()
+        self.assertEqual(self._counts(), [0, 0])
+
+    def test_unrelated_save_skips_counters(self):
+        company = Company.objects.only("id", "name").get(pk=self.company.pk)
+        company.name = "Новая"
+        with mock.patch.object(stats, "recount") as recount, mock.patch.object(stats, "_shift") as shift:
+            company.save(update_fields=["name"])
+        recount.assert_not_called()
+        shift.assert_not_called()
+        self.assertEqual(company.get_deferred_fields() & set(stats.TRACKED_FIELDS), set(stats.TRACKED_FIELDS))
+
+
+class CompanySaveTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="Компания", website="https://www.Shop.com/")
+
+    def test_new_company_gets_client_id_and_keys(self):
+        self.assertTrue(self.company.client_id)
+        self.assertEqual(self.company.website_key, "shop.com")
+
+    def test_update_fields_recompute_only_their_keys(self):
+        company = Company.objects.only("id", "name").get(pk=self.company.pk)
+        company.name = "Новая"
+        with self.assertNumQueries(1):
+            company.save(update_fields=["name"])
+
+        company = Company.objects.only("id", "website").get(pk=self.company.pk)
+        company.website = "https://other.com/"
+        company.save(update_fields=["website"])
+        self.assertEqual(Company.objects.get(pk=self.company.pk).website_key, "other.com")
+
+    def test_full_save_of_deferred_instance_does_not_load_columns(self):
+        company = Company.objects.only("id", "name").get(pk=self.company.pk)
+        company.name = "Новая"
+        with self.assertNumQueries(1):
+            company.save()
+
+
+class CompanyQueryTests(TestCase):
+    def setUp(self):
+        self.new, self.closed = Status.objects.order_by("pk")[:2]
+        self.first = Company.objects.create(name="Первая", status=self.new)
+        self.second = Company.objects.create(name="Вторая", status=self.closed)
+
+    def _names(self, query_string: str) -> tuple[set[str], dict]:
+        query = CompanyQuery.from_params(QueryDict(query_string))
+        return {company.name for company in query.queryset()}, query.errors
+
+    def test_status_names(self):
+        self.assertEqual(self._names(f"status={self.new.name}"), ({"Первая"}, {}))
+        self.assertEqual(
+            self._names(f"status={self.new.name}&status={self.closed.name}"), ({"Первая", "Вторая"}, {})
+        )
+
+    def test_unknown_name_gives_empty_result(self):
+        self.assertEqual(self._names("status=Нет такого"), (set(), {}))
+        self.assertEqual(self._names("city=Атлантида"), (set(), {}))
+
+    def test_equivalent_params_share_cache_key(self):
+        first = CompanyQuery.from_params(QueryDict(f"status={self.new.name}&status={self.closed.name}&search="))
+        second = CompanyQuery.from_params(QueryDict(f"status={self.closed.name}&status=%20{self.new.name}"))
+        self.assertEqual(first.cache_key, second.cache_key)
+
+
+class UpsertCompaniesTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="Компания", website="https://shop.com/")
+        CompanyPhone.objects.create(company=self.company, number="+380671112233", is_favorite=True)
+
+    def test_create_assigns_client_id(self):
+        [result] = bulk.upsert_companies([{"name": "Новая", "phones": [{"number": "+380501112233"}]}])
+        self.assertEqual(result["status"], bulk.STATUS_CREATED)
+        company = Company.objects.get(pk=result["id"])
+        self.assertEqual(company.client_id, result["client_id"])
+        self.assertGreater(company.client_id, self.company.client_id)
+        self.assertEqual(list(company.phones.values_list("number_key", "is_favorite")), [("380501112233", True)])
+
+    def test_update_by_client_id(self):
+        [result] = bulk.upsert_companies([{"client_id": self.company.client_id, "name": "Переименована"}])
+        self.assertEqual((result["status"], result["id"]), (bulk.STATUS_UPDATED, self.company.pk))
+        self.company.refresh_from_db()
+        self.assertEqual(self.company.name, "Переименована")
+        # Телефони не передано — лишаються як були
+        self.assertEqual(self.company.phones.count(), 1)
+
+    def test_update_by_contact_key(self):
+        [result] = bulk.upsert_companies([
+            {"name": "Компания", "phones": [{"number": "067 111-22-33"}, {"number": "+380501112233"}]},
+        ])
+        self.assertEqual((result["status"], result["id"]), (bulk.STATUS_UPDATED, self.company.pk))
+        self.assertEqual(
+            sorted(self.company.phones.values_list("number_key", flat=True)), ["380501112233", "380671112233"]
+        )
+
+    def test_contacts_of_several_companies_are_ambiguous(self):
+        Company.objects.create(name="Другая", telegram="@other")
+        [result] = bulk.upsert_companies([
+            {"name": "Смесь", "telegram": "t.me/other", "phones": [{"number": "+380671112233"}]},
+        ])
+        self.assertEqual(result["status"], bulk.STATUS_ERROR)
+        self.assertIn("non_field_errors", result["errors"])
+
+    def test_unknown_client_id_is_rejected(self):
+        [result] = bulk.upsert_companies([
+            {"client_id": "#99999", "name": "Новая", "phones": [{"number": "+380501112233"}]},
+        ])
+        self.assertEqual(result["status"], bulk.STATUS_ERROR)
+        self.assertIn("client_id", result["errors"])
+        self.assertFalse(Company.objects.filter(client_id="#99999").exists())
+
+    def test_same_company_twice_in_batch(self):
+        results = bulk.upsert_companies([
+            {"client_id": self.company.client_id, "name": "Раз"},
+            {"name": "Два", "website": "shop.com", "phones": [{"number": "+380501112233"}]},
+        ])
+        self.assertEqual([result["status"] for result in results], [bulk.STATUS_UPDATED, bulk.STATUS_ERROR])
+
+
+class SyncCompanyRowsTests(TestCase):
+    def setUp(self):
+        self.company = Company.objects.create(name="Компания")
+        self.first = CompanyPhone.objects.create(company=self.company, number="+380671112233", is_favorite=True)
+        self.second = CompanyPhone.objects.create(company=self.company, number="+380501112233", contact_name="Иван")
+
+    def _sync(self, phones: list[dict]) -> set[int]:
+        return bulk.sync_company_rows(
+            CompanyPhone, {self.company.pk: bulk.desired_phones(phones)}, "number", bulk.PHONE_FIELDS
+        )
+
+    def _rows(self) -> list[tuple]:
+        return list(self.company.phones.order_by("id").values_list("id", "number", "contact_name", "is_favorite"))
+
+    def test_unchanged_rows_write_nothing(self):
+        rows = self._rows()
+        with self.assertNumQueries(1):
+            changed = self._sync([
+                {"number": "+380671112233", "is_favorite": True},
+                {"number": "+380501112233", "contact_name": "Иван"},
+            ])
+        self.assertEqual((changed, self._rows()), (set(), rows))
+
+    def test_match_by_number_keeps_primary_keys(self):
+        changed = self._sync([
+            {"number": "+380501112233", "contact_name": "Петр", "is_favorite": True},
+            {"number": "+380671112233"},
+        ])
+        self.assertEqual(changed, {self.company.pk})
+        self.assertEqual(self._rows(), [
+            (self.first.pk, "+380671112233", "", False),
+            (self.second.pk, "+380501112233", "Петр", True),
+        ])
+
+    def test_edited_number_reuses_row_and_extra_rows_are_deleted(self):
+        self._sync([{"number": "+38 (067) 111-22-44"}])
+        self.assertEqual(self._rows(), [(self.first.pk, "+380671112244", "", True)])
+        self.assertEqual(CompanyPhone.objects.get(pk=self.first.pk).number_key, "380671112244")
+
+    def test_new_rows_are_created(self):
+        self._sync([
+            {"number": "+380671112233"},
+            {"number": "+380501112233", "contact_name": "Иван"},
+            {"number": "+380931112233"},
+        ])
+        self.assertEqual([row[1] for row in self._rows()], ["+380671112233", "+380501112233", "+380931112233"])
+
+    def test_addresses(self):
+        CompanyAddress.objects.create(company=self.company, address="ул. Первая, 1", is_favorite=True)
+        bulk.sync_company_rows(
+            CompanyAddress,
+            {self.company.pk: bulk.desired_addresses([{"address": " ул. Вторая, 2 "}])},
+            "address",
+            bulk.ADDRESS_FIELDS,
+        )
+        self.assertEqual(list(self.company.addresses.values_list("address", "is_favorite")), [("ул. Вторая, 2", True)])
+
+
+class KeysetPaginatorTests(TestCase):
+    ORDERING = ["-updated_at", "-id"]
+
+    def setUp(self):
+        now = timezone.now()
+        companies = [Company.objects.create(name=f"Компания {index}") for index in range(7)]
+        # Пари з однаковим updated_at: порядок у межах пари визначає id
+        for index, company in enumerate(companies):
+            Company.objects.filter(pk=company.pk).update(updated_at=now - timedelta(minutes=index // 2))
+        self.expected = list(
+            Company.objects.order_by(*self.ORDERING).values_list("pk", flat=True)
+        )
+        self.paginator = pagination.KeysetPaginator(Company.objects.all(), self.ORDERING, per_page=3)
+
+    def _ids(self, page) -> list[int]:
+        return [company.pk for company in page]
+
+    def test_forward_pages_cover_all_rows_once(self):
+        first = self.paginator.get_page(None)
+        second = self.paginator.get_page(first.next_cursor)
+        third = self.paginator.get_page(second.next_cursor)
+        self.assertEqual(self._ids(first) + self._ids(second) + self._ids(third), self.expected)
+        self.assertFalse(first.has_previous)
+        self.assertTrue(second.has_previous and second.has_next)
+        self.assertFalse(third.has_next)
+
+    def test_previous_cursor_returns_same_page(self):
+        first = self.paginator.get_page(None)
+        second = self.paginator.get_page(first.next_cursor)
+        third = self.paginator.get_page(second.next_cursor)
+        back = self.paginator.get_page(third.previous_cursor)
+        self.assertEqual(self._ids(back), self._ids(second))
+        self.assertEqual(back.next_cursor, second.next_cursor)
+        start = self.paginator.get_page(back.previous_cursor)
+        self.assertEqual(self._ids(start), self._ids(first))
+        self.assertFalse(start.has_previous)
+
+    def test_invalid_cursor_gives_first_page(self):
+        first = self._ids(self.paginator.get_page(None))
+        for cursor in ("not-a-cursor", pagination.encode_cursor([1], "next"), pagination.encode_cursor([1, 2], "up")):
+            self.assertEqual(self._ids(self.paginator.get_page(cursor)), first)
+        with self.assertRaises(pagination.InvalidCursor):
+            pagination.decode_cursor("not-a-cursor", 2)
+
+    def test_cursor_with_wrong_value_types_gives_first_page(self):
+        first = self._ids(self.paginator.get_page(None))
+        for values in (
+            [False, "x"],
+            [{"dt": "2020-01-01T00:00:00+00:00"}, "y"],
+            [[1], 1],
+            [{"d": "2020-01-01"}, {"dt": "2020-01-01T00:00:00+00:00"}],
+        ):
+            for direction in ("next", "prev"):
+                cursor = pagination.encode_cursor(values, direction)
+                self.assertEqual(self._ids(self.paginator.get_page(cursor)), first, (values, direction))
+
+    def test_list_ordering_rejects_bad_cursor_values(self):
+        companies, ordering = CompanyQuery.from_params(QueryDict()).for_list(user=0)
+        paginator = pagination.KeysetPaginator(companies, ordering, per_page=3)
+        first = self._ids(paginator.get_page(None))
+        for values in ([False, None, "x", "y"], [[1], None, 1, 1], [0, None, {"dt": "2020-01-01T00:00:00"}, "y"]):
+            cursor = pagination.encode_cursor(values, "next")
+            self.assertEqual(self._ids(paginator.get_page(cursor)), first, values)
+
+
+class JobHeartbeatTests(TransactionTestCase):
+    # Потік heartbeat пише через власне з'єднання, тож потрібні справжні коміти
+    serialized_rollback = True
+
+    def test_heartbeat_is_written_while_handler_runs_without_progress(self):
+        stale = timezone.now() - jobs.STALE_AFTER * 2
+        job = Job.objects.create(kind="slow", status=Job.STATUS_RUNNING, worker="test:1", heartbeat_at=stale)
+        beats = []
+
+        def slow(job, progress):
+            deadline = time.monotonic() + 5
+            while not beats and time.monotonic() < deadline:
+                time.sleep(0.02)
+                if Job.objects.get(pk=job.pk).heartbeat_at > stale:
+                    beats.append(True)
+            # Задача не вважається покинутою, хоча progress() не викликався
+            beats.append(jobs.requeue_stale())
+            return {}
+
+        with mock.patch.dict(jobs.HANDLERS, {"slow": slow}), mock.patch.object(jobs, "HEARTBEAT_INTERVAL", 0.05):
+            jobs.run_job(job)
+        self.assertEqual(beats, [True, 0])
+        self.assertEqual(Job.objects.get(pk=job.pk).status, Job.STATUS_DONE)
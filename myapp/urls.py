@@ -2,14 +2,24 @@
 URL Configuration для CRM Nice
 """
 
-from django.urls import path
-from . import views
+from django.urls import include, path
+from drf_spectacular.views import SpectacularAPIView
+from rest_framework.routers import DefaultRouter
+
+from . import api, views
 
 app_name = 'myapp'
 
+api_router = DefaultRouter()
+api_router.register('companies', api.CompanyViewSet, basename='api-company')
+
 urlpatterns = [
     # Компанії
     path('companies/', views.company_list, name='company_list'),
+    path('companies/export/', views.company_bulk_export, name='company_bulk_export'),
+    path('jobs/<int:pk>/', views.job_status, name='job_status'),
+    path('jobs/<int:pk>/download/', views.job_download, name='job_download'),
+    path('companies/import/', views.company_import, name='company_import'),
     path('companies/add/', views.company_create, name='company_create'),
     path('companies/<int:pk>/', views.company_detail, name='company_detail'),
     path('companies/<int:pk>/edit/', views.company_edit, name='company_edit'),
@@ -26,6 +36,10 @@ urlpatterns = [
     path('api/cities-by-country/', views.get_cities_by_country, name='get_cities_by_country'),
     path('api/change-country/', views.change_user_country, name='change_country'),
     
+    # REST API
+    path('api/v1/', include(api_router.urls)),
+    path('api/v1/schema/', SpectacularAPIView.as_view(), name='api_schema'),
+    
     # Налаштування
     path('settings/', views.settings_dashboard, name='settings_dashboard'),
     path('settings/countries/', views.settings_countries, name='settings_countries'),
@@ -56,6 +70,7 @@ urlpatterns = [
     path('settings/statuses/<int:pk>/update/', views.status_update, name='status_update'),
     path('settings/statuses/<int:pk>/delete/', views.settings_status_delete, name='settings_status_delete'),
     path('settings/statuses/<int:pk>/delete/confirm/', views.status_delete, name='status_delete'),
+    path('settings/duplicates/', views.settings_duplicates, name='settings_duplicates'),
     path('settings/users/', views.settings_users, name='settings_users'),
     path('settings/users/add/', views.settings_user_add, name='settings_user_add'),
     path('settings/users/create/', views.user_create, name='user_create'),
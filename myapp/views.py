@@ -9,42 +9,32 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.core.exceptions import ObjectDoesNotExist
 from django.core.paginator import Paginator
-from django.db.models import Count, Q, Case, When, Value, DateTimeField, IntegerField
-from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.db import transaction
+from django.db.models import CharField, Count, Max, Value
+from django.http import FileResponse, Http404, HttpRequest, HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils import timezone
 from django.views.decorators.http import require_http_methods
-from datetime import timedelta
 
+from . import bulk, duplicates, exports, images, imports, jobs, page_cache, reference_data, stats
 from .decorators import super_admin_required, manager_or_super_admin_required, is_htmx_request
 from .forms import CategoryForm, CityForm, CompanyForm, CountryForm, LoginForm, StatusForm, UserProfileForm
-from .models import Category, City, Company, CompanyAddress, CompanyComment, CompanyPhone, Country, Status, UserProfile, UserFavoriteCompany
+from .models import Category, City, Company, CompanyAddress, CompanyComment, CompanyPhone, CompanyPhoto, Country, Job, Status, UserProfile, UserFavoriteCompany
+from .normalization import COMPANY_CONTACT_KEYS, normalize_phone_number, phone_key
+from .queries import CompanyQuery
+from .signals import companies_bulk_changed
 
 
-# ============================================================================
-# Context Processors
-# ============================================================================
+COMPANIES_PER_PAGE = 100
 
-def countries_context(request):
-    """Додає список країн в контекст для всіх шаблонів"""
-    return {
-        'countries': Country.objects.all().order_by('name')
-    }
+# Скільки кластерів дублікатів показувати на сторінці налаштувань
+DUPLICATE_CLUSTERS_PER_PAGE = 100
 
 
 # ============================================================================
 # Utility Functions
 # ============================================================================
 
-def normalize_phone_number(phone: str) -> str:
-    """Нормалізує телефонний номер: видаляє пробіли, дефіси, дужки."""
-    if not phone:
-        return phone
-    return phone.replace(' ', '').replace('-', '').replace('(', '').replace(')', '')
-
-
-# ============================================================================
-
 def _process_company_phones(company: Company, phones_data: list, contact_names: list, favorite_phone_index: str | None) -> None:
     """Обробка телефонів компанії при створенні/оновленні."""
     # Фільтруємо порожні телефони та нормалізуємо
@@ -54,29 +44,23 @@ def _process_company_phones(company: Company, phones_data: list, contact_names:
     if not valid_phones:
         raise ValueError("Компанія повинна мати хоча б один телефон")
     
-    # Видаляємо старі телефони
-    CompanyPhone.objects.filter(company=company).delete()
-    
-    # Створюємо нові телефони
-    favorite_index = int(favorite_phone_index) if favorite_phone_index and favorite_phone_index.isdigit() else None
+    # Якщо favorite_phone не вказано, обраним стає перший телефон
+    favorite_index = int(favorite_phone_index) if favorite_phone_index and favorite_phone_index.isdigit() else 0
     
-    for index, phone in enumerate(valid_phones):
-        contact_name = contact_names[index] if index < len(contact_names) else ''
-        is_favorite = (favorite_index is not None and index == favorite_index)
-        
-        CompanyPhone.objects.create(
-            company=company,
-            number=phone,
-            contact_name=contact_name.strip(),
-            is_favorite=is_favorite
-        )
+    desired = [
+        {
+            'number': phone,
+            'number_key': phone_key(phone),
+            'contact_name': (contact_names[index] if index < len(contact_names) else '').strip(),
+            'is_favorite': index == favorite_index,
+        }
+        for index, phone in enumerate(valid_phones)
+    ]
     
-    # Якщо вказано favorite_phone, але він не встановлений, встановлюємо перший телефон як favorite
-    if favorite_index is None and valid_phones:
-        first_phone = CompanyPhone.objects.filter(company=company).first()
-        if first_phone:
-            first_phone.is_favorite = True
-            first_phone.save()
+    with transaction.atomic():
+        changed = bulk.sync_company_rows(CompanyPhone, {company.pk: desired}, 'number', bulk.PHONE_FIELDS)
+        if changed:
+            companies_bulk_changed.send(sender=CompanyPhone, company_ids=[company.pk])
 
 
 def _process_company_addresses(company: Company, addresses_data: list, favorite_address_index: str | None) -> None:
@@ -84,71 +68,98 @@ def _process_company_addresses(company: Company, addresses_data: list, favorite_
     # Фільтруємо порожні адреси
     valid_addresses = [addr.strip() for addr in addresses_data if addr.strip()]
     
-    # Видаляємо старі адреси
-    CompanyAddress.objects.filter(company=company).delete()
+    # Якщо favorite_address не вказано, обраною стає перша адреса
+    favorite_index = int(favorite_address_index) if favorite_address_index and favorite_address_index.isdigit() else 0
     
-    # Створюємо нові адреси
-    favorite_index = int(favorite_address_index) if favorite_address_index and favorite_address_index.isdigit() else None
+    desired = [
+        {'address': address, 'is_favorite': index == favorite_index}
+        for index, address in enumerate(valid_addresses)
+    ]
     
-    for index, address in enumerate(valid_addresses):
-        is_favorite = (favorite_index is not None and index == favorite_index)
-        
-        CompanyAddress.objects.create(
-            company=company,
-            address=address.strip(),
-            is_favorite=is_favorite
-        )
-    
-    # Якщо вказано favorite_address, але він не встановлений, встановлюємо першу адресу як favorite
-    if favorite_index is None and valid_addresses:
-        first_address = CompanyAddress.objects.filter(company=company).first()
-        if first_address:
-            first_address.is_favorite = True
-            first_address.save()
+    with transaction.atomic():
+        changed = bulk.sync_company_rows(CompanyAddress, {company.pk: desired}, 'address', bulk.ADDRESS_FIELDS)
+        if changed:
+            companies_bulk_changed.send(sender=CompanyAddress, company_ids=[company.pk])
+
+
+# Дозволені розширення та розмір фото
+PHOTO_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.gif', '.webp']
+MAX_PHOTO_SIZE = 10 * 1024 * 1024  # 10 MB
 
 
 def _process_company_photos(company: Company, photos_files) -> None:
-    """Обробка фотографій компанії при створенні/оновленні."""
+    """Обробка фотографій компанії при створенні/оновленні.
+
+    Файли пишуться у сховище частинами, для кожного будуються WebP-копії (myapp.images);
+    кожне фото — окремий рядок CompanyPhoto.
+    """
     if not photos_files:
         return
     
-    from django.core.files.storage import default_storage
-    from django.core.files.base import ContentFile
     import os
-    from django.utils import timezone
-    
-    # Валідація типів файлів
-    ALLOWED_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.gif', '.webp']
-    MAX_FILE_SIZE = 10 * 1024 * 1024  # 10 MB
     
-    photos_list = company.photos if company.photos else []
+    position = company.photos.aggregate(last=Max('position'))['last']
+    position = -1 if position is None else position
     
     for photo_file in photos_files:
         # Валідація розміру файлу
-        if photo_file.size > MAX_FILE_SIZE:
+        if photo_file.size > MAX_PHOTO_SIZE:
             raise ValueError(f'Файл "{photo_file.name}" занадто великий. Максимальний розмір: 10 MB')
         
         # Валідація розширення
         file_ext = os.path.splitext(photo_file.name)[1].lower()
-        if file_ext not in ALLOWED_EXTENSIONS:
-            raise ValueError(f'Файл "{photo_file.name}" має недозволений формат. Дозволені: {", ".join(ALLOWED_EXTENSIONS)}')
-        
-        # Генеруємо унікальне ім'я файлу
-        timestamp = int(timezone.now().timestamp())
-        file_name = f"companies/photos/{company.id}_{timestamp}_{len(photos_list)}{file_ext}"
-        
-        # Читаємо вміст файлу
-        photo_file.seek(0)  # Повертаємося на початок файлу
-        file_content = photo_file.read()
-        
-        # Зберігаємо файл
-        saved_path = default_storage.save(file_name, ContentFile(file_content))
+        if file_ext not in PHOTO_EXTENSIONS:
+            raise ValueError(f'Файл "{photo_file.name}" має недозволений формат. Дозволені: {", ".join(PHOTO_EXTENSIONS)}')
         
-        # Додаємо URL до списку
-        photos_list.append(default_storage.url(saved_path))
-    
-    company.photos = photos_list
-    company.save()
+        photo = images.save_image(photo_file, f'{images.PHOTOS_DIR}/{company.pk}')
+        # Той самий файл (той самий хеш) вдруге не додаємо
+        if company.photos.filter(file=photo['path']).exists():
+            continue
+        position += 1
+        CompanyPhoto.objects.create(
+            company=company,
+            file=photo['path'],
+            renditions=photo['renditions'],
+            position=position,
+            width=photo['width'],
+            height=photo['height'],
+            size=photo['size'],
+        )
+
+
+def _process_company_logo(company: Company) -> None:
+    """WebP-копії щойно завантаженого логотипу (копії попереднього видаляються)."""
+    previous = set(company.logo_renditions.values())
+    company.logo_renditions = {}
+    if company.logo:
+        with company.logo.open('rb') as logo:
+            company.logo_renditions = images.renditions_for(logo, f'{images.LOGOS_DIR}/{company.pk}')
+    company.save(update_fields=['logo_renditions'])
+    images.delete_files(*(previous - set(company.logo_renditions.values())))
+
+
+def _user_country(request):
+    """Країна, призначена користувачу, або None."""
+    if not request.user.is_authenticated:
+        return None
+    try:
+        user_profile = request.user.userprofile
+    except (AttributeError, ObjectDoesNotExist):
+        return None  # Користувач не має профілю
+    return user_profile.country if user_profile else None
+
+
+def _company_form_context(request, **extra) -> dict:
+    """Контекст форми компанії: довідники з кешу (див. myapp.reference_data)."""
+    user_country = _user_country(request)
+    return {
+        'cities': reference_data.city_choices(user_country),
+        'categories': reference_data.category_choices(),
+        'statuses': reference_data.status_choices(),
+        'countries': reference_data.get_countries(),
+        'user_country': user_country,
+        **extra,
+    }
 
 
 @login_required
@@ -167,151 +178,45 @@ def company_list(request):
     call_date_from = request.GET.get('call_date_from', '')
     call_date_to = request.GET.get('call_date_to', '')
     
-    # Отримуємо всі компанії з БД
-    companies_queryset = Company.objects.select_related('city', 'category', 'status').prefetch_related('phones', 'addresses').all()
+    user_country = _user_country(request)
+    query = CompanyQuery.from_params(request.GET, user_country)
     
-    # Фільтрація по країні користувача (якщо призначена)
-    if request.user.is_authenticated:
-        try:
-            user_profile = request.user.userprofile
-            if user_profile and user_profile.country:
-                user_country = user_profile.country
-                companies_queryset = companies_queryset.filter(city__country=user_country)
-        except (AttributeError, ObjectDoesNotExist):
-            pass  # Користувач не має профілю або країни
-    
-    # Фільтрація по пошуковому запиту
-    if search_query:
-        # Нормалізація номера телефону (видалити пробіли, дефіси, дужки)
-        normalized_query = search_query.replace(' ', '').replace('-', '').replace('(', '').replace(')', '')
-        # Нормалізація для Instagram/Telegram (видалити @)
-        normalized_social = search_query.lstrip('@')
-        
-        companies_queryset = companies_queryset.filter(
-            Q(name__icontains=search_query) |
-            Q(short_comment__icontains=search_query) |
-            Q(client_id__icontains=search_query) |
-            Q(city__name__icontains=search_query) |
-            Q(category__name__icontains=search_query) |
-            Q(keywords__icontains=search_query) |
-            Q(phones__number__icontains=normalized_query) |
-            Q(phones__contact_name__icontains=search_query) |
-            Q(instagram__icontains=normalized_social) |
-            Q(website__icontains=search_query) |
-            Q(telegram__icontains=normalized_social) |
-            Q(addresses__address__icontains=search_query)
-        ).distinct()
-    
-    # Фільтрація по статусу
-    if status_filter:
-        companies_queryset = companies_queryset.filter(status__name__in=status_filter)
-    
-    # Фільтрація по місту
-    if city_filter:
-        companies_queryset = companies_queryset.filter(city__name__in=city_filter)
-    
-    # Фільтрація по розділу
-    if category_filter:
-        try:
-            category_id = int(category_filter)
-            companies_queryset = companies_queryset.filter(category_id=category_id)
-        except ValueError:
-            companies_queryset = companies_queryset.filter(category__name=category_filter)
+    # Сортування: спочатку обрані (favorite) для поточного користувача, потім за датою додавання в обране.
+    companies_queryset, ordering = query.for_list(request.user)
     
-    # Фільтрація по даті оновлення (from-to)
-    if date_updated_from:
-        try:
-            from datetime import datetime
-            date_from = datetime.strptime(date_updated_from, '%Y-%m-%d').date()
-            companies_queryset = companies_queryset.filter(updated_at__date__gte=date_from)
-        except ValueError:
-            pass  # Ігноруємо невалідні дати
-    if date_updated_to:
-        try:
-            from datetime import datetime
-            date_to = datetime.strptime(date_updated_to, '%Y-%m-%d').date()
-            companies_queryset = companies_queryset.filter(updated_at__date__lte=date_to)
-        except ValueError:
-            pass  # Ігноруємо невалідні дати
+    # Нові компанії за останні 30 днів (кешований лічильник, див. myapp.stats)
+    new_count = stats.new_companies_count()
     
-    # Фільтрація по даті дзвінка (from-to)
-    if call_date_from:
-        try:
-            from datetime import datetime
-            date_from = datetime.strptime(call_date_from, '%Y-%m-%d').date()
-            companies_queryset = companies_queryset.filter(call_date__gte=date_from)
-        except ValueError:
-            pass  # Ігноруємо невалідні дати
-    if call_date_to:
-        try:
-            from datetime import datetime
-            date_to = datetime.strptime(call_date_to, '%Y-%m-%d').date()
-            companies_queryset = companies_queryset.filter(call_date__lte=date_to)
-        except ValueError:
-            pass  # Ігноруємо невалідні дати
-    
-    # Сортування: спочатку обрані (favorite) для поточного користувача, потім за датою додавання в обране
-    favorite_dates = {}
-    favorite_company_ids = []
-    if request.user.is_authenticated:
-        favorite_dates = dict(
-            UserFavoriteCompany.objects.filter(user=request.user)
-            .values_list('company_id', 'created_at')
-        )
-        favorite_company_ids = list(favorite_dates.keys())
-    
-    # Сортуємо: спочатку обрані, серед обраних - остання додана в обране перша, потім за датою оновлення
-    companies_queryset = companies_queryset.annotate(
-        is_favorite=Case(
-            When(id__in=favorite_company_ids, then=1),
-            default=0,
-            output_field=IntegerField()
-        ),
-        favorite_date=Case(
-            *[When(id=cid, then=Value(fdate)) for cid, fdate in favorite_dates.items()],
-            default=None,
-            output_field=DateTimeField()
+    # Пагінація: курсорна за замовчуванням, нумерація сторінок — для старих посилань з ?page=
+    if 'page' in request.GET:
+        paginator = Paginator(companies_queryset, COMPANIES_PER_PAGE)
+        page_obj = paginator.get_page(request.GET.get('page', 1))
+        total_count, total_is_estimate = paginator.count, False
+    else:
+        # Id сторінки кешуються для тих самих фільтрів (див. myapp.page_cache)
+        page_obj, total_count, total_is_estimate = page_cache.keyset_page(
+            query, request.user, companies_queryset, ordering, request.GET.get('cursor'), COMPANIES_PER_PAGE
         )
-    ).order_by('-is_favorite', '-favorite_date', '-updated_at')
     
-    # Підрахунок нових компаній за останні 30 днів
-    thirty_days_ago = timezone.now() - timedelta(days=30)
-    new_count = Company.objects.filter(created_at__gte=thirty_days_ago).count()
+    # Параметри фільтрів без пагінації — для посилань "Назад"/"Вперед"
+    pagination_params = request.GET.copy()
+    pagination_params.pop('page', None)
+    pagination_params.pop('cursor', None)
     
-    # Пагінація
-    paginator = Paginator(companies_queryset, 100)  # 100 компаній на сторінку
-    page_number = request.GET.get('page', 1)
-    page_obj = paginator.get_page(page_number)
-    
-    # Отримуємо унікальні значення для фільтрів
-    all_statuses = Status.objects.all().order_by('name')
-    
-    # Фільтрування міст по країні користувача
-    all_cities = City.objects.all()
-    if request.user.is_authenticated:
-        try:
-            user_profile = request.user.userprofile
-            if user_profile and user_profile.country:
-                all_cities = all_cities.filter(country=user_profile.country)
-        except (AttributeError, ObjectDoesNotExist):
-            pass
-    all_cities = all_cities.order_by('name')
-    
-    all_categories = Category.objects.all().order_by('name')
-    
-    # Встановлюємо favorite_company_ids як set для передачі в контекст (для шаблону)
-    if isinstance(favorite_company_ids, list):
-        favorite_company_ids = set(favorite_company_ids)
+    # Обрані компанії на поточній сторінці (для шаблону)
+    favorite_company_ids = {company.id for company in page_obj if company.is_favorite}
     
     context = {
         'companies': page_obj,
         'page_obj': page_obj,
-        'total_count': paginator.count,
+        'total_count': total_count,
+        'total_is_estimate': total_is_estimate,
+        'pagination_query': pagination_params.urlencode(),
         'new_count': new_count,
         'search_query': search_query,
-        'all_statuses': all_statuses,
-        'all_cities': all_cities,
-        'all_categories': all_categories,
+        'all_statuses': reference_data.status_choices(),
+        'all_cities': reference_data.city_choices(user_country),
+        'all_categories': reference_data.category_choices(),
         'selected_statuses': status_filter,
         'selected_cities': city_filter,
         'selected_category': category_filter,
@@ -340,13 +245,17 @@ def company_create(request):
         
         if form.is_valid():
             try:
-                company = form.save()
-                _process_company_phones(company, phones_data, contact_names, favorite_phone_index)
-                if addresses_data:
-                    _process_company_addresses(company, addresses_data, favorite_address_index)
-                # Обробка photos
-                if 'photos' in request.FILES:
-                    _process_company_photos(company, request.FILES.getlist('photos'))
+                # Компанія, телефони, адреси і фото зберігаються разом або не зберігаються взагалі
+                with transaction.atomic():
+                    company = form.save()
+                    _process_company_phones(company, phones_data, contact_names, favorite_phone_index)
+                    if addresses_data:
+                        _process_company_addresses(company, addresses_data, favorite_address_index)
+                    if 'logo' in request.FILES:
+                        _process_company_logo(company)
+                    # Обробка photos
+                    if 'photos' in request.FILES:
+                        _process_company_photos(company, request.FILES.getlist('photos'))
                 messages.success(request, f'Компанія "{company.name}" успішно створена.')
                 if is_htmx_request(request):
                     return redirect('myapp:company_list')
@@ -355,12 +264,7 @@ def company_create(request):
                 messages.error(request, str(e))
                 # Повертаємо форму з помилкою
                 template = 'companies/create_content.html' if is_htmx_request(request) else 'companies/create.html'
-                context = {
-                    'form': form,
-                    'cities': City.objects.all().order_by('name'),
-                    'categories': Category.objects.all().order_by('name'),
-                    'statuses': Status.objects.all().order_by('name'),
-                }
+                context = _company_form_context(request, form=form)
                 return render(request, template, context, status=400)
         else:
             # Форма невалідна - показуємо помилки
@@ -368,35 +272,8 @@ def company_create(request):
     else:
         form = CompanyForm()
     
-    # Фільтрація міст по країні користувача
-    cities_queryset = City.objects.all()
-    if request.user.is_authenticated:
-        try:
-            user_profile = request.user.userprofile
-            if user_profile and user_profile.country:
-                cities_queryset = cities_queryset.filter(country=user_profile.country)
-        except (AttributeError, ObjectDoesNotExist):
-            pass  # Користувач не має профілю або країни
-    
-    # Отримуємо країну користувача для контексту
-    user_country = None
-    if request.user.is_authenticated:
-        try:
-            user_profile = getattr(request.user, 'userprofile', None)
-            if user_profile and user_profile.country:
-                user_country = user_profile.country
-        except (AttributeError, ObjectDoesNotExist):
-            pass
-    
     template = 'companies/create_content.html' if is_htmx_request(request) else 'companies/create.html'
-    context = {
-        'form': form,
-        'cities': cities_queryset.order_by('name'),
-        'categories': Category.objects.all().order_by('name'),
-        'statuses': Status.objects.all().order_by('name'),
-        'countries': Country.objects.all().order_by('name'),
-        'user_country': user_country,
-    }
+    context = _company_form_context(request, form=form)
     return render(request, template, context)
 
 
@@ -405,7 +282,7 @@ def company_create(request):
 def company_detail(request, pk):
     """Карточка компанії"""
     company = get_object_or_404(
-        Company.objects.select_related('city', 'category', 'status').prefetch_related('phones', 'comments', 'addresses'),
+        Company.objects.select_related('city__country', 'category', 'status').prefetch_related('phones', 'comments', 'addresses', 'photos'),
         pk=pk
     )
     
@@ -459,13 +336,17 @@ def company_edit(request, pk):
         
         if form.is_valid():
             try:
-                company = form.save()
-                _process_company_phones(company, phones_data, contact_names, favorite_phone_index)
-                if addresses_data:
-                    _process_company_addresses(company, addresses_data, favorite_address_index)
-                # Обробка photos
-                if 'photos' in request.FILES:
-                    _process_company_photos(company, request.FILES.getlist('photos'))
+                # Компанія, телефони, адреси і фото зберігаються разом або не зберігаються взагалі
+                with transaction.atomic():
+                    company = form.save()
+                    _process_company_phones(company, phones_data, contact_names, favorite_phone_index)
+                    if addresses_data:
+                        _process_company_addresses(company, addresses_data, favorite_address_index)
+                    if 'logo' in request.FILES:
+                        _process_company_logo(company)
+                    # Обробка photos
+                    if 'photos' in request.FILES:
+                        _process_company_photos(company, request.FILES.getlist('photos'))
                 messages.success(request, f'Компанія "{company.name}" успішно оновлена.')
                 if is_htmx_request(request):
                     return redirect('myapp:company_list')
@@ -474,14 +355,7 @@ def company_edit(request, pk):
                 messages.error(request, str(e))
                 # Повертаємо форму з помилкою
                 template = 'companies/edit_content.html' if is_htmx_request(request) else 'companies/edit.html'
-                context = {
-                    'form': form,
-                    'company': company,
-                    'company_id': pk,
-                    'cities': City.objects.all().order_by('name'),
-                    'categories': Category.objects.all().order_by('name'),
-                    'statuses': Status.objects.all().order_by('name'),
-                }
+                context = _company_form_context(request, form=form, company=company, company_id=pk)
                 return render(request, template, context, status=400)
         else:
             # Форма невалідна - показуємо помилки
@@ -489,37 +363,8 @@ def company_edit(request, pk):
     else:
         form = CompanyForm(instance=company)
     
-    # Фільтрація міст по країні користувача
-    cities_queryset = City.objects.all()
-    if request.user.is_authenticated:
-        try:
-            user_profile = request.user.userprofile
-            if user_profile and user_profile.country:
-                cities_queryset = cities_queryset.filter(country=user_profile.country)
-        except (AttributeError, ObjectDoesNotExist):
-            pass  # Користувач не має профілю або країни
-    
-    # Отримуємо країну користувача для контексту
-    user_country = None
-    if request.user.is_authenticated:
-        try:
-            user_profile = getattr(request.user, 'userprofile', None)
-            if user_profile and user_profile.country:
-                user_country = user_profile.country
-        except (AttributeError, ObjectDoesNotExist):
-            pass
-    
     template = 'companies/edit_content.html' if is_htmx_request(request) else 'companies/edit.html'
-    context = {
-        'form': form,
-        'company': company,
-        'company_id': pk,
-        'cities': cities_queryset.order_by('name'),
-        'categories': Category.objects.all().order_by('name'),
-        'statuses': Status.objects.all().order_by('name'),
-        'countries': Country.objects.all().order_by('name'),
-        'user_country': user_country,
-    }
+    context = _company_form_context(request, form=form, company=company, company_id=pk)
     return render(request, template, context)
 
 
@@ -614,8 +459,10 @@ def company_delete_logo(request, pk):
     company = get_object_or_404(Company, pk=pk)
     
     if company.logo:
-        company.logo.delete()
+        images.delete_files(*company.logo_renditions.values())
+        company.logo.delete(save=False)
         company.logo = None
+        company.logo_renditions = {}
         company.save()
     
     # Повертаємо оновлений HTML без перезавантаження
@@ -628,27 +475,15 @@ def company_delete_logo(request, pk):
 def company_delete_photo(request, pk):
     """AJAX endpoint для видалення фото"""
     company = get_object_or_404(Company, pk=pk)
-    photo_url = request.POST.get('photo_url', '').strip()
-    
-    if photo_url and company.photos:
-        photos_list = list(company.photos)
-        if photo_url in photos_list:
-            photos_list.remove(photo_url)
-            company.photos = photos_list
-            company.save()
-            
-            # Видалити файл з файлової системи
-            try:
-                from django.core.files.storage import default_storage
-                from django.conf import settings
-                import os
-                # Отримуємо шлях файлу з URL
-                if photo_url.startswith(settings.MEDIA_URL):
-                    file_path = photo_url.replace(settings.MEDIA_URL, '')
-                    if default_storage.exists(file_path):
-                        default_storage.delete(file_path)
-            except Exception:
-                pass  # Ігноруємо помилки видалення файлу
+    photo_id = request.POST.get('photo_id', '')
+    
+    photo = CompanyPhoto.objects.filter(company=company, pk=photo_id).first() if photo_id.isdigit() else None
+    if photo is not None:
+        paths = photo.paths
+        photo.delete()
+        # Видаляємо оригінал і копії зі сховища, якщо на них не посилається інше фото
+        if not CompanyPhoto.objects.filter(file=paths[0]).exists():
+            images.delete_files(*paths)
     
     # Повертаємо порожню відповідь (елемент буде видалено HTMX swap)
     return HttpResponse('', status=200)
@@ -706,6 +541,77 @@ def company_export(request, pk):
     return response
 
 
+@login_required
+@require_http_methods(["GET"])
+def company_bulk_export(request):
+    """Експорт відфільтрованого списку компаній (CSV або XLSX) потоком"""
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in exports.EXPORT_FORMATS:
+        return HttpResponse('Невідомий формат експорту', status=400)
+    
+    # Великі вибірки можна віддати фоновій задачі (див. myapp.jobs)
+    if request.GET.get('background'):
+        params = request.GET.copy()
+        for name in ('format', 'background', 'page', 'cursor'):
+            params.pop(name, None)
+        job = jobs.enqueue('export_companies', {'format': export_format, 'query': params.urlencode()}, user=request.user)
+        return render(request, 'jobs/progress.html', {'job': job})
+    
+    query = CompanyQuery.from_params(request.GET, _user_country(request))
+    return exports.export_response(query.for_export(), export_format)
+
+
+@login_required
+@require_http_methods(["GET", "POST"])
+def company_import(request):
+    """Масовий імпорт компаній з CSV/XLSX (виконується фоновою задачею)"""
+    import os
+    
+    template = 'companies/import_content.html' if is_htmx_request(request) else 'companies/import.html'
+    context = {'extensions': ', '.join(imports.IMPORT_EXTENSIONS)}
+    
+    if request.method == "POST":
+        upload = request.FILES.get('file')
+        extension = os.path.splitext(upload.name)[1].lower() if upload else ''
+        if not upload:
+            messages.error(request, 'Оберіть файл для імпорту.')
+        elif extension not in imports.IMPORT_EXTENSIONS:
+            messages.error(request, f'Непідтримуваний формат файлу. Дозволені: {context["extensions"]}')
+        else:
+            name = jobs.job_storage.save(f'{jobs.IMPORTS_DIR}/{upload.name}', upload)
+            context['job'] = jobs.enqueue('import_companies', {'file': name, 'filename': upload.name}, user=request.user)
+    
+    return render(request, template, context)
+
+
+def _get_user_job(request, pk):
+    """Задача користувача (супер адмін бачить усі)."""
+    job = get_object_or_404(Job, pk=pk)
+    profile = getattr(request.user, 'userprofile', None)
+    if job.created_by_id != request.user.id and not (profile and profile.is_super_admin):
+        raise Http404
+    return job
+
+
+@login_required
+@require_http_methods(["GET"])
+def job_status(request, pk):
+    """Прогрес фонової задачі (HTMX опитує його, поки задача не завершиться)"""
+    job = _get_user_job(request, pk)
+    return render(request, 'jobs/progress.html', {'job': job})
+
+
+@login_required
+@require_http_methods(["GET"])
+def job_download(request, pk):
+    """Файл, створений фоновою задачею (лише власнику; див. jobs.job_storage)"""
+    job = _get_user_job(request, pk)
+    name = job.result.get('file') if job.status == Job.STATUS_DONE else None
+    if not name or not jobs.job_storage.exists(name):
+        raise Http404
+    return FileResponse(jobs.job_storage.open(name, 'rb'), as_attachment=True, filename=job.result.get('filename'))
+
+
 @login_required
 @require_http_methods(["POST"])
 def company_toggle_favorite(request, pk):
@@ -742,7 +648,7 @@ def get_cities_by_country(request):
         return JsonResponse({'cities': []})
     
     try:
-        cities = City.objects.filter(country_id=country_id).order_by('name')
+        cities = reference_data.city_choices(int(country_id))
         cities_data = [{'id': city.id, 'name': city.name} for city in cities]
         return JsonResponse({'cities': cities_data})
     except Exception:
@@ -752,69 +658,49 @@ def get_cities_by_country(request):
 @login_required
 @require_http_methods(["GET"])
 def company_check_duplicates(request):
-    """AJAX endpoint для перевірки дублікатів"""
-    from django.http import JsonResponse
-    
-    phone = normalize_phone_number(request.GET.get('phone', '').strip())
-    website = request.GET.get('website', '').strip()
-    instagram = request.GET.get('instagram', '').strip()
-    telegram = request.GET.get('telegram', '').strip()
+    """AJAX endpoint для перевірки дублікатів.
+
+    Значення порівнюються за нормалізованими ключами (myapp.normalization), усі
+    перевірки виконуються одним UNION-запитом по індексованих колонках ``*_key``.
+    """
     exclude_id = request.GET.get('exclude_id', '')
-    
-    duplicates = {}
-    
-    # Перевірка телефону
-    if phone:
-        query = CompanyPhone.objects.filter(number=phone)
-        if exclude_id:
-            query = query.exclude(company_id=exclude_id)
-        if query.exists():
-            duplicates['phone'] = {
-                'exists': True,
-                'company': query.first().company.name
-            }
-        else:
-            duplicates['phone'] = {'exists': False}
-    
-    # Перевірка website
-    if website:
-        query = Company.objects.filter(website=website)
-        if exclude_id:
-            query = query.exclude(pk=exclude_id)
-        if query.exists():
-            duplicates['website'] = {
-                'exists': True,
-                'company': query.first().name
-            }
+    exclude_id = int(exclude_id) if exclude_id.isdigit() else None
+
+    keys = {'phone': phone_key(request.GET.get('phone', '').strip())}
+    for field_name, make_key in COMPANY_CONTACT_KEYS.items():
+        keys[field_name] = make_key(request.GET.get(field_name, '').strip())
+
+    # Перевіряються лише передані поля; решта у відповідь не потрапляє
+    checked = [rule for rule in ('phone', 'website', 'instagram', 'telegram') if request.GET.get(rule, '').strip()]
+
+    queries = []
+    for rule in checked:
+        if not keys[rule]:
+            continue
+        label = Value(rule, output_field=CharField())
+        if rule == 'phone':
+            query = CompanyPhone.objects.filter(number_key=keys[rule])
+            if exclude_id is not None:
+                query = query.exclude(company_id=exclude_id)
+            query = query.values_list(label, 'company__name')
         else:
-            duplicates['website'] = {'exists': False}
-    
-    # Перевірка instagram
-    if instagram:
-        query = Company.objects.filter(instagram=instagram)
-        if exclude_id:
-            query = query.exclude(pk=exclude_id)
-        if query.exists():
-            duplicates['instagram'] = {
-                'exists': True,
-                'company': query.first().name
-            }
-        else:
-            duplicates['instagram'] = {'exists': False}
-    
-    # Перевірка telegram
-    if telegram:
-        query = Company.objects.filter(telegram=telegram)
-        if exclude_id:
-            query = query.exclude(pk=exclude_id)
-        if query.exists():
-            duplicates['telegram'] = {
-                'exists': True,
-                'company': query.first().name
-            }
+            query = Company.objects.filter(**{f'{rule}_key': keys[rule]})
+            if exclude_id is not None:
+                query = query.exclude(pk=exclude_id)
+            query = query.values_list(label, 'name')
+        queries.append(query.order_by())
+
+    found = {}
+    if queries:
+        for rule, company_name in queries[0].union(*queries[1:], all=True):
+            found.setdefault(rule, company_name)
+
+    duplicates = {}
+    for rule in checked:
+        if rule in found:
+            duplicates[rule] = {'exists': True, 'company': found[rule]}
         else:
-            duplicates['telegram'] = {'exists': False}
-    
+            duplicates[rule] = {'exists': False}
     return JsonResponse(duplicates)
 
 
@@ -848,14 +734,12 @@ def settings_countries(request):
 def settings_cities(request):
     """Управління містами (тільки для супер адміна)"""
     country_filter = request.GET.get('country', '')
-    cities_queryset = City.objects.select_related('country').annotate(
-        companies_count=Count('companies', distinct=True)
-    ).order_by('name')
+    cities_queryset = City.objects.select_related('country').order_by('name')
     
     if country_filter:
         cities_queryset = cities_queryset.filter(country_id=country_filter)
     
-    countries = Country.objects.all().order_by('name')
+    countries = reference_data.get_countries()
     
     template = 'settings/cities_content.html' if is_htmx_request(request) else 'settings/cities.html'
     context = {
@@ -870,9 +754,7 @@ def settings_cities(request):
 @require_http_methods(["GET", "POST"])
 def settings_categories(request):
     """Управління розділами (тільки для супер адміна)"""
-    categories = Category.objects.annotate(
-        companies_count=Count('companies', distinct=True)
-    ).order_by('name')
+    categories = Category.objects.order_by('name')
     
     template = 'settings/categories_content.html' if is_htmx_request(request) else 'settings/categories.html'
     context = {'categories': categories}
@@ -883,15 +765,30 @@ def settings_categories(request):
 @require_http_methods(["GET", "POST"])
 def settings_statuses(request):
     """Управління статусами"""
-    statuses = Status.objects.annotate(
-        companies_count=Count('companies', distinct=True)
-    ).order_by('-is_default', 'name')
+    statuses = Status.objects.order_by('-is_default', 'name')
     
     template = 'settings/statuses_content.html' if is_htmx_request(request) else 'settings/statuses.html'
     context = {'statuses': statuses}
     return render(request, template, context)
 
 
+@super_admin_required
+@require_http_methods(["GET", "POST"])
+def settings_duplicates(request):
+    """Кластери ймовірних дублікатів компаній (тільки для супер адміна)"""
+    if request.method == "POST":
+        job = jobs.enqueue('find_duplicates', {'full': bool(request.POST.get('full'))}, user=request.user)
+        return render(request, 'jobs/progress.html', {'job': job})
+    
+    template = 'settings/duplicates_content.html' if is_htmx_request(request) else 'settings/duplicates.html'
+    context = {
+        'clusters': duplicates.clusters(limit=DUPLICATE_CLUSTERS_PER_PAGE),
+        'clusters_limit': DUPLICATE_CLUSTERS_PER_PAGE,
+        'last_scan': duplicates.last_scan(),
+    }
+    return render(request, template, context)
+
+
 @super_admin_required
 @require_http_methods(["GET"])
 def settings_users(request):
@@ -990,7 +887,7 @@ def country_delete(request, pk):
 def settings_city_add(request):
     """Модальне вікно додавання міста"""
     form = CityForm()
-    countries = Country.objects.all().order_by('name')
+    countries = reference_data.get_countries()
     return render(request, 'settings/modals/city_add.html', {'form': form, 'countries': countries})
 
 
@@ -1000,7 +897,7 @@ def settings_city_edit(request, pk):
     """Модальне вікно редагування міста"""
     city = get_object_or_404(City, pk=pk)
     form = CityForm(instance=city)
-    countries = Country.objects.all().order_by('name')
+    countries = reference_data.get_countries()
     return render(request, 'settings/modals/city_edit.html', {'form': form, 'city': city, 'countries': countries})
 
 
@@ -1009,7 +906,7 @@ def settings_city_edit(request, pk):
 def settings_city_delete(request, pk):
     """Модальне вікно підтвердження видалення міста"""
     city = get_object_or_404(City, pk=pk)
-    companies_count = city.companies.count()
+    companies_count = city.companies_count
     return render(request, 'settings/modals/city_delete.html', {'city': city, 'companies_count': companies_count})
 
 
@@ -1026,7 +923,7 @@ def city_create(request):
         return redirect('myapp:settings_cities')
     else:
         messages.error(request, 'Помилка валідації форми.')
-        countries = Country.objects.all().order_by('name')
+        countries = reference_data.get_countries()
         return render(request, 'settings/modals/city_add.html', {'form': form, 'countries': countries}, status=400)
 
 
@@ -1044,7 +941,7 @@ def city_update(request, pk):
         return redirect('myapp:settings_cities')
     else:
         messages.error(request, 'Помилка валідації форми.')
-        countries = Country.objects.all().order_by('name')
+        countries = reference_data.get_countries()
         return render(request, 'settings/modals/city_edit.html', {'form': form, 'city': city, 'countries': countries}, status=400)
 
 
@@ -1053,6 +950,7 @@ def city_update(request, pk):
 def city_delete(request, pk):
     """Видалення міста через HTMX"""
     city = get_object_or_404(City, pk=pk)
+    # Точна кількість: видалення має спиратися на БД, а не на лічильник
     companies_count = city.companies.count()
     if companies_count > 0:
         messages.error(request, f'Неможливо видалити місто "{city.name}", оскільки до нього прив\'язано {companies_count} компаній.')
@@ -1090,7 +988,7 @@ def settings_category_edit(request, pk):
 def settings_category_delete(request, pk):
     """Модальне вікно підтвердження видалення розділу"""
     category = get_object_or_404(Category, pk=pk)
-    companies_count = category.companies.count()
+    companies_count = category.companies_count
     return render(request, 'settings/modals/category_delete.html', {'category': category, 'companies_count': companies_count})
 
 
@@ -1132,6 +1030,7 @@ def category_update(request, pk):
 def category_delete(request, pk):
     """Видалення категорії через HTMX"""
     category = get_object_or_404(Category, pk=pk)
+    # Точна кількість: видалення має спиратися на БД, а не на лічильник
     companies_count = category.companies.count()
     if companies_count > 0:
         messages.error(request, f'Неможливо видалити розділ "{category.name}", оскільки до нього прив\'язано {companies_count} компаній.')
@@ -1169,7 +1068,7 @@ def settings_status_edit(request, pk):
 def settings_status_delete(request, pk):
     """Модальне вікно підтвердження видалення статусу"""
     status = get_object_or_404(Status, pk=pk)
-    companies_count = status.companies.count()
+    companies_count = status.companies_count
     return render(request, 'settings/modals/status_delete.html', {'status': status, 'companies_count': companies_count})
 
 
@@ -1183,6 +1082,8 @@ def status_create(request):
         if form.cleaned_data.get('is_default'):
             Status.objects.filter(is_default=True).update(is_default=False)
         status = form.save()
+        # update() вище не надсилає сигналів — скидаємо кеш статусів явно
+        transaction.on_commit(lambda: reference_data.invalidate('statuses'))
         messages.success(request, f'Статус "{status.name}" успішно додано.')
         if is_htmx_request(request):
             return redirect('myapp:settings_statuses')
@@ -1203,6 +1104,8 @@ def status_update(request, pk):
         if form.cleaned_data.get('is_default'):
             Status.objects.filter(is_default=True).exclude(pk=pk).update(is_default=False)
         status = form.save()
+        # update() вище не надсилає сигналів — скидаємо кеш статусів явно
+        transaction.on_commit(lambda: reference_data.invalidate('statuses'))
         messages.success(request, f'Статус "{status.name}" успішно оновлено.')
         if is_htmx_request(request):
             return redirect('myapp:settings_statuses')
@@ -1217,6 +1120,7 @@ def status_update(request, pk):
 def status_delete(request, pk):
     """Видалення статусу через HTMX"""
     status = get_object_or_404(Status, pk=pk)
+    # Точна кількість: видалення має спиратися на БД, а не на лічильник
     companies_count = status.companies.count()
     if companies_count > 0:
         messages.error(request, f'Неможливо видалити статус "{status.name}", оскільки до нього прив\'язано {companies_count} компаній.')
@@ -1236,7 +1140,7 @@ def status_delete(request, pk):
 @require_http_methods(["GET"])
 def settings_user_add(request):
     """Модальне вікно додавання користувача"""
-    countries = Country.objects.all().order_by('name')
+    countries = reference_data.get_countries()
     return render(request, 'settings/modals/user_add.html', {'countries': countries})
 
 
@@ -1274,7 +1178,7 @@ def user_create(request):
     
     if errors:
         messages.error(request, 'Помилки валідації: ' + '; '.join(errors))
-        countries = Country.objects.all().order_by('name')
+        countries = reference_data.get_countries()
         return render(request, 'settings/modals/user_add.html', {'countries': countries, 'errors': errors}, status=400)
     
     try:
@@ -1307,7 +1211,7 @@ def user_create(request):
         return redirect('myapp:settings_users')
     except Exception as e:
         messages.error(request, f'Помилка при створенні користувача: {str(e)}')
-        countries = Country.objects.all().order_by('name')
+        countries = reference_data.get_countries()
         return render(request, 'settings/modals/user_add.html', {'countries': countries}, status=400)
 
 
@@ -1316,7 +1220,7 @@ def user_create(request):
 def settings_user_edit(request, pk):
     """Модальне вікно редагування користувача"""
     edit_user = get_object_or_404(User, pk=pk)
-    countries = Country.objects.all().order_by('name')
+    countries = reference_data.get_countries()
     context = {
         'edit_user': edit_user,
         'countries': countries
@@ -1357,7 +1261,7 @@ def user_update(request, pk):
         errors.append('Невірна роль')
     
     if errors:
-        countries = Country.objects.all().order_by('name')
+        countries = reference_data.get_countries()
         return render(request, 'settings/modals/user_edit.html', {
             'edit_user': edit_user,
             'countries': countries,
@@ -1390,7 +1294,7 @@ def user_update(request, pk):
         return redirect('myapp:settings_users')
     except Exception as e:
         messages.error(request, f'Помилка при оновленні користувача: {str(e)}')
-        countries = Country.objects.all().order_by('name')
+        countries = reference_data.get_countries()
         return render(request, 'settings/modals/user_edit.html', {
             'edit_user': edit_user,
             'countries': countries